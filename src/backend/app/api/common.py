@@ -7,47 +7,103 @@ import typing as tp
 from fastapi import (
     Depends,
     HTTPException,
+    Request,
+    Response,
     status,
 )
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from pydantic import ValidationError
+from pydantic import (
+    BaseModel,
+    ValidationError,
+)
 
 from app import schema
-from app.core import security
+from app.core import (
+    metrics,
+    security,
+)
+from app.core.cache import (
+    CachedResponse,
+    response_cache,
+)
 from app.core.config import settings
 from app.crud.base import (
     IUnitOfWork,
     models,
 )
 from app.crud.core import create_uow
+from app.crud.repos.role import RoleRepositoryBase
+from app.utils.asyncutils import (
+    AdmissionError,
+    ConcurrencyLimiter,
+)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+"""str: The response header with the cursor for the next page of items.
+"""
+
+JSON_MEDIA_TYPE = "application/json"
+"""str: The media type for JSON responses.
+"""
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+"""str: The media type for (streamed) newline-delimited JSON responses.
+"""
+
+ETAG_CACHE_CONTROL = "private, no-cache"
+"""str: The cache control for (versioned) responses with entity tags,
+clients may keep them but must revalidate them before each use.
+"""
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="/api/login/access-token",
 )
 
+auth_limiter = ConcurrencyLimiter(
+    limit=settings.AUTH_CONCURRENCY_LIMIT,
+    max_queue=settings.AUTH_QUEUE_SIZE,
+    timeout=settings.AUTH_QUEUE_TIMEOUT,
+)
+metrics.register('auth_limiter', auth_limiter.stats)
+
 
-def get_uow() -> tp.Generator[None, IUnitOfWork, None]:
-    """Yields a new :obj:`UnitOfWork` object to use.
+async def get_uow(
+    request: Request,
+) -> tp.AsyncGenerator[IUnitOfWork, None]:
+    """Yields the :obj:`UnitOfWork` object for the current request.
+
+    A single unit-of-work (and so storage session/connection) is shared
+    by everything handling a request, via the request's state, and is
+    closed once the response has been sent.
 
     Yields
     ------
     UnitOfWork
-        The new unit-of-work instance to use.
+        The (request-scoped) unit-of-work instance to use.
 
     """
+    uow = getattr(request.state, 'uow', None)
+    if uow is not None:
+        yield uow
+        return
+
+    uow = request.state.uow = create_uow()
     try:
-        uow = create_uow()
         yield uow
     finally:
-        uow.close()
+        del request.state.uow
+        await uow.aclose()
 
 
-async def get_current_user(
+async def get_token_payload(
     uow: IUnitOfWork = Depends(get_uow),
     token: str = Depends(reusable_oauth2),
-) -> models.User:
-    """Gets the current user from their token."""
+) -> schema.TokenPayload:
+    """Gets the (validated, unrevoked) payload of the current access
+    token.
+    """
     try:
         payload = jwt.decode(
             token,
@@ -61,7 +117,23 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
 
-    user = uow.user.get(uid=token_data.sub)
+    if token_data.typ not in (None, security.ACCESS_TOKEN_TYPE) or (
+        token_data.jti
+        and await uow.run_sync(uow.revoked_token.is_revoked, token_data.jti)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return token_data
+
+
+async def get_current_user(
+    uow: IUnitOfWork = Depends(get_uow),
+    token_data: schema.TokenPayload = Depends(get_token_payload),
+) -> models.User:
+    """Gets the current user from their token."""
+    user = await uow.run_sync(uow.user.get_cached, token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -76,27 +148,78 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_principal(
+    uow: IUnitOfWork = Depends(get_uow),
+    token_data: schema.TokenPayload = Depends(get_token_payload),
+) -> schema.Principal:
+    """Gets the current user's authorization details.
+
+    Tokens carrying authorization claims are answered from the claims
+    themselves, provided the user's (cached) authorization epoch still
+    matches the token's, otherwise the user is loaded from storage.
+    """
+    if not token_data.has_claims:
+        user = await uow.run_sync(uow.user.get_cached, token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return schema.Principal.from_orm(user)
+
+    epoch = await uow.run_sync(
+        uow.user.get_auth_epoch_cached,
+        token_data.sub,
+    )
+    if epoch is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    elif epoch != token_data.epc:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return schema.Principal(
+        uid=token_data.sub,
+        is_active=token_data.act,
+        is_superuser=token_data.sup,
+        is_admin=token_data.adm,
+        roles=token_data.rls or [],
+        role_mask=token_data.rmk,
+        auth_epoch=token_data.epc,
+    )
+
+
+async def get_current_active_principal(
+    principal: schema.Principal = Depends(get_current_principal),
+) -> schema.Principal:
+    """Gets the current (active) user's authorization details."""
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+
 async def get_current_active_super_user(
-    current_user: models.User = Depends(get_current_active_user),
-) -> models.User:
+    principal: schema.Principal = Depends(get_current_active_principal),
+) -> schema.Principal:
     """Gets the current (active) super user."""
-    if not (current_user.is_superuser or current_user.is_admin):
+    if not (principal.is_superuser or principal.is_admin):
         raise HTTPException(status_code=400, detail="Not enough privileges")
-    return current_user
+    return principal
 
 
 def get_current_active_admin(
-    current_user: models.User = Depends(get_current_active_user),
-) -> models.User:
+    principal: schema.Principal = Depends(get_current_active_principal),
+) -> schema.Principal:
     """Gets the current (active) admin user."""
-    if not current_user.is_admin:
+    if not principal.is_admin:
         raise HTTPException(status_code=400, detail="Not enough privileges")
-    return current_user
+    return principal
 
 
 class get_current_active_user_with_roles:
     """
     Gets the current (active) user with the specified role(s).
+
+    When the principal carries a role mask (and the required roles' bits
+    are known) the check is a single bitwise test, otherwise the
+    principal's role names are checked.
     """
 
     def __init__(self, *roles: str, match_all: bool = False) -> None:
@@ -105,16 +228,306 @@ class get_current_active_user_with_roles:
 
     def __call__(
         self,
-        current_user: models.User = Depends(get_current_active_user)
-    ) -> models.User:
-        if current_user.is_admin:
-            return current_user
-
-        user_roles = (x.name for x in current_user.roles)
-        op = all if self.match_all else any
-        if not op(x in user_roles for x in self.roles):
+        principal: schema.Principal = Depends(get_current_active_principal)
+    ) -> schema.Principal:
+        if principal.is_admin:
+            return principal
+
+        required = None
+        if settings.ROLE_MASK_ENABLED and principal.role_mask is not None:
+            required = RoleRepositoryBase.get_cached_mask(self.roles)
+        if required is not None:
+            matched = (principal.role_mask or 0) & required
+            allowed = (
+                matched == required if self.match_all else matched != 0
+            )
+        else:
+            op = all if self.match_all else any
+            allowed = op(x in principal.roles for x in self.roles)
+        if not allowed:
             raise HTTPException(
                 status_code=400,
                 detail="Not enough privileges",
             )
-        return current_user
+        return principal
+
+
+class limit_concurrency:
+    """
+    Limits concurrent requests using the given limiter, rejecting any
+    which can't be admitted with a ``503`` (and ``Retry-After``) error.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        retry_after: int = settings.AUTH_RETRY_AFTER,
+    ) -> None:
+        self.limiter = limiter
+        self.retry_after = retry_after
+
+    async def __call__(self) -> tp.AsyncGenerator[None, None]:
+        try:
+            await self.limiter.acquire()
+        except AdmissionError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again later",
+                headers={'Retry-After': str(self.retry_after)},
+            )
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+
+limit_auth_concurrency = limit_concurrency(auth_limiter)
+"""limit_concurrency: Admission control for password-verifying requests."""
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether or not the client asked for a (streamed) NDJSON response.
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+
+def encode_json(model: tp.Type[BaseModel], obj: tp.Any) -> bytes:
+    """Encodes an object (or list of objects) as JSON, using the given
+    (response) schema.
+
+    Parameters
+    ----------
+    model : Type[BaseModel]
+        The (response) schema to serialize the object(s) with.
+    obj : Any
+        The object, or list of objects, to encode.
+
+    Returns
+    -------
+    bytes
+        The encoded JSON document.
+
+    """
+    if isinstance(obj, (list, tuple)):
+        return b"[" + b",".join(encode_json(model, x) for x in obj) + b"]"
+    ret = model.from_orm(obj).json(by_alias=True)
+    if isinstance(ret, str):
+        ret = ret.encode('utf-8')
+    return ret
+
+
+async def stream_ndjson(
+    uow: IUnitOfWork,
+    get_page: tp.Callable[..., tp.Tuple[tp.List[tp.Any], tp.Optional[str]]],
+    model: tp.Type[BaseModel],
+    *,
+    cursor: tp.Optional[str] = None,
+    limit: tp.Optional[int] = None,
+    batch_size: tp.Optional[int] = None,
+) -> StreamingResponse:
+    """Streams the objects from a paged repository method as NDJSON.
+
+    Objects are fetched a batch at a time (each a single keyset-paged
+    query) and each batch is serialized and sent before the next is
+    fetched, so memory use doesn't grow with the number of objects.  The
+    first batch is fetched before the response is started, so an invalid
+    `cursor` gets a ``400`` response rather than a broken stream.
+
+    Parameters
+    ----------
+    uow : IUnitOfWork
+        The unit of work to fetch the objects with.
+    get_page : Callable
+        The repository's ``get_page`` method to fetch the objects with.
+    model : Type[BaseModel]
+        The (response) schema to serialize each object with.
+    cursor : str, optional
+        The cursor to start streaming from (default is the start).
+    limit : int, optional
+        The maximum number of objects to stream (default is all).
+    batch_size : int, optional
+        The number of objects to fetch (and send) at a time (default is
+        the ``STREAM_BATCH_SIZE`` setting).
+
+    Returns
+    -------
+    StreamingResponse
+        The response streaming the objects, one JSON document per line.
+
+    Raises
+    ------
+    HTTPException
+        If the given `cursor` isn't valid.
+
+    """
+    batch_size = batch_size or settings.STREAM_BATCH_SIZE
+
+    def _get_chunk(
+        cursor: tp.Optional[str],
+        size: int,
+    ) -> tp.Tuple[bytes, tp.Optional[str]]:
+        items, cursor = get_page(cursor=cursor, limit=size)
+        lines = [encode_json(model, item) for item in items]
+        lines.append(b"")
+        return b"\n".join(lines) if items else b"", cursor
+
+    def _get_size(remaining: tp.Optional[int]) -> int:
+        return batch_size if remaining is None else min(batch_size, remaining)
+
+    first, next_cursor, remaining = b"", cursor, limit
+    if remaining is None or remaining > 0:
+        size = _get_size(remaining)
+        try:
+            first, next_cursor = await uow.run_sync(_get_chunk, cursor, size)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if remaining is not None:
+            remaining -= size
+
+    async def _generate() -> tp.AsyncIterator[bytes]:
+        nonlocal next_cursor, remaining
+        if first:
+            yield first
+        while next_cursor is not None and (
+            remaining is None or remaining > 0
+        ):
+            size = _get_size(remaining)
+            chunk, next_cursor = await uow.run_sync(
+                _get_chunk,
+                next_cursor,
+                size,
+            )
+            if chunk:
+                yield chunk
+            if remaining is not None:
+                remaining -= size
+
+    return StreamingResponse(_generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def make_etag(*parts: tp.Any) -> str:
+    """Makes a (strong) entity tag from the given version parts.
+
+    Parameters
+    ----------
+    parts : Any
+        The values (e.g. object IDs and stored versions) which, together,
+        change whenever the response's content does.
+
+    Returns
+    -------
+    str
+        The (quoted) entity tag to use.
+
+    """
+    return '"' + '.'.join(str(x) for x in parts) + '"'
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Sets the entity tag (and cache control) headers of a response."""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = ETAG_CACHE_CONTROL
+
+
+def check_etag(
+    request: Request,
+    response: Response,
+    etag: str,
+) -> tp.Optional[Response]:
+    """Checks the request's ``If-None-Match`` against the current `etag`.
+
+    The `etag` is set on the (eventual) `response` either way, and if
+    the client's copy is still current an empty ``304 Not Modified``
+    response is returned to send instead, so the endpoint can skip
+    loading and serializing the content altogether.
+
+    Parameters
+    ----------
+    request : Request
+        The request being handled.
+    response : Response
+        The (partial) response for the request.
+    etag : str
+        The current entity tag of the requested content (see
+        :obj:`make_etag`).
+
+    Returns
+    -------
+    Optional[Response]
+        The ``304`` response to send (if the client's copy is current,
+        ``None`` otherwise).
+
+    """
+    set_etag(response, etag)
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        # - Weak comparison, as RFC 7232 specifies for If-None-Match
+        if tag == '*' or (tag[2:] if tag.startswith('W/') else tag) == etag:
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={
+                    'ETag': etag,
+                    'Cache-Control': ETAG_CACHE_CONTROL,
+                },
+            )
+    return None
+
+
+async def cached_response(
+    request: Request,
+    route: str,
+    etag: str,
+    render: tp.Callable[[], tp.Awaitable[CachedResponse]],
+) -> Response:
+    """Gets the (JSON) response for a request from the response cache,
+    rendering (and caching) it if needed.
+
+    Responses are cached (already encoded) by `route`, request path and
+    query parameters, and the `etag` of the content, which changes with
+    the versions of the collections (or objects) it's made from.  So a
+    cached response is never stale, and entries for old versions simply
+    age out of the cache.
+
+    Parameters
+    ----------
+    request : Request
+        The request being handled.
+    route : str
+        The name of the route handling the request (the cache's hit
+        rates are reported by route).
+    etag : str
+        The current entity tag of the requested content (see
+        :obj:`make_etag`).
+    render : Callable[[], Awaitable[CachedResponse]]
+        The function to get the encoded response body (and any extra
+        headers) with, on a cache miss.
+
+    Returns
+    -------
+    Response
+        The (JSON) response to send.
+
+    """
+    key = (
+        route,
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        etag,
+    )
+    cached = response_cache.get(key, group=route)
+    if cached is None:
+        cached = await render()
+        response_cache.set(key, cached)
+    body, headers = cached
+    return Response(
+        content=body,
+        media_type=JSON_MEDIA_TYPE,
+        headers={
+            **headers,
+            'ETag': etag,
+            'Cache-Control': ETAG_CACHE_CONTROL,
+        },
+    )
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Middleware for the API application.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class RequestMetricsMiddleware:
+    """
+    Tracks per-request metrics (e.g. database connection checkouts).
+
+    The checkout count is reported in the ``X-DB-Checkouts`` response
+    header (if the ``DB_CHECKOUT_HEADER`` setting is enabled).
+
+    Parameters
+    ----------
+    app : ASGIApp
+        The (wrapped) application to track the requests of.
+
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with metrics.track_request() as counts:
+            async def _send(message: Message) -> None:
+                if (
+                    message['type'] == 'http.response.start'
+                    and settings.DB_CHECKOUT_HEADER
+                ):
+                    headers = MutableHeaders(scope=message)
+                    headers['X-DB-Checkouts'] = str(
+                        counts.get('db_checkouts', 0)
+                    )
+                await send(message)
+
+            await self.app(scope, receive, _send)
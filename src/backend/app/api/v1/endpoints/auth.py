@@ -2,7 +2,10 @@
 """
 Login API endpoints
 """
-from datetime import timedelta
+from datetime import (
+    datetime,
+    timedelta,
+)
 import typing as tp
 from uuid import UUID
 
@@ -14,7 +17,11 @@ from fastapi import (
 )
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import EmailStr
+from jose import jwt
+from pydantic import (
+    EmailStr,
+    ValidationError,
+)
 
 from app import schema
 from app.api import common
@@ -32,15 +39,22 @@ from app.crud.base import (
 router = APIRouter()
 
 
-@router.post("/login/access-token", response_model=schema.Token)
+@router.post(
+    "/login/access-token",
+    response_model=schema.Token,
+    dependencies=[Depends(common.limit_auth_concurrency)],
+)
 async def login_access_token(
     *,
     uow: IUnitOfWork = Depends(common.get_uow),
     form_data: OAuth2PasswordRequestForm = Depends(),
-) -> tp.Dict[str, str]:
+) -> tp.Dict[str, tp.Any]:
     """OAuth2 compatible login to get access token for future requests.
     """
-    user = uow.user.authenticate(form_data.username, form_data.password)
+    user = await uow.user.authenticate(
+        form_data.username,
+        form_data.password,
+    )
     if not user:
         raise HTTPException(
             status_code=400,
@@ -51,23 +65,112 @@ async def login_access_token(
             status_code=400,
             detail="Inactive user",
         )
+    async with uow:
+        refresh = await uow.run_sync(uow.refresh_token.issue, user)
+    return _make_tokens(user, refresh)
+
+
+@router.post("/login/refresh", response_model=schema.Token)
+async def login_refresh_token(
+    *,
+    uow: IUnitOfWork = Depends(common.get_uow),
+    refresh_token: str = Body(..., alias='refreshToken', embed=True),
+) -> tp.Dict[str, tp.Any]:
+    """Exchanges a refresh token for new access and refresh tokens.
+
+    Each refresh token can only be used once, re-using one revokes all
+    refresh tokens descended from the same login.
+    """
+    token_data = _decode_refresh_token(refresh_token)
+    if token_data is None:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+
+    async with uow:
+        refresh = await uow.run_sync(uow.refresh_token.rotate, token_data.jti)
+    if refresh is None:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+
+    user = refresh.user
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return _make_tokens(user, refresh)
+
+
+def _decode_refresh_token(token: str) -> tp.Optional[schema.TokenPayload]:
+    """Decodes (and validates) the given refresh token."""
+    try:
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[security.ALGORITHM],
+        )
+        token_data = schema.TokenPayload(**payload)
+    except (jwt.JWTError, ValidationError):
+        return None
+    if token_data.typ != security.REFRESH_TOKEN_TYPE or not token_data.fam:
+        return None
+    return token_data
+
+
+def _make_tokens(
+    user: models.User,
+    refresh: models.RefreshToken,
+) -> tp.Dict[str, tp.Any]:
+    """Creates the access (and refresh) token response for a user."""
     expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
             user.uid,
             expires_delta=expires,
+            claims=security.get_access_token_claims(user),
         ),
         "token_type": "bearer",
+        "expires_in": int(expires.total_seconds()),
+        "refresh_token": security.create_refresh_token(
+            user.uid,
+            refresh.jti,
+            refresh.family,
+            refresh.expires,
+        ),
     }
 
 
 @router.post("/logout", response_model=schema.Msg)
 async def logout(
     *,
+    uow: IUnitOfWork = Depends(common.get_uow),
+    token_data: schema.TokenPayload = Depends(common.get_token_payload),
     current_user: models.User = Depends(common.get_current_user),
+    refresh_token: tp.Optional[str] = Body(
+        None,
+        alias='refreshToken',
+        embed=True,
+    ),
 ) -> tp.Dict[str, str]:
-    """Logs out the currently logged-in user."""
-    # Any additional actions here
+    """Logs out the currently logged-in user (revoking their token and,
+    if given, their refresh token's family).
+    """
+    refresh_data = _decode_refresh_token(refresh_token or '')
+    if refresh_data is not None and refresh_data.sub == current_user.uid:
+        async with uow:
+            await uow.run_sync(
+                uow.refresh_token.revoke_family,
+                refresh_data.fam,
+            )
+
+    if token_data.jti:
+        if token_data.exp:
+            expires = datetime.utcfromtimestamp(token_data.exp)
+        else:
+            expires = datetime.utcnow() + timedelta(
+                minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+            )
+        async with uow:
+            await uow.run_sync(
+                uow.revoked_token.revoke,
+                token_data.jti,
+                expires,
+            )
     return {
         'msg': f'Successfully logged out: {current_user.email}',
     }
@@ -82,7 +185,11 @@ async def test_token(
     return current_user
 
 
-@router.post("/login/update", response_model=schema.User)
+@router.post(
+    "/login/update",
+    response_model=schema.User,
+    dependencies=[Depends(common.limit_auth_concurrency)],
+)
 async def update_login_me(
     *,
     password: str = Body(...),
@@ -92,7 +199,7 @@ async def update_login_me(
     uow: IUnitOfWork = Depends(common.get_uow),
 ) -> models.User:
     """Updates the user's login credentials."""
-    user = uow.user.authenticate(current_user.email, password)
+    user = await uow.user.authenticate(current_user.email, password)
     if not user:
         raise HTTPException(
             status_code=400,
@@ -109,8 +216,8 @@ async def update_login_me(
         user_in.email = new_email
     if new_password:
         user_in.password = new_password
-    with uow:
-        new_user = uow.user.update(obj=user, obj_in=user_in)
+    async with uow:
+        new_user = await uow.user.update_async(obj=user, obj_in=user_in)
     return new_user
 
 
@@ -121,7 +228,7 @@ async def recover_password(
     uow: IUnitOfWork = Depends(common.get_uow),
 ) -> tp.Dict[str, str]:
     """Sends a password recovery email."""
-    user = uow.user.get_by_email(user_email)
+    user = await uow.run_sync(uow.user.get_by_email, user_email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -136,7 +243,11 @@ async def recover_password(
     return {"msg": "Password recovery email sent"}
 
 
-@router.post("/reset-password/", response_model=schema.Msg)
+@router.post(
+    "/reset-password/",
+    response_model=schema.Msg,
+    dependencies=[Depends(common.limit_auth_concurrency)],
+)
 async def reset_password(
     *,
     token: str = Body(...),
@@ -147,7 +258,7 @@ async def reset_password(
     email = security.verify_password_reset_token(token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = uow.user.get_by_email(email)
+    user = await uow.run_sync(uow.user.get_by_email, email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -156,7 +267,6 @@ async def reset_password(
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    hashed_pw = security.get_password_hash(new_password)
-    with uow:
-        uow.user.update(user, hashed_password=hashed_pw)
+    async with uow:
+        await uow.user.update_async(user, {'password': new_password})
     return {"msg": "Password updated successfully"}
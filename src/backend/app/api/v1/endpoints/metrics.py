@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Metrics API endpoints.
+"""
+import typing as tp
+
+from fastapi import (
+    APIRouter,
+    Depends,
+)
+
+from app import schema
+from app.api.common import get_current_active_admin
+from app.core import metrics
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=tp.Dict[str, tp.Dict[str, tp.Any]])
+async def read_metrics(
+    *,
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> tp.Dict[str, tp.Dict[str, tp.Any]]:
+    """Gets the current runtime metrics for this worker process."""
+    return metrics.collect()
@@ -11,50 +11,74 @@ from fastapi import (
     Depends,
     HTTPException,
     Query,
+    Request,
+    Response,
 )
 from fastapi.encoders import jsonable_encoder
 
 from app import schema
 from app.api.common import (
+    cached_response,
+    check_etag,
+    encode_json,
     get_current_active_admin,
     get_current_active_user,
     get_uow,
+    make_etag,
+    NEXT_CURSOR_HEADER,
+    stream_ndjson,
+    wants_ndjson,
 )
+from app.core.cache import CachedResponse
 from app.core.config import settings
 from app.crud.base import (
     IUnitOfWork,
     models,
 )
+from app.utils.strutils import camel_to_snake
 
 
 router = APIRouter()
 
 
-@router.get("/{role_id}")
+@router.get("/count", response_model=int)
+async def read_role_count(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> int:
+    """Gets the total number of roles in the storage system."""
+    return await uow.run_sync(lambda: uow.role.count)
+
+
+@router.get("/{role_id}", response_model=schema.Role)
 async def read_role_by_id(
     role_id: UUID,
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_admin),
-) -> models.Role:
-    """Gets a specific role by their unique ID."""
-    role = uow.role.get(role_id)
+    request: Request,
+    response: Response,
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> tp.Union[models.Role, Response]:
+    """Gets a specific role by their unique ID.
+
+    The response carries an ``ETag``, so an unchanged role can be
+    revalidated with ``If-None-Match`` for an empty ``304`` response.
+    """
+    role = await uow.run_sync(uow.role.get, role_id)
     if not role:
         raise HTTPException(
             status_code=404,
             detail="The role with this ID doesn't exist",
         )
-    return role
+    etag = make_etag(role.uid.hex, role.version)
+    if (not_modified := check_etag(request, response, etag)) is not None:
+        return not_modified
 
+    async def _render() -> CachedResponse:
+        return encode_json(schema.Role, role), {}
 
-@router.get("/count", response_model=int)
-async def read_role_count(
-    *,
-    uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_admin),
-) -> int:
-    """Gets the total number of roles in the storage system."""
-    return uow.role.count
+    return await cached_response(request, 'read_role_by_id', etag, _render)
 
 
 @router.get("/", response_model=tp.List[schema.Role])
@@ -62,12 +86,72 @@ async def read_roles(
     *,
     uow: IUnitOfWork = Depends(get_uow),
     skip: int = Query(0),
+    cursor: tp.Optional[str] = Query(None),
     limit: tp.Optional[int] = Query(None),
-    current_user: models.User = Depends(get_current_active_admin),
-) -> tp.List[models.Role]:
-    """Gets all the roles specified."""
-    roles = uow.role.get_multi(skip=skip, limit=limit)
-    return roles
+    request: Request,
+    response: Response,
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> tp.Union[tp.List[models.Role], Response]:
+    """Gets all the roles specified.
+
+    Pages after the first should be requested with the ``cursor`` given
+    in the ``X-Next-Cursor`` header of the previous page (the header is
+    omitted on the last page), which is as fast as getting the first
+    page.  Using ``skip`` instead is still supported, but gets slower
+    the further into the roles it is.
+
+    Requesting ``application/x-ndjson`` streams the roles instead (one
+    per line, in constant memory), from the ``cursor`` (if given) up to
+    the ``limit`` (if given).
+
+    Pages carry an ``ETag`` (from the roles' collection version), so
+    unchanged pages can be revalidated with ``If-None-Match`` for an
+    empty ``304`` response, and are served from the response cache
+    until the roles change.
+    """
+    if skip and cursor:
+        raise HTTPException(
+            status_code=400,
+            detail="Only one of skip or cursor can be given",
+        )
+    if not skip and wants_ndjson(request):
+        return await stream_ndjson(
+            uow,
+            uow.role.get_page,
+            schema.Role,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    etag = make_etag(
+        'roles',
+        await uow.run_sync(uow.role.get_collection_version),
+    )
+    if (not_modified := check_etag(request, response, etag)) is not None:
+        return not_modified
+
+    async def _render() -> CachedResponse:
+        if skip:
+            roles = await uow.run_sync(
+                uow.role.get_multi,
+                skip=skip,
+                limit=limit,
+            )
+            return encode_json(schema.Role, roles), {}
+        try:
+            roles, next_cursor = await uow.run_sync(
+                uow.role.get_page,
+                cursor=cursor,
+                limit=limit,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        headers = {}
+        if next_cursor is not None:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return encode_json(schema.Role, roles), headers
+
+    return await cached_response(request, 'read_roles', etag, _render)
 
 
 @router.post("/", response_model=schema.Role)
@@ -75,31 +159,72 @@ async def create_role(
     *,
     uow: IUnitOfWork = Depends(get_uow),
     role_in: schema.RoleCreate = Body(...),
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> models.Role:
     """Creates a new role."""
-    with uow:
-        role = uow.role.create(obj_in=role_in)
+    async with uow:
+        role = await uow.run_sync(uow.role.create, obj_in=role_in)
     return role
 
 
+@router.put("/bulk", response_model=schema.BulkResult)
+async def update_roles_bulk(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    criteria: tp.Dict[str, tp.Any] = Body(..., alias='filter'),
+    values: schema.RoleBulkUpdate = Body(...),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> schema.BulkResult:
+    """Updates all the roles matching the given filter at once.
+
+    The ``filter`` gives the values (by field) the roles to update must
+    have, where a list of values matches any of them (e.g. ``{"name":
+    [...]}``).  Roles can only be selected by their ``uid`` or ``name``.
+    Only roles which aren't already set to the ``values`` are updated
+    (and counted).
+    """
+    try:
+        async with uow:
+            count = await uow.run_sync(
+                uow.role.update_many,
+                {camel_to_snake(k): v for k, v in criteria.items()},
+                values.dict(exclude_unset=True),
+            )
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    return schema.BulkResult(count=count)
+
+
+@router.delete("/bulk", response_model=schema.BulkResult)
+async def delete_roles_bulk(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    uids: tp.List[UUID] = Body(..., embed=True),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> schema.BulkResult:
+    """Deletes all the given roles from the system at once."""
+    async with uow:
+        count = await uow.run_sync(uow.role.remove_many, uids)
+    return schema.BulkResult(count=count)
+
+
 @router.put("/{role_id}", response_model=schema.Role)
 async def update_role(
     role_id: UUID,
     *,
     uow: IUnitOfWork = Depends(get_uow),
     role_in: schema.RoleUpdate = Body(...),
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> models.Role:
     """Updates a role's information."""
-    role = uow.role.get(role_id)
+    role = await uow.run_sync(uow.role.get, role_id)
     if not role:
         raise HTTPException(
             status_code=404,
             detail="The role with this ID doesn't exist",
         )
-    with uow:
-        role = uow.role.update(obj=role, obj_in=role_in)
+    async with uow:
+        role = await uow.run_sync(uow.role.update, obj=role, obj_in=role_in)
     return role
 
 
@@ -108,15 +233,15 @@ async def delete_role(
     role_id: UUID,
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> None:
     """Deletes the specified role from the system."""
-    role = uow.role.get(role_id)
+    role = await uow.run_sync(uow.role.get, role_id)
     if not role:
         raise HTTPException(
             status_code=404,
             detail="The role with this ID doesn't exist",
         )
-    with uow:
-        uow.role.remove(role_id)
+    async with uow:
+        await uow.run_sync(uow.role.remove, role_id)
     return
@@ -11,22 +11,38 @@ from fastapi import (
     Depends,
     HTTPException,
     Query,
+    Request,
+    Response,
 )
 from fastapi.encoders import jsonable_encoder
-from pydantic import EmailStr
+from pydantic import (
+    EmailStr,
+    ValidationError,
+)
 
 from app import schema
 from app.api.common import (
+    cached_response,
+    check_etag,
+    encode_json,
     get_current_active_admin,
+    get_current_active_principal,
     get_current_active_user,
     get_uow,
+    make_etag,
+    NEXT_CURSOR_HEADER,
+    set_etag,
+    stream_ndjson,
+    wants_ndjson,
 )
+from app.core.cache import CachedResponse
 from app.core.config import settings
 from app.core.email import send_new_account_email
 from app.crud.base import (
     IUnitOfWork,
     models,
 )
+from app.utils.strutils import camel_to_snake
 
 
 router = APIRouter()
@@ -37,12 +53,73 @@ async def read_users(
     *,
     uow: IUnitOfWork = Depends(get_uow),
     skip: int = Query(0),
+    cursor: tp.Optional[str] = Query(None),
     limit: tp.Optional[int] = Query(None),
-    current_user: models.User = Depends(get_current_active_admin),
-) -> tp.List[models.User]:
-    """Gets all the users specified."""
-    users = uow.user.get_multi(skip=skip, limit=limit)
-    return users
+    request: Request,
+    response: Response,
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> tp.Union[tp.List[models.User], Response]:
+    """Gets all the users specified.
+
+    Pages after the first should be requested with the ``cursor`` given
+    in the ``X-Next-Cursor`` header of the previous page (the header is
+    omitted on the last page), which is as fast as getting the first
+    page.  Using ``skip`` instead is still supported, but gets slower
+    the further into the users it is.
+
+    Requesting ``application/x-ndjson`` streams the users instead (one
+    per line, in constant memory), from the ``cursor`` (if given) up to
+    the ``limit`` (if given).
+
+    Pages carry an ``ETag`` (from the users' and roles' collection
+    versions), so unchanged pages can be revalidated with
+    ``If-None-Match`` for an empty ``304`` response, and are served from
+    the response cache until the users (or roles) change.
+    """
+    if skip and cursor:
+        raise HTTPException(
+            status_code=400,
+            detail="Only one of skip or cursor can be given",
+        )
+    if not skip and wants_ndjson(request):
+        return await stream_ndjson(
+            uow,
+            uow.user.get_page,
+            schema.User,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    etag = make_etag(
+        'users',
+        await uow.run_sync(uow.user.get_collection_version),
+        await uow.run_sync(uow.role.get_collection_version),
+    )
+    if (not_modified := check_etag(request, response, etag)) is not None:
+        return not_modified
+
+    async def _render() -> CachedResponse:
+        if skip:
+            users = await uow.run_sync(
+                uow.user.get_multi,
+                skip=skip,
+                limit=limit,
+            )
+            return encode_json(schema.User, users), {}
+        try:
+            users, next_cursor = await uow.run_sync(
+                uow.user.get_page,
+                cursor=cursor,
+                limit=limit,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        headers = {}
+        if next_cursor is not None:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return encode_json(schema.User, users), headers
+
+    return await cached_response(request, 'read_users', etag, _render)
 
 
 @router.post("/", response_model=schema.User)
@@ -50,18 +127,18 @@ async def create_user(
     *,
     uow: IUnitOfWork = Depends(get_uow),
     user_in: schema.UserCreate,
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> models.User:
     """Creates a new user."""
-    user = uow.user.get_by_email(user_in.email)
+    user = await uow.run_sync(uow.user.get_by_email, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists",
         )
 
-    with uow:
-        user = uow.user.create(obj_in=user_in)
+    async with uow:
+        user = await uow.user.create_async(obj_in=user_in)
 
     if settings.EMAILS_ENABLED and user_in.email:
         send_new_account_email(
@@ -73,6 +150,108 @@ async def create_user(
     return user
 
 
+@router.post("/bulk", response_model=schema.BulkCreateResult)
+async def create_users_bulk(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    users_in: tp.List[tp.Dict[str, tp.Any]] = Body(...),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> schema.BulkCreateResult:
+    """Creates new users in bulk.
+
+    Each user is validated (and created) independently, so any invalid
+    users (or ones whose email is already in use) are reported in the
+    ``errors`` (by their index in the request) rather than aborting the
+    rest.  No new account emails are sent.
+    """
+    if len(users_in) > settings.USERS_BULK_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.USERS_BULK_MAX} users can be created"
+                   " at once",
+        )
+
+    ret = schema.BulkCreateResult()
+    objs_in: tp.Dict[int, schema.UserCreate] = {}
+    for i, data_in in enumerate(users_in):
+        try:
+            objs_in[i] = schema.UserCreate(**data_in)
+        except ValidationError as ex:
+            ret.errors.append(schema.BulkError(
+                index=i,
+                detail="; ".join(
+                    f"{'.'.join(str(x) for x in e['loc'])}: {e['msg']}"
+                    for e in ex.errors()
+                ),
+            ))
+
+    index = list(objs_in)
+    async with uow:
+        created, errors = await uow.user.create_many(list(objs_in.values()))
+    ret.created = [
+        schema.BulkCreated(index=index[i], uid=uid)
+        for i, uid in created.items()
+    ]
+    ret.errors.extend(
+        schema.BulkError(index=index[i], detail=detail)
+        for i, detail in errors.items()
+    )
+    ret.errors.sort(key=lambda x: x.index)
+    return ret
+
+
+@router.put("/bulk", response_model=schema.BulkResult)
+async def update_users_bulk(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    criteria: tp.Dict[str, tp.Any] = Body(..., alias='filter'),
+    values: schema.UserBulkUpdate = Body(...),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> schema.BulkResult:
+    """Updates all the users matching the given filter at once.
+
+    The ``filter`` gives the values (by field) the users to update must
+    have, where a list of values matches any of them (e.g. ``{"uid":
+    [...]}``).  Users can only be selected by their ``uid``, ``email``,
+    ``isActive``, ``isSuperuser`` or ``isAdmin``.  Only users which
+    aren't already set to the ``values`` are updated (and counted).
+    """
+    try:
+        async with uow:
+            count = await uow.run_sync(
+                uow.user.update_many,
+                {camel_to_snake(k): v for k, v in criteria.items()},
+                values.dict(exclude_none=True),
+            )
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    return schema.BulkResult(count=count)
+
+
+@router.delete("/bulk", response_model=schema.BulkResult)
+async def delete_users_bulk(
+    *,
+    uow: IUnitOfWork = Depends(get_uow),
+    uids: tp.List[UUID] = Body(..., embed=True),
+    current_user: schema.Principal = Depends(get_current_active_admin),
+) -> schema.BulkResult:
+    """Deletes all the given users from the system at once."""
+    if len(uids) > settings.USERS_BULK_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.USERS_BULK_MAX} users can be deleted"
+                   " at once",
+        )
+    if current_user.uid in uids:
+        raise HTTPException(
+            status_code=400,
+            detail="You cannot delete yourself",
+        )
+    async with uow:
+        count = await uow.run_sync(uow.user.remove_many, uids)
+    return schema.BulkResult(count=count)
+
+
 @router.put("/me", response_model=schema.User)
 async def update_user_me(
     *,
@@ -85,8 +264,12 @@ async def update_user_me(
     if name is not None:
         user_in.name = name
 
-    with uow:
-        user = uow.user.update(obj=current_user, obj_in=user_in)
+    async with uow:
+        user = await uow.run_sync(
+            uow.user.update,
+            obj=current_user,
+            obj_in=user_in,
+        )
     return user
 
 
@@ -94,10 +277,36 @@ async def update_user_me(
 async def read_user_me(
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_user),
-) -> models.User:
-    """Gets the current user's information."""
-    return current_user
+    request: Request,
+    response: Response,
+    current_user: schema.Principal = Depends(get_current_active_principal),
+) -> tp.Union[models.User, Response]:
+    """Gets the current user's information.
+
+    The response carries an ``ETag``, so an unchanged user can be
+    revalidated with ``If-None-Match`` for an empty ``304`` response
+    (checked against the user's stored version, without loading them).
+    """
+    version = await uow.run_sync(
+        uow.user.get_object_version,
+        current_user.uid,
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    roles_version = await uow.run_sync(uow.role.get_collection_version)
+    etag = make_etag(current_user.uid.hex, version, roles_version)
+    if (not_modified := check_etag(request, response, etag)) is not None:
+        return not_modified
+
+    user = await uow.run_sync(uow.user.get, current_user.uid)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    set_etag(
+        response,
+        make_etag(current_user.uid.hex, user.version, roles_version),
+    )
+    return user
 
 
 @router.get("/open", response_model=schema.User)
@@ -115,15 +324,15 @@ async def create_user_open(
             detail="Open user registration is not allowed",
         )
 
-    user = uow.user.get_by_email(email)
+    user = await uow.run_sync(uow.user.get_by_email, email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email address already exists",
         )
     user_in = schema.UserCreate(email=email, password=password, name=name)
-    with uow:
-        user = uow.user.create(obj_in=user_in)
+    async with uow:
+        user = await uow.user.create_async(obj_in=user_in)
     return user
 
 
@@ -131,10 +340,15 @@ async def create_user_open(
 async def read_user_count(
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_admin),
+    role: tp.Optional[str] = Query(None),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> int:
-    """Gets the total count of user objects in the system."""
-    return uow.user.count
+    """Gets the total count of user objects in the system (or of those
+    with the given ``role``).
+    """
+    if role is not None:
+        return await uow.run_sync(uow.user.count_by_role, role)
+    return await uow.run_sync(lambda: uow.user.count)
 
 
 @router.get("/{user_id}", response_model=schema.User)
@@ -142,22 +356,40 @@ async def read_user_by_id(
     user_id: UUID,
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_user),
-) -> models.User:
-    """Gets a specific user by their unique ID."""
-    user = uow.user.get(user_id)
-    if not user:
+    request: Request,
+    response: Response,
+    current_user: schema.Principal = Depends(get_current_active_principal),
+) -> tp.Union[models.User, Response]:
+    """Gets a specific user by their unique ID.
+
+    The response carries an ``ETag``, so an unchanged user can be
+    revalidated with ``If-None-Match`` for an empty ``304`` response
+    (checked against the user's stored version, without loading them).
+    """
+    version = await uow.run_sync(uow.user.get_object_version, user_id)
+    if version is None:
         raise HTTPException(
             status_code=404,
             detail="The user with this ID doesn't exist",
         )
-    if user == current_user:
-        return user
-    if not current_user.is_superuser:
+    if user_id != current_user.uid and not current_user.is_superuser:
         raise HTTPException(
             status_code=400,
             detail="Not enough privileges",
         )
+
+    roles_version = await uow.run_sync(uow.role.get_collection_version)
+    etag = make_etag(user_id.hex, version, roles_version)
+    if (not_modified := check_etag(request, response, etag)) is not None:
+        return not_modified
+
+    user = await uow.run_sync(uow.user.get, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this ID doesn't exist",
+        )
+    set_etag(response, make_etag(user.uid.hex, user.version, roles_version))
     return user
 
 
@@ -167,17 +399,17 @@ async def update_user(
     *,
     uow: IUnitOfWork = Depends(get_uow),
     user_in: schema.UserUpdate = Body(...),
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> models.User:
     """Updates a user's information."""
-    user = uow.user.get(user_id)
+    user = await uow.run_sync(uow.user.get, user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="The user with this ID doesn't exist",
         )
-    with uow:
-        user = uow.user.update(obj=user, obj_in=user_in)
+    async with uow:
+        user = await uow.user.update_async(obj=user, obj_in=user_in)
     return user
 
 
@@ -186,10 +418,10 @@ async def delete_user(
     user_id: UUID,
     *,
     uow: IUnitOfWork = Depends(get_uow),
-    current_user: models.User = Depends(get_current_active_admin),
+    current_user: schema.Principal = Depends(get_current_active_admin),
 ) -> None:
     """Delete's a user from the system."""
-    user = uow.user.get(user_id)
+    user = await uow.run_sync(uow.user.get, user_id)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -200,6 +432,6 @@ async def delete_user(
             status_code=400,
             detail="You cannot delete yourself",
         )
-    with uow:
-        uow.user.remove(user_id)
+    async with uow:
+        await uow.run_sync(uow.user.remove, user_id)
     return
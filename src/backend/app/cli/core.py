@@ -3,6 +3,7 @@
 CLI tool core components and functionality.
 """
 from functools import partial
+import json
 import logging
 import typing as tp
 
@@ -23,6 +24,7 @@ from app.cli.settings import (
 from app.cli.utils import (
     get_numeric_level,
     get_log_function,
+    update_env_file,
 )
 from app.core.config import settings
 
@@ -173,6 +175,57 @@ def storage_setup(ctx: click.Context, **kwargs: str) -> tp.Optional[int]:
     return 0
 
 
+@storage.command('migrate')
+@click.pass_context
+def storage_migrate(ctx: click.Context, **kwargs: str) -> tp.Optional[int]:
+    """
+    Migrate existing storage to the current models and settings.
+    """
+    from app.crud.core import migrate
+
+    log = _get_log_fn()
+    log("Migrating storage system")
+    for name, changes in migrate().items():
+        log(f"Migration '{name}' made {changes} change(s)")
+
+    return 0
+
+
+@storage.command('reconcile')
+@click.pass_context
+def storage_reconcile(
+    ctx: click.Context,
+    **kwargs: str,
+) -> tp.Optional[int]:
+    """
+    Reset the stored counters to the actual counts.
+    """
+    from app.crud.core import reconcile
+
+    log = _get_log_fn()
+    log("Reconciling storage counters")
+    for name, (old, new) in reconcile().items():
+        log(f"Counter '{name}' was {old}, reset to {new}")
+
+    return 0
+
+
+@storage.command('sweep')
+@click.pass_context
+def storage_sweep(ctx: click.Context, **kwargs: str) -> tp.Optional[int]:
+    """
+    Remove expired token entries from storage.
+    """
+    from app.crud.core import sweep
+
+    log = _get_log_fn()
+    log("Sweeping expired tokens")
+    for name, count in sweep().items():
+        log(f"Removed {count} expired '{name}' entries")
+
+    return 0
+
+
 @retry(
     stop=stop_after_attempt(MAX_TRIES),
     wait=wait_fixed(WAIT_SECONDS),
@@ -207,6 +260,159 @@ def storage_check(ctx: click.Context, **kwargs: str) -> tp.Optional[int]:
     return 0 if result else 1
 
 
+# - Security commands
+
+@main.group(invoke_without_command=True)
+@click.pass_context
+def security(ctx: click.Context, **kwargs: str) -> tp.Optional[int]:
+    """
+    Security related CLI tools.
+    """
+    if ctx.invoked_subcommand is None:
+        click.echo(ctx.get_help())
+
+    return 0
+
+
+def _tune_hash_cost(
+    make_context: tp.Callable[[int], tp.Any],
+    costs: tp.Iterable[int],
+    target_ms: float,
+    samples: int,
+    log_fn: tp.Callable,
+) -> int:
+    """Finds the highest cost which hashes within the target time."""
+    from app.core.security import time_password_hash
+
+    best: tp.Optional[int] = None
+    for cost in costs:
+        elapsed = time_password_hash(make_context(cost), samples=samples)
+        log_fn(f"Cost {cost}: {elapsed:.1f}ms", depth=1)
+        if elapsed > target_ms:
+            if best is None:
+                best = cost
+                log_fn(
+                    f"Minimum cost exceeds target, using: {cost}",
+                    level=logging.WARN,
+                    depth=1,
+                )
+            break
+        best = cost
+    return best  # type: ignore
+
+
+@security.command('tune-hash')
+@click.option(
+    '--target-ms',
+    type=click.INT,
+    default=None,
+    help="Target time (in milliseconds) to hash a single password.",
+)
+@click.option(
+    '--scheme',
+    'schemes',
+    multiple=True,
+    type=click.Choice(['argon2', 'bcrypt'], case_sensitive=False),
+    help="Hashing scheme(s) to tune, in order of preference.",
+)
+@click.option(
+    '--samples',
+    type=click.INT,
+    default=3,
+    help="Number of hashes to time for each cost tried.",
+)
+@click.option(
+    '--env-file',
+    type=click.Path(dir_okay=False),
+    default='.env',
+    help="Settings file to write the chosen settings to.",
+)
+@click.option(
+    '--write/--no-write',
+    default=False,
+    help="Whether or not to write the chosen settings to the env file.",
+)
+@click.pass_context
+def security_tune_hash(
+    ctx: click.Context,
+    target_ms: tp.Optional[int],
+    schemes: tp.Tuple[str, ...],
+    samples: int,
+    env_file: str,
+    write: bool,
+    **kwargs: str,
+) -> tp.Optional[int]:
+    """
+    Benchmark password hashing costs for this machine.
+    """
+    from passlib.hash import argon2
+
+    from app.core.security import build_pwd_context
+
+    log = _get_log_fn()
+    target = target_ms or settings.PASSWORD_HASH_TARGET_MS
+
+    log(f"Tuning password hashing ({target}ms target)")
+    ctx.obj['log_level'] += 1
+
+    tuned: tp.List[str] = []
+    chosen: tp.Dict[str, str] = {}
+    for scheme in ([x.lower() for x in schemes] or ['argon2', 'bcrypt']):
+        if scheme == 'argon2':
+            if not argon2.has_backend():
+                log(
+                    "No argon2 backend installed, skipping",
+                    level=logging.WARN,
+                )
+                continue
+            log("Benchmarking argon2 (time cost)")
+            cost = _tune_hash_cost(
+                lambda x: build_pwd_context(['argon2'], argon2_time_cost=x),
+                range(1, 11),
+                target,
+                samples,
+                log,
+            )
+            chosen['PASSWORD_ARGON2_TIME_COST'] = str(cost)
+            chosen['PASSWORD_ARGON2_MEMORY_COST'] = str(
+                settings.PASSWORD_ARGON2_MEMORY_COST
+            )
+            chosen['PASSWORD_ARGON2_PARALLELISM'] = str(
+                settings.PASSWORD_ARGON2_PARALLELISM
+            )
+        else:
+            log("Benchmarking bcrypt (rounds)")
+            cost = _tune_hash_cost(
+                lambda x: build_pwd_context(['bcrypt'], bcrypt_rounds=x),
+                range(10, 21),
+                target,
+                samples,
+                log,
+            )
+            chosen['PASSWORD_BCRYPT_ROUNDS'] = str(cost)
+        tuned.append(scheme)
+
+    ctx.obj['log_level'] -= 1
+    if not tuned:
+        log("No password hashing schemes available", level=logging.ERROR)
+        return 1
+
+    # - Keep existing schemes (after the tuned ones) to verify old hashes
+    all_schemes = tuned + [
+        x for x in settings.PASSWORD_HASH_SCHEMES if x not in tuned
+    ]
+    chosen['PASSWORD_HASH_SCHEMES'] = f"'{json.dumps(all_schemes)}'"
+
+    log("Chosen settings")
+    for k, v in chosen.items():
+        log(f"{k}={v}", depth=1)
+
+    if write:
+        update_env_file(env_file, chosen)
+        log(f"Settings written to: {env_file}")
+    return 0
+
+
 # Entry-point
 if __name__ == "__main__":
     main(obj={})
@@ -4,6 +4,7 @@ Utilities for the CLI tools.
 """
 from collections import defaultdict
 import logging
+import os
 import traceback
 import typing as tp
 
@@ -120,3 +121,34 @@ def get_log_function(
         return
 
     return _log_fn
+
+
+def update_env_file(path: str, values: tp.Dict[str, str]) -> None:
+    """Sets the given `values` in the (dotenv-style) settings file.
+
+    Existing entries for any of the given keys are replaced in-place,
+    any new keys are appended to the end of the file (which is created
+    if it doesn't already exist).
+
+    Parameters
+    ----------
+    path : str
+        The path to the settings file to update.
+    values : Dict[str, str]
+        The setting names and (already-formatted) values to write.
+
+    """
+    lines: tp.List[str] = []
+    if os.path.exists(path):
+        with open(path, 'r') as fin:
+            lines = fin.read().splitlines()
+
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split('=', 1)[0].strip()
+        if '=' in line and key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{k}={v}" for k, v in remaining.items())
+
+    with open(path, 'w') as fout:
+        fout.write('\n'.join(lines) + '\n')
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide caches for the application.
+"""
+import typing as tp
+from uuid import UUID
+
+from app.core import metrics
+from app.core.config import settings
+from app.utils.cacheutils import (
+    SizedLRUCache,
+    TTLCache,
+)
+
+CachedResponse = tp.Tuple[bytes, tp.Dict[str, str]]
+
+
+principal_cache: TTLCache[UUID, tp.Any] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+"""TTLCache: Verified (detached) user objects, keyed by user ID."""
+
+auth_epoch_cache: TTLCache[UUID, int] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_EPOCH_CACHE_TTL,
+)
+"""TTLCache: Current authorization epochs, keyed by user ID."""
+
+response_cache: SizedLRUCache[tp.Tuple, CachedResponse] = SizedLRUCache(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    sizeof=lambda x: len(x[0]) + sum(len(k) + len(v) for k, v in x[1].items()),
+)
+"""SizedLRUCache: Encoded (JSON) response bodies and headers, keyed by
+route, request and the versions of the content's collections.
+"""
+
+metrics.register('principal_cache', principal_cache.stats)
+metrics.register('auth_epoch_cache', auth_epoch_cache.stats)
+metrics.register('response_cache', response_cache.stats)
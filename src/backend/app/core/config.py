@@ -37,6 +37,7 @@ class Settings(BaseSettings):
     SERVER_HOST: str
     SERVER_PORT: int = 3000
     SERVER_PROTOCOL: str = "http"
+    STREAM_BATCH_SIZE: int = 500
 
     # - CRUD storage
     CRUD_DRIVER: str = "sqlalchemy"
@@ -47,11 +48,42 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: tp.List[AnyHttpUrl] = []
 
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    REFRESH_TOKEN_SWEEP_SECONDS: int = 60 * 60
+    ACCESS_TOKEN_CLAIMS: bool = False
+    REVOKED_TOKEN_FILTER_CAPACITY: int = 100000
+    REVOKED_TOKEN_FILTER_ERROR_RATE: float = 0.001
+    REVOKED_TOKEN_SYNC_SECONDS: int = 10
+    REVOKED_TOKEN_SWEEP_SECONDS: int = 60 * 60
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_BULK_WORKERS: tp.Optional[int] = None
+    PASSWORD_HASH_SCHEMES: tp.List[str] = ["bcrypt"]
+    PASSWORD_HASH_TARGET_MS: int = 250
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 2
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 2
+
+    AUTH_CONCURRENCY_LIMIT: int = 2
+    AUTH_QUEUE_SIZE: int = 16
+    AUTH_QUEUE_TIMEOUT: float = 5.0
+    AUTH_RETRY_AFTER: int = 5
+
+    # - Caching
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: int = 30
+    AUTH_EPOCH_CACHE_TTL: int = 5
+    ROLE_CACHE_ENABLED: bool = True
+    ROLE_MASK_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
     # - Users
     USERS_OPEN_REGISTRATION: bool = False
+    USERS_BULK_MAX: int = 10000
 
     FIRST_ADMIN_USER: EmailStr
     FIRST_ADMIN_PASSWORD: str
@@ -65,6 +97,26 @@ class Settings(BaseSettings):
     DB_HOST: tp.Optional[str] = None
     DB_PORT: tp.Optional[int] = None
     DB_CONNECT_EXTRA: tp.Dict[str, tp.Any] = {}
+    DB_CHECKOUT_HEADER: bool = False
+    DB_UUID_STORAGE: str = 'char'
+    UID_GENERATOR: str = 'uuid4'
+
+    DB_SQLITE_JOURNAL_MODE: tp.Optional[str] = 'wal'
+    DB_SQLITE_SYNCHRONOUS: tp.Optional[str] = 'normal'
+    DB_SQLITE_CACHE_SIZE: tp.Optional[int] = -16000
+    DB_SQLITE_MMAP_SIZE: tp.Optional[int] = 128 * 1024 * 1024
+    DB_SQLITE_BUSY_TIMEOUT: tp.Optional[int] = 5000
+    DB_SQLITE_WRITE_LOCK: bool = True
+
+    DB_POOL_CLASS: tp.Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_LIVENESS_SECONDS: tp.Optional[float] = None
+    DB_POOL_SLOW_CHECKOUT_MS: tp.Optional[float] = 100.0
+    DB_POOL_LOG_SECONDS: tp.Optional[float] = None
 
     # - Emails
     EMAILS_ENABLED: bool = False
@@ -99,6 +151,39 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    @validator("PASSWORD_HASH_EXECUTOR")
+    @classmethod
+    def check_password_hash_executor(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("thread", "process"):
+            raise ValueError(f"Invalid password hash executor: {v}")
+        return v
+
+    @validator("DB_UUID_STORAGE")
+    @classmethod
+    def check_uuid_storage(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("binary", "char"):
+            raise ValueError(f"Invalid UUID storage format: {v}")
+        return v
+
+    @validator("UID_GENERATOR")
+    @classmethod
+    def check_uid_generator(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("uuid4", "uuid7"):
+            raise ValueError(f"Invalid UID generator: {v}")
+        return v
+
+    @validator("DB_SQLITE_JOURNAL_MODE", "DB_SQLITE_SYNCHRONOUS")
+    @classmethod
+    def check_sqlite_pragma(cls, v: tp.Optional[str]) -> tp.Optional[str]:
+        if v is not None:
+            v = v.strip().lower()
+            if not v.isalpha():
+                raise ValueError(f"Invalid SQLite pragma value: {v}")
+        return v
+
     @validator("EMAILS_ENABLED", pre=True)
     @classmethod
     def get_emails_enabled(cls, v: bool, values: tp.Dict[str, tp.Any]) -> bool:
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide runtime metrics for the application.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import typing as tp
+
+
+MetricsSource = tp.Callable[[], tp.Dict[str, tp.Any]]
+
+_sources: tp.Dict[str, MetricsSource] = {}
+
+_request_counts: ContextVar[tp.Optional[tp.Dict[str, int]]] = ContextVar(
+    'request_counts',
+    default=None,
+)
+
+
+def register(name: str, source: MetricsSource) -> None:
+    """Registers a source of metrics to report.
+
+    Parameters
+    ----------
+    name : str
+        The name to report the source's metrics under.
+    source : Callable[[], Dict[str, Any]]
+        The function to call to get the source's current metrics.
+
+    """
+    _sources[name] = source
+
+
+def collect() -> tp.Dict[str, tp.Dict[str, tp.Any]]:
+    """Gets the current metrics from all registered sources.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        The current metrics for each registered source, by name.
+
+    """
+    return {k: v() for k, v in _sources.items()}
+
+
+@contextmanager
+def track_request() -> tp.Iterator[tp.Dict[str, int]]:
+    """Tracks the per-request counts (see :func:`incr`) in this context.
+
+    Yields
+    ------
+    Dict[str, int]
+        The counts made (so far) for the current request, by name.
+
+    """
+    counts: tp.Dict[str, int] = {}
+    token = _request_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _request_counts.reset(token)
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Increments a per-request count, if a request is being tracked.
+
+    Parameters
+    ----------
+    name : str
+        The name of the count to increment.
+    amount : int, optional
+        The amount to increment the count by (default is ``1``).
+
+    """
+    counts = _request_counts.get()
+    if counts is not None:
+        counts[name] = counts.get(name, 0) + amount
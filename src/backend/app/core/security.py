@@ -2,11 +2,21 @@
 """
 Security functionality for the API.
 """
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from datetime import (
     datetime,
     timedelta,
 )
+import os
+import threading
+import time
 import typing as tp
+from uuid import uuid4
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -15,13 +25,107 @@ from app.core.config import settings
 
 
 ALGORITHM = "HS256"
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+def build_pwd_context(
+    schemes: tp.Optional[tp.List[str]] = None,
+    *,
+    bcrypt_rounds: tp.Optional[int] = None,
+    argon2_time_cost: tp.Optional[int] = None,
+    argon2_memory_cost: tp.Optional[int] = None,
+    argon2_parallelism: tp.Optional[int] = None,
+) -> CryptContext:
+    """Builds the password hashing context to use.
+
+    The first of the `schemes` is used for new hashes, any others are
+    only used to verify (and flag for re-hashing) existing hashes.  The
+    cost parameters are pinned (as both the minimum and maximum) so that
+    hashes made with any other cost are also flagged for re-hashing.
+
+    Parameters
+    ----------
+    schemes : List[str], optional
+        The hashing schemes to support (default is the
+        ``PASSWORD_HASH_SCHEMES`` setting).
+    bcrypt_rounds : int, optional
+        The (log2) number of bcrypt rounds to use (default is the
+        ``PASSWORD_BCRYPT_ROUNDS`` setting).
+    argon2_time_cost : int, optional
+        The number of argon2 iterations to use (default is the
+        ``PASSWORD_ARGON2_TIME_COST`` setting).
+    argon2_memory_cost : int, optional
+        The argon2 memory cost to use, in KiB (default is the
+        ``PASSWORD_ARGON2_MEMORY_COST`` setting).
+    argon2_parallelism : int, optional
+        The argon2 parallelism to use (default is the
+        ``PASSWORD_ARGON2_PARALLELISM`` setting).
+
+    Returns
+    -------
+    CryptContext
+        The configured password hashing context.
+
+    """
+    if bcrypt_rounds is None:
+        bcrypt_rounds = settings.PASSWORD_BCRYPT_ROUNDS
+    if argon2_time_cost is None:
+        argon2_time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    return CryptContext(
+        schemes=schemes or settings.PASSWORD_HASH_SCHEMES,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=(
+            argon2_memory_cost or settings.PASSWORD_ARGON2_MEMORY_COST
+        ),
+        argon2__parallelism=(
+            argon2_parallelism or settings.PASSWORD_ARGON2_PARALLELISM
+        ),
+    )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def time_password_hash(context: CryptContext, samples: int = 3) -> float:
+    """Times hashing a password with the given `context`.
+
+    Parameters
+    ----------
+    context : CryptContext
+        The password hashing context to time.
+    samples : int, optional
+        The number of hashes to time (default is ``3``).
+
+    Returns
+    -------
+    float
+        The median time (in milliseconds) taken to hash a password.
+
+    """
+    timings = []
+    for _ in range(max(samples, 1)):
+        start = time.perf_counter()
+        context.hash("correct horse battery staple")
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+pwd_context = build_pwd_context()
+
+_hash_executor: tp.Optional[Executor] = None
+_hash_executor_lock = threading.Lock()
+_bulk_hash_executor: tp.Optional[Executor] = None
 
 
 def create_access_token(
     subject: tp.Any,
     expires_delta: tp.Optional[timedelta] = None,
+    claims: tp.Optional[tp.Dict[str, tp.Any]] = None,
 ) -> str:
     """Creates a new access token to use."""
     if expires_delta:
@@ -31,23 +135,221 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
         )
     data = {
+        **(claims or {}),
         "exp": expire,
-        "sub": str(subject)
+        "sub": str(subject),
+        "jti": uuid4().hex,
+        "typ": ACCESS_TOKEN_TYPE,
+    }
+    encoded = jwt.encode(data, settings.SECRET_KEY, algorithm=ALGORITHM)
+    return encoded
+
+
+def create_refresh_token(
+    subject: tp.Any,
+    jti: str,
+    family: str,
+    expires: datetime,
+) -> str:
+    """Creates a new (signed) refresh token for a stored refresh token.
+    """
+    data = {
+        "exp": expires,
+        "sub": str(subject),
+        "jti": jti,
+        "fam": family,
+        "typ": REFRESH_TOKEN_TYPE,
     }
     encoded = jwt.encode(data, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded
 
 
+def get_access_token_claims(user: tp.Any) -> tp.Dict[str, tp.Any]:
+    """Gets the authorization claims to embed in a user's access token.
+
+    Parameters
+    ----------
+    user : User
+        The user to get the authorization claims for.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The user's active/super-user/admin flags, role names (and
+        mask) and current authorization epoch (or an empty ``dict`` if
+        claims are disabled via the ``ACCESS_TOKEN_CLAIMS`` setting).
+
+    """
+    if not settings.ACCESS_TOKEN_CLAIMS:
+        return {}
+    return {
+        "act": user.is_active,
+        "sup": user.is_superuser,
+        "adm": user.is_admin,
+        "rls": sorted(x.name for x in user.roles),
+        "rmk": user.role_mask,
+        "epc": user.auth_epoch or 0,
+    }
+
+
 def verify_password(password: str, hashed: str) -> bool:
     """Verifies the given password matches the hashed version."""
     return pwd_context.verify(password, hashed)
 
 
+def verify_and_update_password(
+    password: str,
+    hashed: str,
+) -> tp.Tuple[bool, tp.Optional[str]]:
+    """Verifies the given password, re-hashing it if its hash is stale.
+
+    Returns
+    -------
+    Tuple[bool, Optional[str]]
+        Whether or not the `password` matches the `hashed` version and,
+        if it matches but was hashed with outdated settings, the new
+        hash to store (otherwise ``None``).
+
+    """
+    return pwd_context.verify_and_update(password, hashed)
+
+
 def get_password_hash(password: str) -> str:
     """Gets the hash for the given plaintext password."""
     return pwd_context.hash(password)
 
 
+def get_hash_executor() -> Executor:
+    """Gets the (bounded) executor used for password hashing.
+
+    The executor is created on first use, as either a thread or process
+    pool (per the ``PASSWORD_HASH_EXECUTOR`` setting) with
+    ``PASSWORD_HASH_WORKERS`` workers.
+
+    Returns
+    -------
+    Executor
+        The shared password-hashing executor for this process.
+
+    """
+    global _hash_executor
+
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                workers = max(settings.PASSWORD_HASH_WORKERS, 1)
+                if settings.PASSWORD_HASH_EXECUTOR == "process":
+                    _hash_executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    _hash_executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="password-hash",
+                    )
+    return _hash_executor
+
+
+def get_bulk_hash_executor() -> Executor:
+    """Gets the process pool used for hashing passwords in bulk.
+
+    The pool is created on first use with ``PASSWORD_HASH_BULK_WORKERS``
+    workers (default is one per CPU), separate from the (bounded)
+    :obj:`get_hash_executor` pool used by individual requests.
+
+    Returns
+    -------
+    Executor
+        The shared bulk password-hashing executor for this process.
+
+    """
+    global _bulk_hash_executor
+
+    if _bulk_hash_executor is None:
+        with _hash_executor_lock:
+            if _bulk_hash_executor is None:
+                workers = settings.PASSWORD_HASH_BULK_WORKERS \
+                    or os.cpu_count() or 1
+                _bulk_hash_executor = ProcessPoolExecutor(
+                    max_workers=max(workers, 1),
+                )
+    return _bulk_hash_executor
+
+
+def get_password_hashes(passwords: tp.Sequence[str]) -> tp.List[str]:
+    """Gets the hashes for the given plaintext passwords (in order)."""
+    return [pwd_context.hash(x) for x in passwords]
+
+
+async def get_password_hashes_async(
+    passwords: tp.Sequence[str],
+) -> tp.List[str]:
+    """Gets the hashes for the given passwords, in parallel across the
+    bulk hashing process pool.
+
+    Parameters
+    ----------
+    passwords : Sequence[str]
+        The plaintext passwords to hash.
+
+    Returns
+    -------
+    List[str]
+        The hashes of the `passwords` (in the same order).
+
+    """
+    if not passwords:
+        return []
+    executor = get_bulk_hash_executor()
+    workers = getattr(executor, '_max_workers', 1)
+    size = max(-(-len(passwords) // (workers * 4)), 1)
+
+    loop = asyncio.get_event_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(
+            executor,
+            get_password_hashes,
+            passwords[i:i + size],
+        )
+        for i in range(0, len(passwords), size)
+    ))
+    return [x for chunk in chunks for x in chunk]
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verifies the given password (off the event loop)."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(),
+        verify_password,
+        password,
+        hashed,
+    )
+
+
+async def verify_and_update_password_async(
+    password: str,
+    hashed: str,
+) -> tp.Tuple[bool, tp.Optional[str]]:
+    """Verifies (and possibly re-hashes) a password off the event loop.
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(),
+        verify_and_update_password,
+        password,
+        hashed,
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Gets the hash for the given password (off the event loop)."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(),
+        get_password_hash,
+        password,
+    )
+
+
 def generate_password_reset_token(email: str) -> str:
     """Generates a password reset token."""
     delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
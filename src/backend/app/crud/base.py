@@ -16,6 +16,7 @@ from app.crud.models.base import ModelType
 from app.crud.repos.base import RepositoryType
 from app.utils.strutils import camel_to_snake
 
+T = tp.TypeVar("T")
 UnitOfWorkType = tp.TypeVar("UnitOfWorkType", bound="UnitOfWorkBase")
 
 
@@ -24,7 +25,11 @@ class IModels(tp.Protocol):
     Interface for the dynamically-loaded ``models`` module.
     """
     __all__: tp.List[str]
+    CollectionVersion: tp.Type[models.CollectionVersionBase]
+    Counter: tp.Type[models.CounterBase]
     Name: tp.Type[models.NameBase]
+    RefreshToken: tp.Type[models.RefreshTokenBase]
+    RevokedToken: tp.Type[models.RevokedTokenBase]
     Role: tp.Type[models.RoleBase]
     User: tp.Type[models.UserBase]
 
@@ -35,22 +40,56 @@ class IRepos(tp.Protocol):
     """
     __all__: tp.List[str]
     Repository: tp.Type[repos.RepositoryBase]
+    CollectionVersionRepository: tp.Type[
+        repos.CollectionVersionRepositoryBase
+    ]
+    CounterRepository: tp.Type[repos.CounterRepositoryBase]
     NameRepository: tp.Type[repos.NameRepositoryBase]
+    RefreshTokenRepository: tp.Type[repos.RefreshTokenRepositoryBase]
+    RevokedTokenRepository: tp.Type[repos.RevokedTokenRepositoryBase]
     RoleRepository: tp.Type[repos.RoleRepositoryBase]
     UserRepository: tp.Type[repos.UserRepositoryBase]
 
 
-class IUnitOfWork(tp.ContextManager, tp.Protocol):
+class IUnitOfWork(tp.ContextManager, tp.AsyncContextManager, tp.Protocol):
     """
     Interface for the dynamically-loaded UnitOfWork object.
     """
-    name: repos.NameRepository
-    role: repos.RoleRepository
-    user: repos.UserRepository
+    # - The driver's model classes are only known at runtime
+    collection_version: repos.CollectionVersionRepository[tp.Any]
+    counter: repos.CounterRepository[tp.Any]
+    name: repos.NameRepository[tp.Any]
+    refresh_token: repos.RefreshTokenRepository[tp.Any]
+    revoked_token: repos.RevokedTokenRepository[tp.Any]
+    role: repos.RoleRepository[tp.Any]
+    user: repos.UserRepository[tp.Any]
 
     def close(self) -> None:
         ...
 
+    async def aclose(self) -> None:
+        ...
+
+    async def run_sync(
+        self,
+        fn: tp.Callable[..., T],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> T:
+        ...
+
+    def on_commit(self, fn: tp.Callable[[], None]) -> None:
+        ...
+
+    def adjust_counter(self, name: str, delta: int) -> None:
+        ...
+
+    def pending_counter(self, name: str) -> int:
+        ...
+
+    def touch_collection(self, name: str) -> None:
+        ...
+
     def commit(self) -> None:
         ...
 
@@ -66,9 +105,13 @@ class UnitOfWorkBase(
     Unit-of-Work abstract base class.
     """
     if tp.TYPE_CHECKING:
-        name: repos.NameRepository
-        user: repos.UserRepository
-        role: repos.RoleRepository
+        collection_version: repos.CollectionVersionRepository[tp.Any]
+        counter: repos.CounterRepository[tp.Any]
+        name: repos.NameRepository[tp.Any]
+        refresh_token: repos.RefreshTokenRepository[tp.Any]
+        revoked_token: repos.RevokedTokenRepository[tp.Any]
+        user: repos.UserRepository[tp.Any]
+        role: repos.RoleRepository[tp.Any]
 
     __models: tp.Set[tp.Type[ModelType]]
 
@@ -77,11 +120,128 @@ class UnitOfWorkBase(
 
     def __init__(self) -> None:
         self._depth = 0
+        self._commit_callbacks: tp.List[tp.Callable[[], None]] = []
+        self._counter_deltas: tp.Dict[str, int] = {}
+        self._touched: tp.Set[str] = set()
 
     def close(self) -> None:
         """Safely closes this unit of work (if needed)."""
         return
 
+    async def aclose(self) -> None:
+        """Safely closes this unit of work (if needed), asynchronously.
+        """
+        return self.close()
+
+    async def run_sync(
+        self,
+        fn: tp.Callable[..., T],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> T:
+        """Runs the given (synchronous) storage operation(s).
+
+        All repository access from asynchronous code should go through
+        this method: for synchronous drivers it simply calls `fn`, while
+        asynchronous drivers run `fn` such that any storage I/O it does
+        doesn't block the event loop.
+
+        Parameters
+        ----------
+        fn : Callable[..., T]
+            The function to run.
+        args : optional
+            Any arguments to pass to `fn`.
+        kwargs : optional
+            Any keyword-arguments to pass to `fn`.
+
+        Returns
+        -------
+        T
+            The result of calling `fn`.
+
+        """
+        return fn(*args, **kwargs)
+
+    def on_commit(self, fn: tp.Callable[[], None]) -> None:
+        """Registers a callback to run once the current changes commit.
+
+        Parameters
+        ----------
+        fn : Callable[[], None]
+            The function to call after the next successful commit (it's
+            discarded if the changes are rolled back instead).
+
+        """
+        self._commit_callbacks.append(fn)
+
+    def adjust_counter(self, name: str, delta: int) -> None:
+        """Adjusts the given (stored) counter once the changes commit.
+
+        Adjustments are combined in this unit of work and applied just
+        before committing (in the same transaction), so each counter is
+        only written (and locked) once, at the end of the transaction.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter to adjust.
+        delta : int
+            The amount to adjust the counter by.
+
+        """
+        if delta:
+            self._counter_deltas[name] = (
+                self._counter_deltas.get(name, 0) + delta
+            )
+
+    def pending_counter(self, name: str) -> int:
+        """Gets the (not yet applied) adjustments to the given counter.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter to get the pending adjustment for.
+
+        Returns
+        -------
+        int
+            The total adjustment pending for the counter.
+
+        """
+        return self._counter_deltas.get(name, 0)
+
+    def touch_collection(self, name: str) -> None:
+        """Bumps the given collection's version once the changes commit.
+
+        However many times a collection is touched in this unit of work,
+        its version is only bumped (and its row written) once, just
+        before committing (in the same transaction).
+
+        Parameters
+        ----------
+        name : str
+            The name of the (changed) collection.
+
+        """
+        self._touched.add(name)
+
+    def _apply_versions(self) -> None:
+        """Bumps the touched collections' versions (before committing).
+        """
+        touched, self._touched = self._touched, set()
+        # - In a fixed order, so concurrent commits can't deadlock
+        for name in sorted(touched):
+            self.collection_version.bump(name)
+
+    def _apply_counters(self) -> None:
+        """Applies the pending counter adjustments (before committing)."""
+        deltas, self._counter_deltas = self._counter_deltas, {}
+        # - In a fixed order, so concurrent commits can't deadlock
+        for name in sorted(deltas):
+            if deltas[name]:
+                self.counter.add(name, deltas[name])
+
     # Context-management
 
     def __enter__(self) -> IUnitOfWork:
@@ -100,15 +260,40 @@ class UnitOfWorkBase(
             self.commit()
         self._depth -= 1
 
+    async def __aenter__(self) -> IUnitOfWork:
+        self._depth += 1
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: tp.Optional[tp.Type[BaseException]],
+        exc_val: tp.Optional[BaseException],
+        exc_tb: tp.Optional[TracebackType],
+    ) -> None:
+        if exc_type is not None:
+            await self.run_sync(self.rollback)
+        else:
+            await self.run_sync(self.commit)
+        self._depth -= 1
+
     @abstractmethod
     def commit(self) -> None:
-        """Commits any changes made."""
-        pass
+        """Commits any changes made.
+
+        Drivers should apply any pending collection version bumps and
+        counter adjustments (see :meth:`_apply_versions` and
+        :meth:`_apply_counters`) in the transaction before committing it.
+        """
+        callbacks, self._commit_callbacks = self._commit_callbacks, []
+        for fn in callbacks:
+            fn()
 
     @abstractmethod
     def rollback(self) -> None:
         """Rolls backs the changes made."""
-        pass
+        self._commit_callbacks.clear()
+        self._counter_deltas.clear()
+        self._touched.clear()
 
     @classmethod
     def _repo_getter(
@@ -2,10 +2,15 @@
 """
 Core components for the CRUD subpackage.
 """
+import asyncio
+from datetime import datetime
+import typing as tp
+
 from app.core.config import (
     REQUIRED_ROLES,
     settings,
 )
+from app.crud.base import IUnitOfWork
 from app.drivers.utils import (
     load_driver_function,
     load_repositories_module,
@@ -16,6 +21,7 @@ from app.schema import (
     RoleCreate,
     UserCreate,
 )
+from app.utils.strutils import camel_to_snake
 
 
 # Load essential driver components
@@ -27,7 +33,11 @@ UnitOfWork = load_uow_class()
 
 # - Register models with UnitOfWork class
 MODEL_MAP = {
+    models.CollectionVersion: repos.CollectionVersionRepository,
+    models.Counter: repos.CounterRepository,
     models.Name: repos.NameRepository,
+    models.RefreshToken: repos.RefreshTokenRepository,
+    models.RevokedToken: repos.RevokedTokenRepository,
     models.Role: repos.RoleRepository,
     models.User: repos.UserRepository,
 }
@@ -39,7 +49,9 @@ for m in models.__all__:
 
 # Load required driver functions
 create_uow = load_driver_function('create_uow')
+dispose_storage = load_driver_function('dispose_storage')
 init_storage = load_driver_function('init_storage')
+migrate_storage = load_driver_function('migrate_storage')
 setup_storage = load_driver_function('setup_storage')
 storage_ready = load_driver_function('storage_ready')
 
@@ -47,29 +59,124 @@ storage_ready = load_driver_function('storage_ready')
 def setup():
     """Sets up the storage system for initial use."""
     setup_storage()
+    asyncio.run(_setup_data())
 
-    uow = create_uow()
 
-    # - Make necessary roles
-    for name, desc in REQUIRED_ROLES.items():
-        role = uow.role.get_by_name(name)
-        if not role:
-            new_role = RoleCreate(name=name, description=desc)
-            with uow:
-                role = uow.role.create(obj_in=new_role)
-
-    # - Make first admin
-    user = uow.user.get_by_email(settings.FIRST_ADMIN_USER)
-    if not user:
-        new_user = UserCreate(
-            email=settings.FIRST_ADMIN_USER,
-            password=settings.FIRST_ADMIN_PASSWORD,
-            is_superuser=True,
-            is_admin=True,
-            roles=[x for x in REQUIRED_ROLES],
+async def _setup_data() -> None:
+    """Creates the required roles and first admin user (if needed)."""
+    uow = create_uow()
+    try:
+        # - Make necessary roles
+        for name, desc in REQUIRED_ROLES.items():
+            role = await uow.run_sync(uow.role.get_by_name, name)
+            if not role:
+                new_role = RoleCreate(name=name, description=desc)
+                async with uow:
+                    role = await uow.run_sync(
+                        uow.role.create,
+                        obj_in=new_role,
+                    )
+
+        # - Make first admin
+        user = await uow.run_sync(
+            uow.user.get_by_email,
+            settings.FIRST_ADMIN_USER,
         )
-        with uow:
-            user = uow.user.create(obj_in=new_user)
+        if not user:
+            new_user = UserCreate(
+                email=settings.FIRST_ADMIN_USER,
+                password=settings.FIRST_ADMIN_PASSWORD,
+                is_superuser=True,
+                is_admin=True,
+                roles=[x for x in REQUIRED_ROLES],
+            )
+            async with uow:
+                user = await uow.run_sync(uow.user.create, obj_in=new_user)
+
+        # - Set up (or fix) the stored counters
+        async with uow:
+            await _reconcile_counters(uow)
+    finally:
+        await uow.aclose()
+        await dispose_storage()
+
+
+async def _reconcile_counters(
+    uow: IUnitOfWork,
+) -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+    """Resets the counters of all the (counted) repositories."""
+    ret = {}
+    for model, repo in MODEL_MAP.items():
+        if repo.__counted__ is not None:
+            ret.update(await uow.run_sync(
+                getattr(uow, camel_to_snake(model.__name__)).reconcile
+            ))
+    return ret
+
+
+def migrate() -> tp.Dict[str, int]:
+    """Migrates existing storage to the current models and settings.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of changes made by each migration, by name.
+
+    """
+    return migrate_storage()
+
+
+def reconcile() -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+    """Resets the stored counters to the actual counts (fixing drift).
+
+    Returns
+    -------
+    Dict[str, Tuple[Optional[int], int]]
+        The previous (``None`` if it didn't exist) and actual values of
+        each counter which was off, by name.
+
+    """
+    async def _reconcile() -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+        uow = create_uow()
+        try:
+            async with uow:
+                return await _reconcile_counters(uow)
+        finally:
+            await uow.aclose()
+            await dispose_storage()
+
+    return asyncio.run(_reconcile())
+
+
+def sweep() -> tp.Dict[str, int]:
+    """Removes the expired (refresh and revoked) token entries.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of entries removed, by repository name.
+
+    """
+    async def _sweep() -> tp.Dict[str, int]:
+        uow = create_uow()
+        before = datetime.utcnow()
+        try:
+            async with uow:
+                return {
+                    'refresh_token': await uow.run_sync(
+                        uow.refresh_token.remove_expired,
+                        before,
+                    ),
+                    'revoked_token': await uow.run_sync(
+                        uow.revoked_token.remove_expired,
+                        before,
+                    ),
+                }
+        finally:
+            await uow.aclose()
+            await dispose_storage()
+
+    return asyncio.run(_sweep())
 
 
 def init():
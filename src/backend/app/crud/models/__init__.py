@@ -3,6 +3,10 @@
 """
 Models for CRUD-based storage system.
 """
+from app.crud.models.counter import (
+    Counter,
+    CounterBase,
+)
 from app.crud.models.name import (
     Name,
     NameBase,
@@ -11,7 +15,17 @@ from app.crud.models.role import (
     Role,
     RoleBase,
 )
+from app.crud.models.token import (
+    RefreshToken,
+    RefreshTokenBase,
+    RevokedToken,
+    RevokedTokenBase,
+)
 from app.crud.models.user import (
     User,
     UserBase,
 )
+from app.crud.models.version import (
+    CollectionVersion,
+    CollectionVersionBase,
+)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Interface for Counter storage models.
+"""
+import typing as tp
+
+from app.crud.models.base import Model, ModelBase
+
+CounterType = tp.TypeVar('CounterType', bound='CounterBase')
+
+
+class Counter(Model, tp.Protocol):
+    """
+    Interface for Counter objects.
+    """
+    name: str
+    value: int
+
+
+class CounterBase(ModelBase):
+    """
+    Base class for counter objects.
+    """
+    name: str
+    value: int
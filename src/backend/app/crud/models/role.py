@@ -15,6 +15,8 @@ class Role(Model, tp.Protocol):
     """
     name: str
     description: tp.Optional[str]
+    bit: tp.Optional[int]
+    version: int
 
 
 class RoleBase(ModelBase):
@@ -23,6 +25,8 @@ class RoleBase(ModelBase):
     """
     name: str
     description: tp.Optional[str]
+    bit: tp.Optional[int]
+    version: int
 
     def __repr__(self) -> str:
         return super().__repr__()[:-1] + f", name={self.name!r})"
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Interface for Token storage models.
+"""
+from datetime import datetime
+import typing as tp
+
+from app.crud.models.base import Model, ModelBase
+from app.crud.models.user import User, UserBase
+
+RefreshTokenType = tp.TypeVar('RefreshTokenType', bound='RefreshTokenBase')
+RevokedTokenType = tp.TypeVar('RevokedTokenType', bound='RevokedTokenBase')
+
+
+class RefreshToken(Model, tp.Protocol):
+    """
+    Interface for RefreshToken objects.
+    """
+    jti: str
+    family: str
+    user: User
+    expires: datetime
+    created: datetime
+    used: bool
+    revoked: bool
+
+
+class RefreshTokenBase(ModelBase):
+    """
+    Base class for refresh token objects.
+    """
+    jti: str
+    family: str
+    user: UserBase
+    expires: datetime
+    created: datetime
+    used: bool
+    revoked: bool
+
+
+class RevokedToken(Model, tp.Protocol):
+    """
+    Interface for RevokedToken objects.
+    """
+    jti: str
+    expires: datetime
+    created: datetime
+
+
+class RevokedTokenBase(ModelBase):
+    """
+    Base class for revoked token objects.
+    """
+    jti: str
+    expires: datetime
+    created: datetime
@@ -24,6 +24,9 @@ class User(Model, tp.Protocol):
     is_admin: bool
     roles: tp.List[Role]
     hashed_password: str
+    auth_epoch: int
+    role_mask: int
+    version: int
 
 
 class UserBase(ModelBase):
@@ -37,3 +40,6 @@ class UserBase(ModelBase):
     is_admin: bool
     roles: tp.List[RoleBase]
     hashed_password: str
+    auth_epoch: int
+    role_mask: int
+    version: int
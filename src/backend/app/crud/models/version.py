@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Interface for CollectionVersion storage models.
+"""
+import typing as tp
+
+from app.crud.models.base import Model, ModelBase
+
+CollectionVersionType = tp.TypeVar(
+    'CollectionVersionType',
+    bound='CollectionVersionBase',
+)
+
+
+class CollectionVersion(Model, tp.Protocol):
+    """
+    Interface for CollectionVersion objects.
+    """
+    name: str
+    version: int
+
+
+class CollectionVersionBase(ModelBase):
+    """
+    Base class for collection version objects.
+    """
+    name: str
+    version: int
@@ -7,6 +7,10 @@ from app.crud.repos.base import (
     Repository,
     RepositoryBase,
 )
+from app.crud.repos.counter import (
+    CounterRepository,
+    CounterRepositoryBase,
+)
 from app.crud.repos.name import (
     NameRepository,
     NameRepositoryBase,
@@ -15,7 +19,17 @@ from app.crud.repos.role import (
     RoleRepository,
     RoleRepositoryBase,
 )
+from app.crud.repos.token import (
+    RefreshTokenRepository,
+    RefreshTokenRepositoryBase,
+    RevokedTokenRepository,
+    RevokedTokenRepositoryBase,
+)
 from app.crud.repos.user import (
     UserRepository,
     UserRepositoryBase,
 )
+from app.crud.repos.version import (
+    CollectionVersionRepository,
+    CollectionVersionRepositoryBase,
+)
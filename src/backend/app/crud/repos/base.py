@@ -16,22 +16,27 @@ from app.schema.base import (
     CreateSchemaType,
     UpdateSchemaType,
 )
+from app.utils.cursorutils import (
+    decode_cursor,
+    encode_cursor,
+)
 
 RepositoryType = tp.TypeVar("RepositoryType", bound='RepositoryBase')
 
 if tp.TYPE_CHECKING:
-    from app.crud.base import UnitOfWorkType
+    from app.crud.base import UnitOfWorkBase
 
 
 class Repository(tp.Protocol[ModelType]):
     """
     Interface for base repository classes.
     """
+    model: tp.Type[ModelType]
 
     def __init__(
         self,
         model: tp.Type[ModelType],
-        uow: 'UnitOfWorkType',
+        uow: 'UnitOfWorkBase',
         *args: tp.Any,
         **kwargs: tp.Any,
     ) -> None:
@@ -41,6 +46,15 @@ class Repository(tp.Protocol[ModelType]):
     def count(self) -> int:
         ...
 
+    def reconcile(self) -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+        ...
+
+    def get_collection_version(self) -> tp.Optional[int]:
+        ...
+
+    def get_object_version(self, uid: UUID) -> tp.Optional[int]:
+        ...
+
     def get(self, uid: UUID) -> ModelType:
         ...
 
@@ -52,6 +66,14 @@ class Repository(tp.Protocol[ModelType]):
     ) -> tp.List[ModelType]:
         ...
 
+    def get_page(
+        self,
+        *,
+        cursor: tp.Optional[str] = None,
+        limit: tp.Optional[int] = 100,
+    ) -> tp.Tuple[tp.List[ModelType], tp.Optional[str]]:
+        ...
+
     def create(self, obj_in: CreateSchemaType) -> ModelType:
         ...
 
@@ -62,9 +84,19 @@ class Repository(tp.Protocol[ModelType]):
     ) -> ModelType:
         ...
 
+    def update_many(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+    ) -> int:
+        ...
+
     def remove(self, uid: UUID) -> None:
         ...
 
+    def remove_many(self, uids: tp.Iterable[UUID]) -> int:
+        ...
+
 
 class RepositoryBase(
     tp.Generic[ModelType, CreateSchemaType, UpdateSchemaType],
@@ -81,12 +113,28 @@ class RepositoryBase(
         The particular unit-of-work instance to use with this
         repository.
 
+    Repositories with a :obj:`__counted__` counter name keep the count
+    of their objects in that (stored) counter, adjusted as objects are
+    created and removed, which :obj:`count` then reads (if it's been
+    set up, see :meth:`reconcile`) rather than counting the objects.
+
+    Repositories which are :obj:`__versioned__` increment the (stored)
+    ``version`` of each object they update, and those with a
+    :obj:`__collection__` name have that collection version bumped
+    whenever any of their objects are written, so that clients can
+    cheaply check whether an object (or a listing) has changed.
+
     """
+    __bulk_criteria__: tp.Dict[str, tp.Type] = {'uid': UUID}
+    __bulk_fields__: tp.Optional[tp.Set[str]] = None
+    __collection__: tp.Optional[str] = None
+    __counted__: tp.Optional[str] = None
+    __versioned__: bool = False
 
     def __init__(
         self,
         model: tp.Type[ModelType],
-        uow: 'UnitOfWorkType',
+        uow: 'UnitOfWorkBase',
         *args: tp.Any,
         **kwargs: tp.Any,
     ) -> None:
@@ -98,11 +146,103 @@ class RepositoryBase(
         return self.model(*args, **kwargs)
 
     @property
-    @abstractmethod
     def count(self) -> int:
         """Gets the number of items in this repository."""
+        if self.__counted__ is not None:
+            value = self.uow.counter.get_value(self.__counted__)
+            if value is not None:
+                return value + self.uow.pending_counter(self.__counted__)
+        return self._count_all()
+
+    @abstractmethod
+    def _count_all(self) -> int:
+        """Counts all of the items stored in this repository."""
         pass
 
+    def _track(self, obj: ModelType, delta: int) -> None:
+        """Adjusts this repository's counter(s) for the given `obj` being
+        added (``+1``) or removed (``-1``).
+        """
+        if self.__counted__ is not None:
+            self.uow.adjust_counter(self.__counted__, delta)
+
+    def reconcile(self) -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+        """Resets this repository's counter(s) to the actual counts.
+
+        Returns
+        -------
+        Dict[str, Tuple[Optional[int], int]]
+            The previous (``None`` if it didn't exist) and actual values
+            of each counter which was off, by name.
+
+        """
+        if self.__counted__ is None:
+            return {}
+        return self._reconcile_counters({self.__counted__: self._count_all()})
+
+    def get_collection_version(self) -> tp.Optional[int]:
+        """Gets the current version of this repository's collection.
+
+        Returns
+        -------
+        Optional[int]
+            The collection's current version (or ``None`` if this
+            repository doesn't have a :obj:`__collection__`).
+
+        """
+        if self.__collection__ is None:
+            return None
+        return self.uow.collection_version.get_version(self.__collection__)
+
+    def get_object_version(self, uid: UUID) -> tp.Optional[int]:
+        """Gets the current version of the (versioned) object with the
+        given `uid`, without loading the rest of the object.
+
+        Parameters
+        ----------
+        uid : UUID
+            The unique ID of the object to get the version of.
+
+        Returns
+        -------
+        Optional[int]
+            The object's current version (if found, ``None`` otherwise).
+
+        """
+        obj: tp.Any = self.get(uid)
+        return None if obj is None else obj.version
+
+    def _bump_version(self, obj: tp.Any) -> None:
+        """Increments the version of the given `obj` (when it's saved).
+
+        Drivers should increment the stored version itself (e.g. ``SET
+        version = version + 1``), rather than the copy's, so concurrent
+        updates of (possibly stale) copies never share a version.
+        """
+        obj.version = (obj.version or 0) + 1
+
+    def _touch(self) -> None:
+        """Marks this repository's collection as changed (its version is
+        bumped once the changes commit).
+        """
+        if self.__collection__ is not None:
+            self.uow.touch_collection(self.__collection__)
+
+    def _reconcile_counters(
+        self,
+        actual: tp.Dict[str, int],
+    ) -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+        """Helper to reset the counters to the `actual` values given."""
+        stored = self.uow.counter.get_values(actual)
+        ret = {}
+        for name, value in actual.items():
+            # - Any pending adjustments are already in the actual counts
+            value -= self.uow.pending_counter(name)
+            if stored.get(name) != value:
+                self.uow.counter.set_value(name, value)
+                ret[name] = (stored.get(name), value)
+        return ret
+
     @abstractmethod
     def _save(self, obj: ModelType) -> ModelType:
         """Saves the given `obj` to the underlying storage."""
@@ -118,6 +258,18 @@ class RepositoryBase(
         """Deletes the given object from storage."""
         pass
 
+    def _detach(self, obj: ModelType) -> ModelType:
+        """Detaches the given `obj` for use outside this unit of work."""
+        return obj
+
+    def _attach(self, obj: ModelType) -> ModelType:
+        """Gets a copy of the detached `obj` bound to this unit of work."""
+        return obj
+
+    def _snapshot(self, obj: ModelType) -> ModelType:
+        """Gets a detached copy of the `obj` (leaving `obj` unchanged)."""
+        return obj
+
     # CRUD operations
 
     def get(self, uid: UUID) -> tp.Optional[ModelType]:
@@ -173,6 +325,64 @@ class RepositoryBase(
         """
         raise NotImplementedError()
 
+    def get_page(
+        self,
+        *,
+        cursor: tp.Optional[str] = None,
+        limit: tp.Optional[int] = 100,
+    ) -> tp.Tuple[tp.List[ModelType], tp.Optional[str]]:
+        """Gets a page of objects, continuing on from the given `cursor`.
+
+        Pages are fetched by sort key (the repository's sort order, with
+        the object ID as a tie-breaker) rather than by offset, so getting
+        any page costs the same as getting the first.
+
+        Parameters
+        ----------
+        cursor : str, optional
+            The cursor (from the previous page) to continue on from, if
+            not given the first page is returned.
+        limit : int, optional
+            The maximum number of objects to return (default is ``100``),
+            if ``None`` all (remaining) objects are returned.
+
+        Returns
+        -------
+        Tuple[List[ModelType], Optional[str]]
+            The object(s) on the page, and the cursor for the next page
+            (``None`` if this is the last page).
+
+        Raises
+        ------
+        ValueError
+            If the given `cursor` isn't valid.
+
+        """
+        after = decode_cursor(cursor) if cursor else None
+        ret = self._get_page_after(
+            after,
+            limit=None if limit is None else limit + 1,
+        )
+        if limit is None or len(ret) <= limit:
+            return ret, None
+        ret = ret[:limit]
+        return ret, encode_cursor(self._get_page_key(ret[-1]))
+
+    def _get_page_after(
+        self,
+        key: tp.Optional[tp.List[tp.Any]],
+        *,
+        limit: tp.Optional[int] = None,
+    ) -> tp.List[ModelType]:
+        """Gets the objects (in order) after the one with the given sort
+        `key` (or from the start, if ``None``).
+        """
+        raise NotImplementedError()
+
+    def _get_page_key(self, obj: ModelType) -> tp.List[tp.Any]:
+        """Gets the (JSON-serializable) sort key of the given `obj`."""
+        raise NotImplementedError()
+
     def create(self, obj_in: CreateSchemaType) -> ModelType:
         """Creates a new object and stores it.
 
@@ -188,8 +398,10 @@ class RepositoryBase(
 
         """
         data_in = jsonable_encoder(obj_in, by_alias=False)
-        new_obj = self._make(**data_in)
-        return self._save(new_obj)
+        new_obj = self._save(self._make(**data_in))
+        self._track(new_obj, 1)
+        self._touch()
+        return new_obj
 
     def update(
         self,
@@ -216,7 +428,11 @@ class RepositoryBase(
         else:
             data_in = obj_in.dict(exclude_unset=True)
         upd_obj = self._update(obj, data_in)
-        return self._save(upd_obj)
+        if self.__versioned__:
+            self._bump_version(upd_obj)
+        upd_obj = self._save(upd_obj)
+        self._touch()
+        return upd_obj
 
     def _update(
         self,
@@ -247,4 +463,149 @@ class RepositoryBase(
         obj = self.get(uid)
         if obj is None:
             raise ValueError(f"No {self.model.__name__} with uid: {uid}")
+        self._track(obj, -1)
         self._delete(obj)
+        self._touch()
+
+    def update_many(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+    ) -> int:
+        """Updates all the objects matching the `criteria` at once.
+
+        Only objects which aren't already set to the given `values` are
+        updated (and counted).  The fields which can be updated in bulk
+        are limited to the :obj:`__bulk_fields__` (if set), and never
+        include the object IDs, and those objects can be selected by are
+        limited to the :obj:`__bulk_criteria__`.
+
+        Parameters
+        ----------
+        criteria : Dict[str, Any]
+            The values (by field name) the objects to update must have,
+            a ``list``, ``tuple`` or ``set`` of values matches any of
+            them.
+        values : Dict[str, Any]
+            The new values to set (by field name).
+
+        Returns
+        -------
+        int
+            The number of objects updated.
+
+        Raises
+        ------
+        ValueError
+            If the `criteria` are empty, or use fields (or values) which
+            can't be selected by, or if the `values` use fields which
+            can't be updated in bulk.
+
+        """
+        if not criteria:
+            raise ValueError("A filter is required to update in bulk")
+        for k in values:
+            if k in ('id', 'uid') or (
+                self.__bulk_fields__ is not None
+                and k not in self.__bulk_fields__
+            ):
+                raise ValueError(f"Can't update {k} in bulk")
+        if not values:
+            return 0
+        ret = self._update_many(self._format_criteria(criteria), values)
+        if ret:
+            self._touch()
+        return ret
+
+    def remove_many(self, uids: tp.Iterable[UUID]) -> int:
+        """Removes all the specified objects from storage at once.
+
+        Parameters
+        ----------
+        uids : Iterable[UUID]
+            The unique IDs of the objects to remove (any which don't
+            exist are ignored).
+
+        Returns
+        -------
+        int
+            The number of objects removed.
+
+        """
+        uids = list(uids)
+        if not uids:
+            return 0
+        ret = self._delete_where(self._format_criteria({'uid': uids}))
+        if self.__counted__ is not None:
+            self.uow.adjust_counter(self.__counted__, -ret)
+        if ret:
+            self._touch()
+        return ret
+
+    def _format_criteria(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+    ) -> tp.Dict[str, tp.Any]:
+        """Helper to format (and check) the given bulk operation
+        `criteria`, which may only use the :obj:`__bulk_criteria__`
+        fields (with values of their given types).
+        """
+        ret = {}
+        for k, v in criteria.items():
+            if k not in self.__bulk_criteria__:
+                raise ValueError(f"Can't select by {k} in bulk")
+            if isinstance(v, (list, tuple, set, frozenset)):
+                ret[k] = [self._format_criterion(k, x) for x in v]
+            else:
+                ret[k] = self._format_criterion(k, v)
+        return ret
+
+    def _format_criterion(self, field: str, value: tp.Any) -> tp.Any:
+        """Helper to format (and check) a bulk operation criterion
+        `value` for the given `field`.
+        """
+        expected = self.__bulk_criteria__[field]
+        if value is None or (
+            isinstance(value, expected)
+            and not (isinstance(value, bool) and expected is not bool)
+        ):
+            return value
+        if expected is UUID and isinstance(value, str):
+            try:
+                return UUID(value)
+            except ValueError:
+                pass
+        raise ValueError(f"Invalid value for {field}: {value!r}")
+
+    def _update_many(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+    ) -> int:
+        """Updates the objects matching the (checked) `criteria` with the
+        `values` given.
+        """
+        return self._update_where(
+            criteria,
+            values,
+            increment=('version',) if self.__versioned__ else (),
+        )
+
+    def _update_where(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+        *,
+        increment: tp.Collection[str] = (),
+    ) -> int:
+        """Sets the `values` (and increments the `increment` fields) of
+        the objects matching the `criteria` which differ from the `values`,
+        returning the number of objects updated.
+        """
+        raise NotImplementedError()
+
+    def _delete_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        """Deletes the objects matching the `criteria`, returning the number
+        of objects deleted.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Counter storage repository specifications.
+"""
+from abc import (
+    ABCMeta,
+    abstractmethod,
+)
+import typing as tp
+
+from app.crud.models.counter import CounterType
+from app.crud.repos.base import (
+    Repository,
+    RepositoryBase,
+)
+from app.schema.counter import (
+    CounterCreate,
+    CounterUpdate,
+)
+
+
+class CounterRepository(Repository[CounterType], tp.Protocol[CounterType]):
+    """
+    Interface for CounterRepository objects.
+    """
+
+    def get_value(self, name: str) -> tp.Optional[int]:
+        ...
+
+    def get_values(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        ...
+
+    def add(self, name: str, delta: int) -> bool:
+        ...
+
+    def set_value(self, name: str, value: int) -> None:
+        ...
+
+    def discard(self, names: tp.Iterable[str]) -> int:
+        ...
+
+
+class CounterRepositoryBase(
+    RepositoryBase[CounterType, CounterCreate, CounterUpdate],
+    metaclass=ABCMeta,
+):
+    """
+    Counter storage repository base class.
+
+    Counters hold the number of objects in a collection (or group of
+    objects, e.g. the members of a role), kept up to date by the units
+    of work changing them (in the same transaction), so counts can be
+    read without counting.  A counter which doesn't exist (yet) isn't
+    adjusted, it's only (re)set by reconciling it with the actual count.
+    """
+
+    def get_value(self, name: str) -> tp.Optional[int]:
+        """Gets the current value of the given counter.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter to get the value of.
+
+        Returns
+        -------
+        Optional[int]
+            The counter's current value (if it exists, ``None``
+            otherwise).
+
+        """
+        return self.get_values([name]).get(name)
+
+    @abstractmethod
+    def get_values(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        """Gets the current values of the given counters.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names of the counters to get the values of.
+
+        Returns
+        -------
+        Dict[str, int]
+            The current value of each (existing) counter, by name.
+
+        """
+        pass
+
+    @abstractmethod
+    def add(self, name: str, delta: int) -> bool:
+        """Adds the given `delta` to the counter (if it exists).
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter to adjust.
+        delta : int
+            The amount to adjust the counter by.
+
+        Returns
+        -------
+        bool
+            Whether or not the counter exists (and was adjusted).
+
+        """
+        pass
+
+    @abstractmethod
+    def set_value(self, name: str, value: int) -> None:
+        """Sets the value of the given counter (creating it if needed).
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter to set.
+        value : int
+            The (actual) value to set the counter to.
+
+        """
+        pass
+
+    @abstractmethod
+    def discard(self, names: tp.Iterable[str]) -> int:
+        """Removes the given counters (if they exist).
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names of the counters to remove.
+
+        Returns
+        -------
+        int
+            The number of counters removed.
+
+        """
+        pass
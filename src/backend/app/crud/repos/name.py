@@ -19,7 +19,7 @@ from app.schema.name import (
 )
 
 
-class NameRepository(Repository, tp.Protocol):
+class NameRepository(Repository[NameType], tp.Protocol[NameType]):
     """
     Interface for NameRepository objects.
     """
@@ -6,8 +6,12 @@ from abc import (
     ABCMeta,
     abstractmethod,
 )
+import threading
 import typing as tp
+from uuid import UUID
 
+from app.core import metrics
+from app.core.config import settings
 from app.crud.repos.base import (
     Repository,
     RepositoryBase,
@@ -18,8 +22,47 @@ from app.schema.role import (
     RoleUpdate,
 )
 
+ROLES_COLLECTION = 'roles'
+"""str: The collection version name for roles."""
 
-class RoleRepository(Repository, tp.Protocol):
+ROLE_BITS_COLLECTION = 'role_bits'
+"""str: The collection version name for the role bit counter."""
+
+ROLE_MASK_BITS = 63
+"""int: The number of role bits available (in a signed 64-bit mask)."""
+
+ROLE_MEMBERS_COUNTER = 'role_members:{}'
+"""str: The counter name (format) for the number of users with a role.
+"""
+
+
+class RoleCatalog(tp.Generic[RoleType]):
+    """
+    Snapshot of all (detached) roles, at a given collection version.
+
+    Parameters
+    ----------
+    roles : Iterable[RoleType]
+        The (detached) roles in the catalog.
+    version : int
+        The roles' collection version the catalog was loaded at.
+
+    """
+
+    def __init__(self, roles: tp.Iterable[RoleType], version: int) -> None:
+        self.version = version
+        self.by_name: tp.Dict[str, RoleType] = {}
+        self.by_uid: tp.Dict[UUID, RoleType] = {}
+        for role in roles:
+            self.by_name[role.name] = role
+            if role.uid is not None:
+                self.by_uid[role.uid] = role
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+
+class RoleRepository(Repository[RoleType], tp.Protocol[RoleType]):
     """
     Interface for UserRepository objects.
     """
@@ -27,6 +70,18 @@ class RoleRepository(Repository, tp.Protocol):
     def get_by_name(self, name: str) -> tp.Optional[RoleType]:
         ...
 
+    def get_by_names(
+        self,
+        names: tp.Iterable[str],
+    ) -> tp.Dict[str, RoleType]:
+        ...
+
+    def get_mask(self, roles: tp.Iterable[RoleType]) -> tp.Optional[int]:
+        ...
+
+    def members_counter(self, uid: UUID) -> str:
+        ...
+
 
 class RoleRepositoryBase(
     RepositoryBase[RoleType, RoleCreate, RoleUpdate],
@@ -34,9 +89,52 @@ class RoleRepositoryBase(
 ):
     """
     Role object storage repository base class.
+
+    Role lookups (by name or ID) are served from a process-wide catalog
+    of all roles (the roles table is tiny and rarely changes).  Each
+    unit of work checks the catalog against the roles' collection
+    version (one small query, shared by all lookups in the unit of work)
+    before using it, so changes made by other workers are picked up, and
+    changes made through this repository bump the version.
+
+    Each new role is also given a (never reused) bit, so that a user's
+    roles can be mirrored by a single integer mask, until all
+    ``ROLE_MASK_BITS`` have been used (later roles don't get one).
     """
+    __bulk_criteria__ = {
+        'uid': UUID,
+        'name': str,
+    }
+    __bulk_fields__ = {'description'}
+    __collection__ = ROLES_COLLECTION
+    __counted__ = 'roles'
+    __versioned__ = True
+    _catalog: tp.ClassVar[tp.Optional[RoleCatalog[tp.Any]]] = None
+    _lock: tp.ClassVar[threading.Lock] = threading.Lock()
+    _stats: tp.ClassVar[tp.Dict[str, int]] = {
+        'loads': 0,
+        'hits': 0,
+        'misses': 0,
+    }
+
+    def __init__(self, *args: tp.Any, **kwargs: tp.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._checked: tp.Optional[RoleCatalog[RoleType]] = None
+        self._pending = False
 
     @abstractmethod
+    def _load_by_name(self, name: str) -> tp.Optional[RoleType]:
+        """Loads the role object with the given `name` from storage."""
+        pass
+
+    @abstractmethod
+    def _load_by_names(
+        self,
+        names: tp.Collection[str],
+    ) -> tp.List[RoleType]:
+        """Loads the role objects with the given `names` from storage."""
+        pass
+
     def get_by_name(self, name: str) -> tp.Optional[RoleType]:
         """Gets the role object with the given `name`.
 
@@ -51,4 +149,254 @@ class RoleRepositoryBase(
             The role object with the given `name` (if it exists).
 
         """
-        pass
+        name = name.lower()
+        catalog = self._get_catalog()
+        if catalog is None:
+            return self._load_by_name(name)
+        return self._from_catalog(catalog.by_name.get(name))
+
+    def get_by_names(
+        self,
+        names: tp.Iterable[str],
+    ) -> tp.Dict[str, RoleType]:
+        """Gets the role objects with the given `names` (in one lookup).
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names of the roles to get the role objects for.
+
+        Returns
+        -------
+        Dict[str, RoleType]
+            The role objects found, keyed by (lower-cased) name, any
+            names which don't exist are omitted.
+
+        """
+        names = set(x.lower() for x in names)
+        if not names:
+            return {}
+        catalog = self._get_catalog()
+        if catalog is None:
+            return {x.name: x for x in self._load_by_names(names)}
+        ret = {}
+        for name in names:
+            role = self._from_catalog(catalog.by_name.get(name))
+            if role is not None:
+                ret[name] = role
+        return ret
+
+    def get(self, uid: UUID) -> tp.Optional[RoleType]:
+        catalog = self._get_catalog()
+        if catalog is None:
+            return super().get(uid)
+        if not isinstance(uid, UUID):
+            uid = UUID(str(uid))
+        return self._from_catalog(catalog.by_uid.get(uid))
+
+    @staticmethod
+    def get_mask(roles: tp.Iterable[RoleType]) -> tp.Optional[int]:
+        """Gets the bit mask for the given `roles`.
+
+        Parameters
+        ----------
+        roles : Iterable[RoleType]
+            The role objects to get the mask for.
+
+        Returns
+        -------
+        Optional[int]
+            The combined bit mask of the `roles`, or ``None`` if any of
+            them doesn't have a bit (so can't be represented by a mask).
+
+        """
+        ret = 0
+        for role in roles:
+            if role.bit is None:
+                return None
+            ret |= 1 << role.bit
+        return ret
+
+    @classmethod
+    def get_cached_mask(cls, names: tp.Iterable[str]) -> tp.Optional[int]:
+        """Gets the bit mask for the given role `names`, from the
+        process's role catalog (without touching storage).
+
+        Role bits are never reused, so even a stale catalog gives the
+        right bit for any role it knows about.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names of the roles to get the mask for.
+
+        Returns
+        -------
+        Optional[int]
+            The combined bit mask of the roles, or ``None`` if it can't
+            be determined (e.g. a role isn't in the catalog).
+
+        """
+        catalog = RoleRepositoryBase._catalog
+        if catalog is None:
+            return None
+        roles = []
+        for name in names:
+            role = catalog.by_name.get(name.lower())
+            if role is None:
+                return None
+            roles.append(role)
+        return cls.get_mask(roles)
+
+    @staticmethod
+    def members_counter(uid: UUID) -> str:
+        """Gets the name of the counter for the number of users with the
+        given role.
+
+        Parameters
+        ----------
+        uid : UUID
+            The unique ID of the role to get the members counter for.
+
+        Returns
+        -------
+        str
+            The name of the role's members counter.
+
+        """
+        return ROLE_MEMBERS_COUNTER.format(uid)
+
+    def get_collection_version(self) -> tp.Optional[int]:
+        catalog = self._get_catalog()
+        if catalog is None:
+            return super().get_collection_version()
+        return catalog.version
+
+    def create(self, obj_in: RoleCreate) -> RoleType:
+        ret = super().create(obj_in)
+        assert ret.uid is not None
+        self.uow.counter.set_value(self.members_counter(ret.uid), 0)
+        return ret
+
+    def update(
+        self,
+        obj: RoleType,
+        obj_in: tp.Union[tp.Dict[str, tp.Any], RoleUpdate],
+    ) -> RoleType:
+        name = obj.name
+        ret = super().update(obj, obj_in)
+        if ret.name != name:
+            # - Members' tokens name the role
+            assert ret.uid is not None
+            self.uow.user.bump_role_epochs([ret.uid])
+        return ret
+
+    def remove(self, uid: UUID) -> None:
+        # - Before the memberships go, so the members can be found
+        self.uow.user.bump_role_epochs([uid])
+        super().remove(uid)
+        self.uow.counter.discard([self.members_counter(uid)])
+
+    def remove_many(self, uids: tp.Iterable[UUID]) -> int:
+        uids = self._format_criteria({'uid': list(uids)})['uid']
+        self.uow.user.bump_role_epochs(uids)
+        ret = super().remove_many(uids)
+        if ret:
+            self.uow.counter.discard(self.members_counter(x) for x in uids)
+        return ret
+
+    @classmethod
+    def catalog_stats(cls) -> tp.Dict[str, tp.Any]:
+        """Gets the statistics for the role catalog."""
+        catalog = RoleRepositoryBase._catalog
+        return {
+            'size': len(catalog) if catalog is not None else 0,
+            'version': catalog.version if catalog is not None else None,
+            **RoleRepositoryBase._stats,
+        }
+
+    def _make(self, *args: tp.Any, **kwargs: tp.Any) -> RoleType:
+        if kwargs.get('bit') is None:
+            kwargs['bit'] = self._next_bit()
+        return super()._make(*args, **kwargs)
+
+    def _next_bit(self) -> tp.Optional[int]:
+        """Allocates the next (never reused) role bit, if any are left."""
+        bit = self.uow.collection_version.bump(ROLE_BITS_COLLECTION) - 1
+        if bit >= ROLE_MASK_BITS:
+            return None
+        return bit
+
+    def _from_catalog(
+        self,
+        obj: tp.Optional[RoleType],
+    ) -> tp.Optional[RoleType]:
+        """Gets a copy of the (catalog) role bound to this unit of work."""
+        stats = RoleRepositoryBase._stats
+        if obj is None:
+            stats['misses'] += 1
+            return None
+        stats['hits'] += 1
+        return self._attach(obj)
+
+    def _get_catalog(self) -> tp.Optional[RoleCatalog[RoleType]]:
+        """Gets the (current) role catalog to use, if enabled."""
+        if not settings.ROLE_CACHE_ENABLED:
+            return None
+        if self._checked is not None:
+            return self._checked
+
+        cls = RoleRepositoryBase
+        version = self.uow.collection_version.get_version(ROLES_COLLECTION)
+        if self._pending:
+            # - Loaded from (as yet) uncommitted changes, so it's only used
+            #   by this unit of work (rather than published)
+            catalog = RoleCatalog(
+                (self._snapshot(x) for x in self.get_multi(limit=None)),
+                version,
+            )
+            self._checked = catalog
+            return catalog
+
+        cached = cls._catalog
+        if cached is None or cached.version != version:
+            with cls._lock:
+                cached = cls._catalog
+                if cached is None or cached.version != version:
+                    # - Loaded after reading the version, so at worst it's
+                    #   newer than its version (and is simply reloaded)
+                    roles = self.get_multi(limit=None)
+                    cached = RoleCatalog(
+                        (self._snapshot(x) for x in roles),
+                        version,
+                    )
+                    cls._catalog = cached
+                    cls._stats['loads'] += 1
+        self._checked = cached
+        return cached
+
+    def _touch(self) -> None:
+        # - The version is bumped straight away (rather than on commit),
+        #   so later lookups in this unit of work see the changes
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        """Bumps the roles' collection version and drops the catalog (now
+        and on commit).
+        """
+        def _evict() -> None:
+            RoleRepositoryBase._catalog = None
+
+        def _committed() -> None:
+            self._pending = False
+            self._checked = None
+            _evict()
+
+        self.uow.collection_version.bump(ROLES_COLLECTION)
+        self._pending = True
+        self._checked = None
+        _evict()
+        self.uow.on_commit(_committed)
+
+
+metrics.register('role_catalog', RoleRepositoryBase.catalog_stats)
@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+"""
+Token object storage repository specifications.
+"""
+from abc import (
+    ABCMeta,
+    abstractmethod,
+)
+from datetime import (
+    datetime,
+    timedelta,
+)
+import threading
+import time
+import typing as tp
+from uuid import uuid4
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud.models.token import (
+    RefreshTokenType,
+    RevokedTokenType,
+)
+from app.crud.models.user import UserType
+from app.crud.repos.base import (
+    Repository,
+    RepositoryBase,
+)
+from app.schema.token import (
+    RefreshTokenCreate,
+    RefreshTokenUpdate,
+    RevokedTokenCreate,
+    RevokedTokenUpdate,
+)
+from app.utils.bloomutils import BloomFilter
+
+
+class RefreshTokenRepository(
+    Repository[RefreshTokenType], tp.Protocol[RefreshTokenType]
+):
+    """
+    Interface for RefreshTokenRepository objects.
+    """
+
+    def get_by_jti(self, jti: str) -> tp.Optional[RefreshTokenType]:
+        ...
+
+    def mark_used(self, obj: RefreshTokenType) -> bool:
+        ...
+
+    def revoke_family(self, family: str) -> int:
+        ...
+
+    def revoke_user(self, user: UserType) -> int:
+        ...
+
+    def remove_expired(self, before: datetime) -> int:
+        ...
+
+    def issue(
+        self,
+        user: UserType,
+        family: tp.Optional[str] = None,
+    ) -> RefreshTokenType:
+        ...
+
+    def rotate(self, jti: str) -> tp.Optional[RefreshTokenType]:
+        ...
+
+
+class RefreshTokenRepositoryBase(
+    RepositoryBase[RefreshTokenType, RefreshTokenCreate, RefreshTokenUpdate],
+    metaclass=ABCMeta,
+):
+    """
+    Refresh token storage repository base class.
+
+    Refresh tokens are single-use: each refresh marks the presented token
+    as used and issues a new one in the same family.  Presenting an
+    already-used token is treated as theft (one of the two holders is
+    not the legitimate client) and revokes the entire family.
+    """
+    _swept_at: tp.ClassVar[float] = 0.0
+
+    @abstractmethod
+    def get_by_jti(self, jti: str) -> tp.Optional[RefreshTokenType]:
+        """Gets the refresh token with the given `jti`.
+
+        Parameters
+        ----------
+        jti : str
+            The unique ID of the refresh token to get.
+
+        Returns
+        -------
+        Optional[RefreshTokenType]
+            The refresh token (if found, ``None`` otherwise).
+
+        """
+        pass
+
+    @abstractmethod
+    def mark_used(self, obj: RefreshTokenType) -> bool:
+        """Atomically marks the given refresh token as used.
+
+        Parameters
+        ----------
+        obj : RefreshTokenType
+            The refresh token to mark as used.
+
+        Returns
+        -------
+        bool
+            Whether or not the token was marked (``False`` if it was
+            already used, e.g. by a concurrent request).
+
+        """
+        pass
+
+    @abstractmethod
+    def revoke_family(self, family: str) -> int:
+        """Revokes all refresh tokens in the given `family`.
+
+        Parameters
+        ----------
+        family : str
+            The family ID of the refresh tokens to revoke.
+
+        Returns
+        -------
+        int
+            The number of refresh tokens revoked.
+
+        """
+        pass
+
+    @abstractmethod
+    def revoke_user(self, user: UserType) -> int:
+        """Revokes all refresh tokens issued to the given `user`.
+
+        Parameters
+        ----------
+        user : UserType
+            The user to revoke all refresh tokens for.
+
+        Returns
+        -------
+        int
+            The number of refresh tokens revoked.
+
+        """
+        pass
+
+    @abstractmethod
+    def remove_expired(self, before: datetime) -> int:
+        """Removes all refresh tokens expiring before the given time.
+
+        Parameters
+        ----------
+        before : datetime
+            The (UTC) time to remove refresh tokens which expire before.
+
+        Returns
+        -------
+        int
+            The number of refresh tokens removed.
+
+        """
+        pass
+
+    def issue(
+        self,
+        user: UserType,
+        family: tp.Optional[str] = None,
+    ) -> RefreshTokenType:
+        """Issues a new refresh token for the given `user`.
+
+        Parameters
+        ----------
+        user : UserType
+            The user to issue the refresh token to.
+        family : str, optional
+            The family (chain of rotated tokens) to issue the new token
+            in, if not given a new family is started.
+
+        Returns
+        -------
+        RefreshTokenType
+            The newly-issued refresh token.
+
+        """
+        now = time.monotonic()
+        cls = RefreshTokenRepositoryBase
+        if now - cls._swept_at >= settings.REFRESH_TOKEN_SWEEP_SECONDS:
+            cls._swept_at = now
+            self.remove_expired(datetime.utcnow())
+
+        expires = datetime.utcnow() + timedelta(
+            minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        )
+        return self._save(
+            self._make(
+                jti=uuid4().hex,
+                family=family or uuid4().hex,
+                user=user,
+                expires=expires,
+            )
+        )
+
+    def rotate(self, jti: str) -> tp.Optional[RefreshTokenType]:
+        """Exchanges the refresh token with the given `jti` for a new one.
+
+        Parameters
+        ----------
+        jti : str
+            The unique ID of the refresh token being presented.
+
+        Returns
+        -------
+        Optional[RefreshTokenType]
+            The new refresh token (in the same family), or ``None`` if
+            the presented token is unknown, expired, revoked or has
+            already been used (in which case its family is revoked).
+
+        """
+        obj = self.get_by_jti(jti)
+        if obj is None or obj.revoked or obj.expires <= datetime.utcnow():
+            return None
+        if obj.used or not self.mark_used(obj):
+            self.revoke_family(obj.family)
+            return None
+        return self.issue(obj.user, family=obj.family)
+
+
+class RevokedTokenRepository(
+    Repository[RevokedTokenType], tp.Protocol[RevokedTokenType]
+):
+    """
+    Interface for RevokedTokenRepository objects.
+    """
+
+    def get_by_jti(self, jti: str) -> tp.Optional[RevokedTokenType]:
+        ...
+
+    def get_jtis(
+        self,
+        since: tp.Optional[datetime] = None,
+    ) -> tp.List[str]:
+        ...
+
+    def remove_expired(self, before: datetime) -> int:
+        ...
+
+    def revoke(self, jti: str, expires: datetime) -> RevokedTokenType:
+        ...
+
+    def is_revoked(self, jti: str) -> bool:
+        ...
+
+
+class RevokedTokenRepositoryBase(
+    RepositoryBase[RevokedTokenType, RevokedTokenCreate, RevokedTokenUpdate],
+    metaclass=ABCMeta,
+):
+    """
+    Revoked token storage repository base class.
+
+    Revocation checks go through a process-wide Bloom filter of the
+    (unexpired) revoked token IDs, so that checking a token which was
+    never revoked (the common case) doesn't touch storage.  The filter
+    is incrementally synced with storage every
+    ``REVOKED_TOKEN_SYNC_SECONDS`` (so revocations made by other workers
+    are picked up), and rebuilt (dropping expired entries) every
+    ``REVOKED_TOKEN_SWEEP_SECONDS``.
+
+    Revocations are added to the filter of the process making them as
+    soon as they're committed, but a filter miss is trusted without
+    checking storage, so other processes only see them after their next
+    sync: a token revoked on one worker may still be accepted by the
+    others for up to ``REVOKED_TOKEN_SYNC_SECONDS``.
+
+    Expired entries are swept from storage by revocations (at most once
+    every ``REVOKED_TOKEN_SWEEP_SECONDS``), as part of their changes, or
+    by the ``storage sweep`` command, never by revocation checks.
+    """
+    _filter: tp.ClassVar[tp.Optional[BloomFilter]] = None
+    _synced_at: tp.ClassVar[tp.Optional[datetime]] = None
+    _checked_at: tp.ClassVar[float] = 0.0
+    _rebuilt_at: tp.ClassVar[float] = 0.0
+    _swept_at: tp.ClassVar[float] = 0.0
+    _lock: tp.ClassVar[threading.Lock] = threading.Lock()
+
+    @abstractmethod
+    def get_by_jti(self, jti: str) -> tp.Optional[RevokedTokenType]:
+        """Gets the revoked token entry with the given `jti`.
+
+        Parameters
+        ----------
+        jti : str
+            The unique token ID to get the revocation entry for.
+
+        Returns
+        -------
+        Optional[RevokedTokenType]
+            The revocation entry for `jti` (if found, ``None``
+            otherwise).
+
+        """
+        pass
+
+    @abstractmethod
+    def get_jtis(
+        self,
+        since: tp.Optional[datetime] = None,
+    ) -> tp.List[str]:
+        """Gets the IDs of all unexpired revoked tokens.
+
+        Parameters
+        ----------
+        since : datetime, optional
+            If given, only get the IDs of tokens revoked on or after
+            this (UTC) time.
+
+        Returns
+        -------
+        List[str]
+            The unique IDs of the revoked (unexpired) tokens.
+
+        """
+        pass
+
+    @abstractmethod
+    def remove_expired(self, before: datetime) -> int:
+        """Removes all entries for tokens expiring before the given time.
+
+        Parameters
+        ----------
+        before : datetime
+            The (UTC) time to remove entries which expire before.
+
+        Returns
+        -------
+        int
+            The number of entries removed.
+
+        """
+        pass
+
+    def revoke(self, jti: str, expires: datetime) -> RevokedTokenType:
+        """Revokes the token with the given `jti`.
+
+        Parameters
+        ----------
+        jti : str
+            The unique ID of the token to revoke.
+        expires : datetime
+            The (UTC) time the token expires at (after which the entry
+            is no longer needed).
+
+        Returns
+        -------
+        RevokedTokenType
+            The new revocation entry.
+
+        """
+        now = time.monotonic()
+        cls = RevokedTokenRepositoryBase
+        if now - cls._swept_at >= settings.REVOKED_TOKEN_SWEEP_SECONDS:
+            cls._swept_at = now
+            self.remove_expired(datetime.utcnow())
+
+        obj = self.get_by_jti(jti)
+        if obj is None:
+            obj = self._save(self._make(jti=jti, expires=expires))
+            self.uow.on_commit(lambda: self._add_to_filter(jti))
+        return obj
+
+    def is_revoked(self, jti: str) -> bool:
+        """Checks whether or not the token with the given `jti` has been
+        revoked.
+
+        Parameters
+        ----------
+        jti : str
+            The unique ID of the token to check.
+
+        Returns
+        -------
+        bool
+            Whether or not the token has been revoked.
+
+        Notes
+        -----
+        Tokens revoked by other processes since this process's filter
+        was last synced aren't seen as revoked (see the class notes on
+        ``REVOKED_TOKEN_SYNC_SECONDS``).
+
+        """
+        self._refresh_filter()
+        bloom = RevokedTokenRepositoryBase._filter
+        if bloom is not None and jti not in bloom:
+            return False
+        return self.get_by_jti(jti) is not None
+
+    @classmethod
+    def filter_stats(cls) -> tp.Dict[str, tp.Any]:
+        """Gets the statistics for the revoked token filter."""
+        bloom = RevokedTokenRepositoryBase._filter
+        return bloom.stats() if bloom is not None else {}
+
+    def _add_to_filter(self, jti: str) -> None:
+        """Adds the given `jti` to this process's revoked token filter."""
+        bloom = RevokedTokenRepositoryBase._filter
+        if bloom is not None:
+            bloom.add(jti)
+
+    def _refresh_filter(self) -> None:
+        """Syncs (or rebuilds) the revoked token filter, if it's due."""
+        cls = RevokedTokenRepositoryBase
+        now = time.monotonic()
+        if (
+            cls._filter is not None
+            and now - cls._checked_at < settings.REVOKED_TOKEN_SYNC_SECONDS
+        ):
+            return
+
+        with cls._lock:
+            if (
+                cls._filter is not None
+                and now - cls._checked_at
+                < settings.REVOKED_TOKEN_SYNC_SECONDS
+            ):
+                return
+
+            started = datetime.utcnow()
+            synced_at = cls._synced_at
+            if (
+                cls._filter is None
+                or synced_at is None
+                or cls._filter.full
+                or now - cls._rebuilt_at
+                >= settings.REVOKED_TOKEN_SWEEP_SECONDS
+            ):
+                jtis = self.get_jtis()
+                capacity = settings.REVOKED_TOKEN_FILTER_CAPACITY
+                bloom = BloomFilter(
+                    max(capacity, 2 * len(jtis)),
+                    settings.REVOKED_TOKEN_FILTER_ERROR_RATE,
+                )
+                bloom.update(jtis)
+                cls._filter = bloom
+                cls._rebuilt_at = now
+            else:
+                # - Overlap syncs to catch entries committed late
+                since = synced_at - timedelta(
+                    seconds=settings.REVOKED_TOKEN_SYNC_SECONDS,
+                )
+                cls._filter.update(self.get_jtis(since=since))
+            cls._synced_at = started
+            cls._checked_at = now
+
+
+metrics.register(
+    'revoked_token_filter',
+    RevokedTokenRepositoryBase.filter_stats,
+)
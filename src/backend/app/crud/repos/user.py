@@ -7,16 +7,28 @@ from abc import (
     abstractmethod,
 )
 import typing as tp
+from uuid import UUID
 
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import (
+    auth_epoch_cache,
+    principal_cache,
+)
 from app.core.security import (
     get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    get_password_hashes_async,
+    verify_and_update_password_async,
 )
 from app.crud.repos.base import (
     Repository,
     RepositoryBase,
 )
-from app.crud.models.role import RoleType
+from app.crud.models.role import (
+    RoleBase,
+    RoleType,
+)
 from app.crud.models.user import UserType
 from app.schema.name import (
     NameCreate,
@@ -27,8 +39,11 @@ from app.schema.user import (
     UserUpdate,
 )
 
+USERS_COLLECTION = 'users'
+"""str: The collection version name for users."""
 
-class UserRepository(Repository, tp.Protocol):
+
+class UserRepository(Repository[UserType], tp.Protocol[UserType]):
     """
     Interface for UserRepository objects.
     """
@@ -36,6 +51,21 @@ class UserRepository(Repository, tp.Protocol):
     def get_by_email(self, email: str) -> tp.Optional[UserType]:
         ...
 
+    def get_existing_emails(self, emails: tp.Iterable[str]) -> tp.Set[str]:
+        ...
+
+    def get_cached(self, uid: UUID) -> tp.Optional[UserType]:
+        ...
+
+    def get_auth_epoch(self, uid: UUID) -> tp.Optional[int]:
+        ...
+
+    def get_auth_epoch_cached(self, uid: UUID) -> tp.Optional[int]:
+        ...
+
+    def bump_role_epochs(self, role_uids: tp.Iterable[UUID]) -> int:
+        ...
+
     def _helper_format_roles(
         self,
         role: tp.Union[
@@ -69,7 +99,23 @@ class UserRepository(Repository, tp.Protocol):
     ) -> int:
         ...
 
-    def authenticate(
+    async def create_async(self, obj_in: UserCreate) -> UserType:
+        ...
+
+    async def create_many(
+        self,
+        objs_in: tp.Sequence[UserCreate],
+    ) -> tp.Tuple[tp.Dict[int, UUID], tp.Dict[int, str]]:
+        ...
+
+    async def update_async(
+        self,
+        obj: UserType,
+        obj_in: tp.Union[tp.Dict[str, tp.Any], UserUpdate],
+    ) -> UserType:
+        ...
+
+    async def authenticate(
         self,
         email: str,
         password: str,
@@ -84,6 +130,17 @@ class UserRepositoryBase(
     """
     User object storage repository base class.
     """
+    __bulk_criteria__ = {
+        'uid': UUID,
+        'email': str,
+        'is_active': bool,
+        'is_superuser': bool,
+        'is_admin': bool,
+    }
+    __bulk_fields__ = {'is_active', 'is_superuser', 'is_admin'}
+    __collection__ = USERS_COLLECTION
+    __counted__ = 'users'
+    __versioned__ = True
 
     @abstractmethod
     def get_by_email(self, email: str) -> tp.Optional[UserType]:
@@ -104,6 +161,181 @@ class UserRepositoryBase(
         """
         pass
 
+    @abstractmethod
+    def get_existing_emails(self, emails: tp.Iterable[str]) -> tp.Set[str]:
+        """Gets which of the given `emails` already belong to a user.
+
+        Parameters
+        ----------
+        emails : Iterable[str]
+            The email addresses to check.
+
+        Returns
+        -------
+        Set[str]
+            The `emails` which are already in use.
+
+        """
+        pass
+
+    def get_cached(self, uid: UUID) -> tp.Optional[UserType]:
+        """Gets the user with the given `uid`, using the principal cache.
+
+        Verified users are held (detached) in the process-wide
+        :obj:`principal_cache` so that repeated lookups for the same
+        user skip the storage round trip until the entry expires or the
+        user is updated/removed through this repository.  Each cached
+        copy is also checked against the user's (cached) authorization
+        epoch, so a user deactivated or demoted by another worker stops
+        being served from the cache within the epoch cache's TTL.
+
+        Parameters
+        ----------
+        uid : UUID
+            The unique ID of the user to get.
+
+        Returns
+        -------
+        Optional[UserType]
+            The user with the given `uid` (if found, ``None`` otherwise).
+
+        """
+        if not principal_cache.enabled:
+            return self.get(uid)
+
+        cached = principal_cache.get(uid)
+        if (
+            cached is not None
+            and cached.auth_epoch != self.get_auth_epoch_cached(uid)
+        ):
+            principal_cache.pop(uid)
+            cached = None
+        if cached is None:
+            user = self.get(uid)
+            if user is None:
+                return None
+            cached = self._detach(user)
+            principal_cache.set(uid, cached)
+        return self._attach(cached)
+
+    @abstractmethod
+    def get_auth_epoch(self, uid: UUID) -> tp.Optional[int]:
+        """Gets the current authorization epoch of the given user.
+
+        Parameters
+        ----------
+        uid : UUID
+            The unique ID of the user to get the epoch for.
+
+        Returns
+        -------
+        Optional[int]
+            The user's current authorization epoch (if found, ``None``
+            otherwise).
+
+        """
+        pass
+
+    def get_auth_epoch_cached(self, uid: UUID) -> tp.Optional[int]:
+        """Gets the given user's authorization epoch, using the epoch
+        cache.
+
+        Parameters
+        ----------
+        uid : UUID
+            The unique ID of the user to get the epoch for.
+
+        Returns
+        -------
+        Optional[int]
+            The user's current authorization epoch (if found, ``None``
+            otherwise).
+
+        """
+        epoch = auth_epoch_cache.get(uid)
+        if epoch is None:
+            epoch = self.get_auth_epoch(uid)
+            if epoch is not None:
+                auth_epoch_cache.set(uid, epoch)
+        return epoch
+
+    def _invalidate(self, uid: UUID) -> None:
+        """Evicts the cached copies of the given user's data (now and on
+        commit).
+        """
+        def _evict() -> None:
+            principal_cache.pop(uid)
+            auth_epoch_cache.pop(uid)
+
+        _evict()
+        self.uow.on_commit(_evict)
+
+    def _track(self, obj: UserType, delta: int) -> None:
+        super()._track(obj, delta)
+        for role in obj.roles or []:
+            assert role.uid is not None
+            self.uow.adjust_counter(
+                self.uow.role.members_counter(role.uid),
+                delta,
+            )
+
+    def reconcile(self) -> tp.Dict[str, tp.Tuple[tp.Optional[int], int]]:
+        ret = super().reconcile()
+        ret.update(self._reconcile_counters({
+            self.uow.role.members_counter(uid): value
+            for uid, value in self._count_members().items()
+        }))
+        return ret
+
+    def _invalidate_all(self) -> None:
+        """Evicts all cached users' data (now and on commit)."""
+        def _evict() -> None:
+            principal_cache.clear()
+            auth_epoch_cache.clear()
+
+        _evict()
+        self.uow.on_commit(_evict)
+
+    def _auth_changed(
+        self,
+        obj: UserType,
+        data: tp.Dict[str, tp.Any],
+    ) -> bool:
+        """Whether or not the `data` changes the user's authorization."""
+        if data.get('hashed_password') is not None:
+            return True
+        for k in ('is_active', 'is_superuser', 'is_admin'):
+            if data.get(k) is not None and data[k] != getattr(obj, k):
+                return True
+        roles_in = data.get('roles')
+        if roles_in is not None:
+            return set(roles_in) != set(x.name for x in obj.roles)
+        return False
+
+    def _helper_get_roles(
+        self,
+        names: tp.List[str],
+        found: tp.Optional[tp.Dict[str, RoleType]] = None,
+    ) -> tp.List[RoleType]:
+        """Helper function for resolving role `names` (in one lookup, or
+        from the roles already `found`).
+        """
+        if found is None:
+            found = self.uow.role.get_by_names(names)
+        names = list(dict.fromkeys(x.lower() for x in names))
+        return [found[x] for x in names if x in found]
+
+    def _helper_role_mask(
+        self,
+        roles: tp.Optional[tp.List[RoleType]],
+    ) -> int:
+        """Helper function for getting the role mask for a user's roles
+        (roles without a bit are left out).
+        """
+        return self.uow.role.get_mask(
+            x for x in (roles or []) if x.bit is not None
+        ) or 0
+
     def _helper_format_roles(
         self,
         role: tp.Union[
@@ -113,20 +345,17 @@ class UserRepositoryBase(
         ],
     ) -> tp.List[tp.Tuple[RoleType, ...]]:
         """Helper function for formatting input `role` parameters."""
-        roles: tp.List[tp.Tuple[RoleType, ...]] = []
-        if isinstance(role, list):
-            for r in role:
-                roles.extend(self._helper_format_roles(r))
-        else:
-            if isinstance(role, str):
-                role = (role.lower(),)
-            elif isinstance(role, tuple):
-                role = tuple(x.lower() for x in role)
-            mod_roles = (self.uow.role.get_by_name(x) for x in role)
-            roles.append(tuple(x for x in mod_roles if x is not None))
-        return roles
+        names: tp.List[tp.Tuple[str, ...]] = []
+        for r in (role if isinstance(role, list) else [role]):
+            if isinstance(r, str):
+                r = (r,)
+            names.append(tuple(x.lower() for x in r))
+
+        found: tp.Dict[str, RoleType] = self.uow.role.get_by_names(
+            x for r in names for x in r
+        )
+        return [tuple(found[x] for x in r if x in found) for r in names]
 
-    @abstractmethod
     def count_by_role(
         self,
         role: tp.Optional[
@@ -156,6 +385,39 @@ class UserRepositoryBase(
             The number of users with the given role(s) and matching
             criteria.
 
+        """
+        if isinstance(role, str):
+            found = self.uow.role.get_by_name(role)
+            if found is not None:
+                name = self.uow.role.members_counter(found.uid)
+                value = self.uow.counter.get_value(name)
+                if value is not None:
+                    return value + self.uow.pending_counter(name)
+        return self._count_by_role(role)
+
+    @abstractmethod
+    def _count_by_role(
+        self,
+        role: tp.Optional[
+            tp.Union[
+                str,
+                tp.Tuple[str, ...],
+                tp.List[tp.Union[str, tp.Tuple[str, ...]]],
+            ]
+        ],
+    ) -> int:
+        """Counts the users with the role(s) given (see
+        :meth:`count_by_role`).
+        """
+        pass
+
+    @abstractmethod
+    def _count_members(
+        self,
+        uids: tp.Optional[tp.List[UUID]] = None,
+    ) -> tp.Dict[UUID, int]:
+        """Counts the members of each role amongst the given users (or
+        all users, including roles without any, if ``None``), by role ID.
         """
         pass
 
@@ -202,22 +464,34 @@ class UserRepositoryBase(
         pass
 
     def _make(self, *args: tp.Any, **kwargs: tp.Any) -> UserType:
-        kwargs['hashed_password'] = get_password_hash(kwargs.pop('password'))
+        if 'password' in kwargs:
+            kwargs['hashed_password'] = get_password_hash(
+                kwargs.pop('password')
+            )
 
         name_in = kwargs.pop('name', None)
         if name_in:
             kwargs['name'] = self.uow.name.create(obj_in=NameCreate(**name_in))
 
         roles_in = kwargs.pop('roles', None)
-        if roles_in:
-            roles_in = [self.uow.role.get_by_name(x) for x in roles_in]
-            kwargs['roles'] = roles_in
+        kwargs['roles'] = self._helper_get_roles(roles_in) if roles_in else []
+        kwargs['role_mask'] = self._helper_role_mask(kwargs.get('roles'))
 
         return super()._make(*args, **kwargs)
 
     def _update(self, obj: UserType, data: tp.Dict[str, tp.Any]) -> UserType:
-        if 'password' in data:
+        if data.get('password') is not None:
             data['hashed_password'] = get_password_hash(data.pop('password'))
+        else:
+            data.pop('password', None)
+
+        if self._auth_changed(obj, data):
+            data['auth_epoch'] = (obj.auth_epoch or 0) + 1
+            if (
+                data.get('hashed_password') is not None
+                or data.get('is_active') is False
+            ) and obj.uid is not None:
+                self.uow.refresh_token.revoke_user(obj)
 
         name_in = data.pop('name', None)
         if name_in:
@@ -234,18 +508,291 @@ class UserRepositoryBase(
 
         roles_in = data.pop('roles', None)
         if roles_in is not None:
-            roles_in = [self.uow.role.get_by_name(x) for x in roles_in]
-            data['roles'] = roles_in
+            data['roles'] = self._helper_get_roles(roles_in)
+            data['role_mask'] = self._helper_role_mask(data['roles'])
+            old = set(x.uid for x in obj.roles)
+            new = set(x.uid for x in data['roles'])
+            for uid in old ^ new:
+                assert uid is not None
+                self.uow.adjust_counter(
+                    self.uow.role.members_counter(uid),
+                    1 if uid in new else -1,
+                )
 
         return super()._update(obj, data)
 
-    def authenticate(
+    def update(
+        self,
+        obj: UserType,
+        obj_in: tp.Union[tp.Dict[str, tp.Any], UserUpdate],
+    ) -> UserType:
+        ret = super().update(obj, obj_in)
+        assert obj.uid is not None
+        self._invalidate(obj.uid)
+        return ret
+
+    def remove(self, uid: UUID) -> None:
+        super().remove(uid)
+        self._invalidate(uid)
+
+    def _update_many(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+    ) -> int:
+        # - All the bulk fields change the users' authorization
+        if values.get('is_active') is False:
+            self._revoke_where(criteria)
+        ret = self._update_where(
+            criteria,
+            values,
+            increment=('auth_epoch', 'version'),
+        )
+        if ret:
+            self._invalidate_all()
+        return ret
+
+    def remove_many(self, uids: tp.Iterable[UUID]) -> int:
+        uids = self._format_criteria({'uid': list(uids)})['uid']
+        if not uids:
+            return 0
+        members = self._count_members(list(uids))
+        ret = super().remove_many(uids)
+        if ret:
+            for uid, value in members.items():
+                self.uow.adjust_counter(
+                    self.uow.role.members_counter(uid),
+                    -value,
+                )
+            self._invalidate_all()
+        return ret
+
+    def bump_role_epochs(self, role_uids: tp.Iterable[UUID]) -> int:
+        """Increments the authorization epoch of every user with any of
+        the given roles.
+
+        Tokens carry the user's role names (and mask) as claims, so any
+        change to a role they name (removing or renaming it) must make
+        the members' existing tokens stale.
+
+        Parameters
+        ----------
+        role_uids : Iterable[UUID]
+            The unique IDs of the (changed) roles.
+
+        Returns
+        -------
+        int
+            The number of users whose epoch was incremented.
+
+        """
+        role_uids = list(role_uids)
+        if not role_uids:
+            return 0
+        ret = self._bump_role_epochs(role_uids)
+        if ret:
+            self._invalidate_all()
+        return ret
+
+    @abstractmethod
+    def _bump_role_epochs(self, role_uids: tp.List[UUID]) -> int:
+        """Increments the authorization epoch of the users with any of
+        the given roles, returning the number of users updated.
+        """
+        pass
+
+    @abstractmethod
+    def _revoke_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        """Revokes the refresh tokens of all the users matching the
+        `criteria`, returning the number of tokens revoked.
+        """
+        pass
+
+    async def create_async(self, obj_in: UserCreate) -> UserType:
+        """Creates a new user, hashing the password off the event loop.
+
+        Parameters
+        ----------
+        obj_in : UserCreate
+            The data to create the new user using.
+
+        Returns
+        -------
+        UserType
+            The newly-created and stored user.
+
+        """
+        data_in = jsonable_encoder(obj_in, by_alias=False)
+        data_in['hashed_password'] = await get_password_hash_async(
+            data_in.pop('password')
+        )
+
+        def _create() -> UserType:
+            obj = self._save(self._make(**data_in))
+            self._track(obj, 1)
+            self._touch()
+            return obj
+
+        return await self.uow.run_sync(_create)
+
+    async def create_many(
+        self,
+        objs_in: tp.Sequence[UserCreate],
+    ) -> tp.Tuple[tp.Dict[int, UUID], tp.Dict[int, str]]:
+        """Creates (and stores) new users in bulk.
+
+        Rows which can't be created (e.g. their email is already in use)
+        are reported rather than aborting the batch.  The passwords are
+        hashed in parallel across the bulk hashing process pool, then
+        the emails in use are checked, the roles for the whole batch are
+        resolved at once and the users are inserted together (see
+        :obj:`_insert_many`), all in a single call to the database.
+
+        Parameters
+        ----------
+        objs_in : Sequence[UserCreate]
+            The data to create the new users using.
+
+        Returns
+        -------
+        Dict[int, UUID]
+            The unique IDs of the users created, by their index in
+            `objs_in`.
+        Dict[int, str]
+            The reasons the other users couldn't be created, by their
+            index in `objs_in`.
+
+        """
+        errors: tp.Dict[int, str] = {}
+        rows: tp.Dict[int, tp.Dict[str, tp.Any]] = {}
+        seen: tp.Set[str] = set()
+        for i, obj_in in enumerate(objs_in):
+            if obj_in.email in seen:
+                errors[i] = "Duplicate email in batch"
+                continue
+            seen.add(obj_in.email)
+            rows[i] = jsonable_encoder(obj_in, by_alias=False)
+        if not rows:
+            return {}, errors
+
+        # - Hashed before checking for existing emails, so the check and
+        #   the inserts are made together (and no transaction is left
+        #   idle while hashing)
+        hashes = await get_password_hashes_async(
+            [x.pop('password') for x in rows.values()]
+        )
+        for row, hashed in zip(rows.values(), hashes):
+            row['hashed_password'] = hashed
+        created = await self.uow.run_sync(self._create_many, rows, errors)
+        return created, errors
+
+    def _create_many(
+        self,
+        rows: tp.Dict[int, tp.Dict[str, tp.Any]],
+        errors: tp.Dict[int, str],
+    ) -> tp.Dict[int, UUID]:
+        """Resolves the roles for (and stores) the given user data `rows`,
+        adding the reasons any couldn't be stored to `errors`.
+        """
+        existing = self.get_existing_emails(x['email'] for x in rows.values())
+        for i in [i for i, x in rows.items() if x['email'] in existing]:
+            del rows[i]
+            errors[i] = "The user with this email already exists"
+        if not rows:
+            return {}
+
+        found: tp.Dict[str, RoleBase] = self.uow.role.get_by_names(
+            x.lower() for row in rows.values() for x in (row['roles'] or [])
+        )
+        for row in rows.values():
+            row['roles'] = self._helper_get_roles(row['roles'] or [], found)
+            row['role_mask'] = self._helper_role_mask(row['roles'])
+        uids = self._insert_many(list(rows.values()))
+
+        ret: tp.Dict[int, UUID] = {}
+        for (i, row), uid in zip(rows.items(), uids):
+            if uid is None:
+                # - The email was taken (concurrently) since the check
+                errors[i] = "The user with this email already exists"
+                continue
+            ret[i] = uid
+            for role in row['roles']:
+                assert role.uid is not None
+                self.uow.adjust_counter(
+                    self.uow.role.members_counter(role.uid),
+                    1,
+                )
+        if ret:
+            self.uow.adjust_counter(self.__counted__, len(ret))
+            self._touch()
+        return ret
+
+    def _insert_many(
+        self,
+        rows: tp.List[tp.Dict[str, tp.Any]],
+    ) -> tp.List[tp.Optional[UUID]]:
+        """Stores new users from the (hashed and resolved) data `rows`,
+        returning their unique IDs (in order, ``None`` for any not stored
+        as their email is already in use).
+
+        Drivers should override this to insert the users (and their
+        names and roles) with as few statements as possible, skipping
+        rows whose email was taken since it was checked.  This default
+        stores them one at a time.
+        """
+        ret = []
+        for row in rows:
+            row = dict(row)
+            name_in = row.pop('name', None)
+            if name_in:
+                row['name'] = self.uow.name.create(
+                    obj_in=NameCreate(**name_in)
+                )
+            ret.append(self._save(super()._make(**row)).uid)
+        return ret
+
+    async def update_async(
+        self,
+        obj: UserType,
+        obj_in: tp.Union[tp.Dict[str, tp.Any], UserUpdate],
+    ) -> UserType:
+        """Updates the `obj` given, hashing any new password off the
+        event loop.
+
+        Parameters
+        ----------
+        obj : UserType
+            The existing user to update.
+        obj_in : Union[Dict[str, Any], UserUpdate]
+            The updated user (or data to update `obj` using) to use.
+
+        Returns
+        -------
+        UserType
+            The updated user.
+
+        """
+        if isinstance(obj_in, dict):
+            data_in = dict(obj_in)
+        else:
+            data_in = obj_in.dict(exclude_unset=True)
+        if data_in.get('password') is not None:
+            data_in['hashed_password'] = await get_password_hash_async(
+                data_in.pop('password')
+            )
+        return await self.uow.run_sync(self.update, obj, data_in)
+
+    async def authenticate(
         self,
         email: str,
         password: str,
     ) -> tp.Optional[UserType]:
         """Authenticates (and returns) the user with given credentials.
 
+        If the user's stored password hash was made with outdated
+        hashing settings it's transparently replaced with a new hash
+        (using the current settings) upon successful authentication.
+
         Parameters
         ----------
         email : str
@@ -260,9 +807,26 @@ class UserRepositoryBase(
             otherwise).
 
         """
-        user = self.get_by_email(email)
+        user = await self.uow.run_sync(self.get_by_email, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password_async(
+            password,
+            user.hashed_password,
+        )
+        if not valid:
             return None
+        if new_hash is not None:
+            async with self.uow:
+                user = await self.uow.run_sync(self._rehash, user, new_hash)
         return user
+
+    def _rehash(self, obj: UserType, hashed_password: str) -> UserType:
+        """Replaces the user's password hash (for the same password, so
+        the user's authorization epoch is unchanged).
+        """
+        obj.hashed_password = hashed_password
+        obj = self._save(obj)
+        assert obj.uid is not None
+        self._invalidate(obj.uid)
+        return obj
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Collection version storage repository specifications.
+"""
+from abc import (
+    ABCMeta,
+    abstractmethod,
+)
+import typing as tp
+
+from app.crud.models.version import CollectionVersionType
+from app.crud.repos.base import (
+    Repository,
+    RepositoryBase,
+)
+from app.schema.version import (
+    CollectionVersionCreate,
+    CollectionVersionUpdate,
+)
+
+
+class CollectionVersionRepository(
+    Repository[CollectionVersionType], tp.Protocol[CollectionVersionType]
+):
+    """
+    Interface for CollectionVersionRepository objects.
+    """
+
+    def get_version(self, name: str) -> int:
+        ...
+
+    def get_versions(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        ...
+
+    def bump(self, name: str) -> int:
+        ...
+
+
+class CollectionVersionRepositoryBase(
+    RepositoryBase[
+        CollectionVersionType,
+        CollectionVersionCreate,
+        CollectionVersionUpdate,
+    ],
+    metaclass=ABCMeta,
+):
+    """
+    Collection version storage repository base class.
+
+    Collection versions are counters, shared by all workers through
+    storage, which are bumped (in the same transaction) whenever a
+    collection of objects changes.  Process-local caches of a collection
+    can so cheaply check whether they're still current.
+    """
+
+    def get_version(self, name: str) -> int:
+        """Gets the current version of the given collection.
+
+        Parameters
+        ----------
+        name : str
+            The name of the collection to get the version of.
+
+        Returns
+        -------
+        int
+            The collection's current version (``0`` if it's never been
+            changed).
+
+        """
+        return self.get_versions([name])[name]
+
+    @abstractmethod
+    def get_versions(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        """Gets the current versions of the given collections.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names of the collections to get the versions of.
+
+        Returns
+        -------
+        Dict[str, int]
+            The current version of each collection (``0`` for any which
+            have never been changed), by name.
+
+        """
+        pass
+
+    @abstractmethod
+    def bump(self, name: str) -> int:
+        """Increments the version of the given collection.
+
+        Parameters
+        ----------
+        name : str
+            The name of the (changed) collection to bump the version of.
+
+        Returns
+        -------
+        int
+            The new version of the collection.
+
+        """
+        pass
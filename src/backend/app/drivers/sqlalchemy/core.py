@@ -2,12 +2,15 @@
 """
 Core functionality for the SQLAlchemy storage driver.
 """
+import typing as tp
+
 from app.drivers.sqlalchemy import (
     models,
     repos,
 )
 from app.drivers.sqlalchemy.models.base import Base
 from app.drivers.sqlalchemy.crud import UnitOfWork
+from app.drivers.sqlalchemy.migrations import run_migrations
 from app.drivers.sqlalchemy.session import (
     engine,
     SessionLocal,
@@ -16,6 +19,8 @@ from app.drivers.sqlalchemy.session import (
 
 __all__ = [
     'create_uow',
+    'dispose_storage',
+    'migrate_storage',
     'models',
     'repos',
     'setup_storage',
@@ -46,17 +51,16 @@ def storage_ready() -> bool:
 def create_uow() -> UnitOfWork:
     """Creates a new SQLAlchemy-based :obj:`UnitOfWork` to use.
 
+    The unit-of-work's session holds a single connection (checked out on
+    first use) until the unit-of-work is closed.
+
     Returns
     -------
     UnitOfWork
         The (SQLAlchemy-based) unit-of-work object to use.
 
     """
-    try:
-        db_session = SessionLocal()
-        return UnitOfWork(db_session)
-    finally:
-        db_session.close()
+    return UnitOfWork(SessionLocal())
 
 
 def setup_storage() -> None:
@@ -64,6 +68,25 @@ def setup_storage() -> None:
     Base.metadata.create_all(bind=engine)
 
 
+def migrate_storage() -> tp.Dict[str, int]:
+    """Migrates existing storage to the current models and settings.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of changes made by each migration, by name.
+
+    """
+    with engine.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        return run_migrations(conn)
+
+
+async def dispose_storage() -> None:
+    """Closes all pooled storage connections."""
+    engine.dispose()
+
+
 def init_storage() -> None:
     """Initializes the storage system for use on each application start.
     """
@@ -6,7 +6,12 @@ from abc import ABCMeta
 import typing as tp
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+import sqlalchemy as sa
+from sqlalchemy.orm import (
+    make_transient_to_detached,
+    Session,
+)
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 
 from app.crud.base import UnitOfWorkBase
 from app.crud.repos.base import (
@@ -28,26 +33,62 @@ class SQLRepositoryMixin(object, metaclass=ABCMeta):
     __order_by__: tp.Optional[tp.Dict[str, tp.Callable]] = None
 
     if tp.TYPE_CHECKING:
-        model: tp.Type[Base]
+        model: tp.Type[tp.Any]
         uow: 'UnitOfWork'
 
-    @property
-    def count(self) -> int:
+    def _count_all(self) -> int:
         return self.uow.db.query(self.model).count()
 
     def _save(self, obj: ModelTypeSQL) -> ModelTypeSQL:
         self.uow.db.add(obj)
         self.uow.db.flush()
+        if 'version' in sa.inspect(obj).expired_attributes:
+            # - Read back the version incremented by the database
+            self.uow.db.refresh(obj, ['version'])
         return obj
 
+    def _bump_version(self, obj: tp.Any) -> None:
+        obj.version = self.model.version + 1
+
     def _load(self, uid: UUID) -> ModelTypeSQL:
         return self.uow.db.query(self.model) \
             .filter(self.model.uid == uid) \
             .first()
 
-    def _delete(self, obj: ModelTypeSQL) -> None:
+    def get_object_version(self, uid: UUID) -> tp.Optional[int]:
+        return self.uow.db.query(self.model.version) \
+            .filter(self.model.uid == uid) \
+            .scalar()
+
+    def _delete(self, obj: ModelTypeSQL) -> ModelTypeSQL:
         self.uow.db.delete(obj)
         self.uow.db.flush()
+        return obj
+
+    def _detach(self, obj: ModelTypeSQL) -> ModelTypeSQL:
+        db = self.uow.db
+        state = sa.inspect(obj)
+        for rel in state.mapper.relationships:
+            if rel.key in state.unloaded:
+                continue
+            value = state.dict.get(rel.key)
+            for item in (value if rel.uselist else [value]):
+                if item is not None and item in db:
+                    db.expunge(item)
+        if obj in db:
+            db.expunge(obj)
+        return obj
+
+    def _attach(self, obj: ModelTypeSQL) -> ModelTypeSQL:
+        return self.uow.db.merge(obj, load=False)
+
+    def _snapshot(self, obj: ModelTypeSQL) -> ModelTypeSQL:
+        mapper = sa.inspect(obj).mapper
+        ret = mapper.class_manager.new_instance()
+        for attr in mapper.column_attrs:
+            setattr(ret, attr.key, getattr(obj, attr.key))
+        make_transient_to_detached(ret)
+        return ret
 
     def get_multi(
         self,
@@ -65,6 +106,140 @@ class SQLRepositoryMixin(object, metaclass=ABCMeta):
             ret = ret.limit(limit)
         return ret.all()
 
+    def _get_page_order(self) -> tp.List[tp.Tuple[str, bool]]:
+        """Gets the attribute names (and whether they're descending) to
+        order pages by.
+        """
+        ret = [(k, v is sa.desc) for k, v in (self.__order_by__ or {}).items()]
+        if 'id' not in (self.__order_by__ or {}):
+            ret.append(('id', False))
+        return ret
+
+    def _get_page_after(
+        self,
+        key: tp.Optional[tp.List[tp.Any]],
+        *,
+        limit: tp.Optional[int] = None,
+    ) -> tp.List[ModelTypeSQL]:
+        order = self._get_page_order()
+        columns = [getattr(self.model, k) for k, _ in order]
+        ret = self.uow.db.query(self.model).order_by(*(
+            x.desc() if desc else x.asc()
+            for x, (_, desc) in zip(columns, order)
+        ))
+        if key is not None:
+            if len(key) != len(order):
+                raise ValueError(f"Invalid cursor key: {key}")
+            values = [
+                sa.literal(self._check_key_value(x, v), type_=x.type)
+                for x, v in zip(columns, key)
+            ]
+            descending = [desc for _, desc in order]
+            if all(descending) or not any(descending):
+                # - Row-value comparison, so the sort index can be used
+                lhs, rhs = sa.tuple_(*columns), sa.tuple_(*values)
+                ret = ret.filter(lhs < rhs if descending[0] else lhs > rhs)
+            else:
+                ret = ret.filter(sa.or_(*(
+                    sa.and_(
+                        *(columns[j] == values[j] for j in range(i)),
+                        columns[i] < values[i] if desc else
+                        columns[i] > values[i],
+                    )
+                    for i, desc in enumerate(descending)
+                )))
+        if limit is not None:
+            ret = ret.limit(limit)
+        return ret.all()
+
+    def _check_key_value(
+        self,
+        column: InstrumentedAttribute,
+        value: tp.Any,
+    ) -> tp.Any:
+        """Checks the given (decoded) cursor key `value` can be compared
+        with the `column`, returning it (coerced, if need be).
+        """
+        if value is None:
+            return value
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = None
+        if python_type is float and isinstance(value, int):
+            value = float(value)
+        if isinstance(value, bool) and python_type is not bool:
+            valid = False
+        elif python_type is not None:
+            valid = isinstance(value, python_type)
+        else:
+            valid = isinstance(value, (str, int, float))
+        if not valid:
+            raise ValueError(f"Invalid cursor key value: {value!r}")
+        return value
+
+    def _get_page_key(self, obj: ModelTypeSQL) -> tp.List[tp.Any]:
+        return [getattr(obj, k) for k, _ in self._get_page_order()]
+
+    def _get_column(self, name: str) -> InstrumentedAttribute:
+        """Gets the (column) attribute of the model with the given `name`.
+        """
+        if name not in sa.inspect(self.model).column_attrs:
+            raise ValueError(f"Unknown {self.model.__name__} field: {name}")
+        return getattr(self.model, name)
+
+    def _get_where(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+    ) -> tp.List[sa.sql.ColumnElement]:
+        """Compiles the given (checked) bulk operation `criteria` into
+        clauses.
+        """
+        ret = []
+        for k, v in criteria.items():
+            column = self._get_column(k)
+            if isinstance(v, (list, tuple, set, frozenset)):
+                ret.append(column.in_(list(v)))
+            elif v is None:
+                ret.append(column.is_(None))
+            else:
+                ret.append(column == v)
+        return ret
+
+    def _update_where(
+        self,
+        criteria: tp.Dict[str, tp.Any],
+        values: tp.Dict[str, tp.Any],
+        *,
+        increment: tp.Collection[str] = (),
+    ) -> int:
+        data = {}
+        changed = []
+        for k, v in values.items():
+            column = self._get_column(k)
+            data[column] = v
+            changed.append(
+                column.isnot(None) if v is None else
+                sa.or_(column.is_(None), column != v)
+            )
+        for k in increment:
+            column = self._get_column(k)
+            data[column] = column + 1
+
+        ret = self.uow.db.query(self.model) \
+            .filter(*self._get_where(criteria)) \
+            .filter(sa.or_(*changed)) \
+            .update(data, synchronize_session=False)
+        self.uow.db.flush()
+        return ret
+
+    def _delete_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        ret = self.uow.db.query(self.model) \
+            .filter(*self._get_where(criteria)) \
+            .delete(synchronize_session=False)
+        self.uow.db.flush()
+        return ret
+
 
 class Repository(
     SQLRepositoryMixin,
@@ -73,7 +248,8 @@ class Repository(
     """
     SQLAlchemy-based CRUD object storage repository.
     """
-    pass
+    if tp.TYPE_CHECKING:
+        uow: 'UnitOfWork'
 
 
 class UnitOfWork(UnitOfWorkBase[Base, Repository]):
@@ -90,8 +266,10 @@ class UnitOfWork(UnitOfWorkBase[Base, Repository]):
         return self.db.close()
 
     def commit(self) -> None:
-        super().commit()
-        return self.db.commit()
+        self._apply_versions()
+        self._apply_counters()
+        self.db.commit()
+        return super().commit()
 
     def rollback(self) -> None:
         super().rollback()
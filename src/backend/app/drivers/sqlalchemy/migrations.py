@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Storage migrations for the SQLAlchemy driver.
+
+Migrations bring an existing database in line with the current models
+and settings.  Each is idempotent (it only changes what's out of date),
+so they're all simply run, in order, on every migration.
+"""
+import typing as tp
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from app.crud.repos.role import (
+    ROLE_BITS_COLLECTION,
+    ROLE_MASK_BITS,
+    ROLES_COLLECTION,
+)
+from app.drivers.sqlalchemy.models import (
+    CollectionVersion,
+    Role,
+    User,
+)
+from app.drivers.sqlalchemy.models.base import Base
+from app.drivers.sqlalchemy.utils import GUID
+
+MigrationFunction = tp.Callable[[Connection], int]
+
+_BATCH_SIZE = 1000
+"""int: The most rows to select (and update) at once."""
+
+_MIGRATIONS: tp.List[tp.Tuple[str, MigrationFunction]] = []
+
+
+def migration(
+    name: str,
+) -> tp.Callable[[MigrationFunction], MigrationFunction]:
+    """Registers the decorated function as a (named) migration.
+
+    Parameters
+    ----------
+    name : str
+        The name of the migration.
+
+    Returns
+    -------
+    Callable
+        The decorator which registers the migration function (called
+        with the connection to migrate, returning the number of changes
+        made).
+
+    """
+    def _decorator(fn: MigrationFunction) -> MigrationFunction:
+        _MIGRATIONS.append((name, fn))
+        return fn
+
+    return _decorator
+
+
+def run_migrations(conn: Connection) -> tp.Dict[str, int]:
+    """Runs all of the registered migrations, in order.
+
+    Parameters
+    ----------
+    conn : Connection
+        The (transactional) connection to the database to migrate.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of changes made by each migration, by name.
+
+    """
+    return {name: fn(conn) for name, fn in _MIGRATIONS}
+
+
+def _get_existing_tables(conn: Connection) -> tp.List[sa.Table]:
+    """Gets the model tables which already exist in the database."""
+    inspector = sa.inspect(conn)
+    names: tp.Dict[tp.Optional[str], tp.Set[str]] = {}
+    ret = []
+    for table in Base.metadata.sorted_tables:
+        if table.schema not in names:
+            names[table.schema] = set(
+                inspector.get_table_names(schema=table.schema)
+            )
+        if table.name in names[table.schema]:
+            ret.append(table)
+    return ret
+
+
+@migration('add_missing_columns')
+def add_missing_columns(conn: Connection) -> int:
+    """Adds any columns missing from existing tables.
+
+    New ``NOT NULL`` columns are added with their (scalar) default as
+    the server default, so that existing rows get a value.
+    """
+    inspector = sa.inspect(conn)
+    dialect = conn.dialect
+    count = 0
+    for table in _get_existing_tables(conn):
+        existing = set(
+            x['name']
+            for x in inspector.get_columns(table.name, schema=table.schema)
+        )
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = str(CreateColumn(column).compile(dialect=dialect))
+            if (
+                not column.nullable
+                and column.server_default is None
+                and column.default is not None
+                and column.default.is_scalar
+            ):
+                default = sa.literal(column.default.arg).compile(
+                    dialect=dialect,
+                    compile_kwargs={'literal_binds': True},
+                )
+                ddl += f" DEFAULT {default}"
+            name = dialect.identifier_preparer.format_table(table)
+            conn.execute(sa.text(f"ALTER TABLE {name} ADD COLUMN {ddl}"))
+            for index in table.indexes:
+                if column in index.columns.values():
+                    index.create(bind=conn)
+            count += 1
+    return count
+
+
+@migration('association_keys')
+def key_association_tables(conn: Connection) -> int:
+    """Rebuilds any (existing) unkeyed association tables with their key.
+
+    The table is renamed out of the way, re-created (with its primary key
+    and indexes) and the distinct, complete pairs copied back, which
+    drops any duplicate memberships.
+    """
+    inspector = sa.inspect(conn)
+    preparer = conn.dialect.identifier_preparer
+    count = 0
+    for table in _get_existing_tables(conn):
+        if not (table.info or {}).get('association') or not table.primary_key:
+            continue
+        pk = inspector.get_pk_constraint(table.name, schema=table.schema)
+        if pk.get('constrained_columns'):
+            continue
+
+        old_name = f"_{table.name}_old"
+        old = sa.Table(old_name, sa.MetaData(), schema=table.schema)
+        t_name = preparer.format_table(table)
+        o_name = preparer.format_table(old)
+        conn.execute(
+            sa.text(
+                f"ALTER TABLE {t_name} RENAME TO {preparer.quote(old_name)}"
+            )
+        )
+        table.create(bind=conn)
+
+        columns = ", ".join(preparer.format_column(x) for x in table.columns)
+        complete = " AND ".join(
+            f"{preparer.format_column(x)} IS NOT NULL"
+            for x in table.primary_key.columns
+        )
+        conn.execute(
+            sa.text(
+                f"INSERT INTO {t_name} ({columns}) "
+                f"SELECT DISTINCT {columns} FROM {o_name} WHERE {complete}"
+            )
+        )
+        conn.execute(sa.text(f"DROP TABLE {o_name}"))
+        count += 1
+    return count
+
+
+@migration('add_missing_indexes')
+def add_missing_indexes(conn: Connection) -> int:
+    """Creates any (named) indexes missing from existing tables."""
+    inspector = sa.inspect(conn)
+    count = 0
+    for table in _get_existing_tables(conn):
+        existing = set(
+            x['name']
+            for x in inspector.get_indexes(table.name, schema=table.schema)
+        )
+        for index in table.indexes:
+            if index.name is None or index.name in existing:
+                continue
+            index.create(bind=conn)
+            count += 1
+    return count
+
+
+@migration('uuid_storage')
+def convert_uuid_storage(conn: Connection) -> int:
+    """Converts stored UUIDs to the configured storage format.
+
+    Values stored as hex strings are converted to bytes (or vice-versa)
+    to match each :obj:`GUID` column's current storage format, a batch
+    at a time (only values not yet converted are selected).  On SQLite
+    the values are converted in place, other databases (bar PostgreSQL,
+    which stores UUIDs natively) need the column type altering first.
+    """
+    dialect = conn.dialect
+    preparer = dialect.identifier_preparer
+    count = 0
+    for table in _get_existing_tables(conn):
+        pk = table.primary_key.columns.values()
+        if len(pk) != 1:
+            continue
+        for column in table.columns:
+            if not isinstance(column.type, GUID):
+                continue
+            storage = column.type.get_storage(dialect)
+            if storage == 'native':
+                continue
+
+            t_name = preparer.format_table(table)
+            c_name = preparer.format_column(column)
+            pk_name = preparer.format_column(pk[0])
+            # - Only the (as yet) unconverted values are selected
+            if dialect.name == 'sqlite':
+                stored = 'text' if storage == 'binary' else 'blob'
+                unconverted = f"typeof({c_name}) = '{stored}'"
+            elif storage == 'binary':
+                unconverted = f"LENGTH({c_name}) <> 16"
+            else:
+                unconverted = f"LENGTH({c_name}) = 16"
+            select = sa.text(
+                f"SELECT {pk_name}, {c_name} FROM {t_name} "
+                f"WHERE {unconverted} AND {pk_name} > :after "
+                f"ORDER BY {pk_name} LIMIT {_BATCH_SIZE}"
+            )
+            update = sa.text(
+                f"UPDATE {t_name} SET {c_name} = :v WHERE {pk_name} = :k"
+            )
+
+            after: tp.Any = 0
+            while True:
+                rows = conn.execute(select, {'after': after}).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for key, value in rows:
+                    if storage == 'binary' and isinstance(value, str):
+                        value = uuid.UUID(value).bytes
+                    elif storage == 'char' and isinstance(
+                        value,
+                        (bytes, memoryview),
+                    ):
+                        value = uuid.UUID(bytes=bytes(value)).hex
+                    else:
+                        continue
+                    updates.append({'k': key, 'v': value})
+                if updates:
+                    conn.execute(update, updates)
+                    count += len(updates)
+                after = rows[-1][0]
+    return count
+
+
+def _set_version(conn: Connection, name: str, version: int) -> None:
+    """Sets the collection version with the given `name`."""
+    tbl = CollectionVersion.__table__
+    result = conn.execute(
+        tbl.update().where(tbl.c.name == name).values(version=version)
+    )
+    if not result.rowcount:
+        conn.execute(tbl.insert().values(name=name, version=version))
+
+
+@migration('role_masks')
+def assign_role_masks(conn: Connection) -> int:
+    """Assigns bits to any roles without one (while bits are left) and
+    brings each user's role mask in line with their roles.
+    """
+    roles = Role.__table__
+    users = User.__table__
+    versions = CollectionVersion.__table__
+    existing = set(_get_existing_tables(conn))
+    if not {roles, users, versions} <= existing:
+        return 0
+
+    count = 0
+    rows = conn.execute(
+        sa.select([roles.c.id, roles.c.bit]).order_by(roles.c.id)
+    ).fetchall()
+    counter = conn.execute(
+        sa.select([versions.c.version])
+        .where(versions.c.name == ROLE_BITS_COLLECTION)
+    ).scalar()
+    next_bit = max(
+        [counter or 0] + [x + 1 for _, x in rows if x is not None]
+    )
+
+    bits = {}
+    for role_id, bit in rows:
+        if bit is None and next_bit < ROLE_MASK_BITS:
+            bit, next_bit = next_bit, next_bit + 1
+            conn.execute(
+                roles.update().where(roles.c.id == role_id).values(bit=bit)
+            )
+            count += 1
+        if bit is not None:
+            bits[role_id] = bit
+    if next_bit != (counter or 0):
+        _set_version(conn, ROLE_BITS_COLLECTION, next_bit)
+    if count:
+        version = conn.execute(
+            sa.select([versions.c.version])
+            .where(versions.c.name == ROLES_COLLECTION)
+        ).scalar()
+        _set_version(conn, ROLES_COLLECTION, (version or 0) + 1)
+
+    masks: tp.Dict[int, int] = {}
+    assoc = User.roles.property.secondary
+    for user_id, role_id in conn.execute(
+        sa.select([assoc.c.left_id, assoc.c.right_id])
+    ):
+        if role_id in bits:
+            masks[user_id] = masks.get(user_id, 0) | (1 << bits[role_id])
+
+    updates = [
+        {'k': user_id, 'v': masks.get(user_id, 0)}
+        for user_id, mask in conn.execute(
+            sa.select([users.c.id, users.c.role_mask])
+        )
+        if mask != masks.get(user_id, 0)
+    ]
+    if updates:
+        conn.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam('k'))
+            .values(role_mask=sa.bindparam('v')),
+            updates,
+        )
+        count += len(updates)
+    return count
@@ -3,12 +3,22 @@
 Object storage models for SQLAlchemy driver.
 """
 from app.drivers.sqlalchemy.models.base import Base  # noqa: F401
+from app.drivers.sqlalchemy.models.counter import Counter
 from app.drivers.sqlalchemy.models.name import Name
 from app.drivers.sqlalchemy.models.role import Role
+from app.drivers.sqlalchemy.models.token import (
+    RefreshToken,
+    RevokedToken,
+)
 from app.drivers.sqlalchemy.models.user import User
+from app.drivers.sqlalchemy.models.version import CollectionVersion
 
 __all__ = [
+    'CollectionVersion',
+    'Counter',
     'Name',
+    'RefreshToken',
+    'RevokedToken',
     'Role',
     'User',
 ]
@@ -3,7 +3,6 @@
 SQLAlchemy (declarative) base Model class to use.
 """
 import typing as tp
-from uuid import uuid4
 
 import sqlalchemy as sa
 from sqlalchemy.types import TypeEngine
@@ -18,6 +17,7 @@ from app.utils.strutils import (
     camel_to_snake,
     snake_to_camel,
 )
+from app.utils.uuidutils import new_uid
 
 
 
@@ -33,7 +33,7 @@ class Base(ModelBase):
     __name__: str
 
     id = sa.Column('id', sa.Integer, primary_key=True)
-    uid = sa.Column(GUID, unique=True, index=True, default=uuid4)
+    uid = sa.Column(GUID, unique=True, index=True, default=new_uid)
 
     @declared_attr
     def __tablename__(cls) -> str:
@@ -54,6 +54,7 @@ def get_association_table(
     right_column: str = 'id',
     left_type: tp.Type[TypeEngine] = sa.Integer,
     right_type: tp.Type[TypeEngine] = sa.Integer,
+    keyed: bool = True,
 ) -> sa.Table:
     """Gets the association table for many-to-many relationships.
 
@@ -84,6 +85,11 @@ def get_association_table(
     right_type : sa.TypeEngine, optional
         The SQLAlchemy data type of the `right_column` (default is
         :obj:`sa.Integer`).
+    keyed : bool, optional
+        Whether or not to key the table on (``left_id``, ``right_id``)
+        and index it the other way around, for lookups from either side
+        (default is ``True``).  Disabling this allows duplicate pairs
+        and makes every lookup a full table scan.
 
     Returns
     -------
@@ -106,20 +112,26 @@ def get_association_table(
     if key in _ASSOCIATION_TABLES:
         return _ASSOCIATION_TABLES[key]
 
+    t_name = name or f"asc_{left}_to_{right}"
     a_tbl = sa.Table(
-        name or f"asc_{left}_to_{right}",
+        t_name,
         Base.metadata,
         sa.Column(
             'left_id',
             left_type,
             sa.ForeignKey(f"{left}.{left_column}"),
+            primary_key=keyed,
         ),
         sa.Column(
             'right_id',
             right_type,
             sa.ForeignKey(f"{right}.{right_column}"),
+            primary_key=keyed,
         ),
+        info={'association': True},
     )
+    if keyed:
+        sa.Index(f"ix_{t_name}_right_id", a_tbl.c.right_id, a_tbl.c.left_id)
 
     _ASSOCIATION_TABLES[key] = a_tbl
 
@@ -191,10 +203,14 @@ def get_association_object(
     if key in _ASSOCIATION_OBJECTS:
         return _ASSOCIATION_OBJECTS[key]
 
+    t_name = name or f"asc_{left}_to_{right}"
     a_tbl: tp.Type[Base] = type(
-        snake_to_camel(name or f"asc_{left}_to_{right}"),
+        snake_to_camel(t_name),
         (Base,),
         {
+            '__table_args__': (
+                sa.Index(f"ix_{t_name}_right_id", 'right_id', 'left_id'),
+            ),
             'left_id': sa.Column(
                 left_type,
                 sa.ForeignKey(f"{left}.{left_column}"),
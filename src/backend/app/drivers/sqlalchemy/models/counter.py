@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Counter storage schema for SQLAlchemy.
+"""
+import sqlalchemy as sa
+
+from app.crud.models.counter import CounterBase
+from app.drivers.sqlalchemy.models.base import Base
+
+
+class Counter(CounterBase, Base):
+    """
+    Storage table for Counter objects in SQLAlchemy.
+    """
+    name = sa.Column(sa.String, unique=True, index=True, nullable=False)
+    value = sa.Column(sa.BigInteger, default=0, nullable=False)
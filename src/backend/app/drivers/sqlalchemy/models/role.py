@@ -16,3 +16,5 @@ class Role(RoleBase, Base):
     """
     name = sa.Column(sa.String, unique=True, index=True)
     description = sa.Column(sa.Text, nullable=True)
+    bit = sa.Column(sa.Integer, unique=True, nullable=True)
+    version = sa.Column(sa.Integer, default=1, nullable=False)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Token storage schema for SQLAlchemy.
+"""
+from datetime import datetime
+import typing as tp
+
+import sqlalchemy as sa
+from sqlalchemy.orm import relationship
+
+from app.crud.models.token import (
+    RefreshTokenBase,
+    RevokedTokenBase,
+)
+from app.drivers.sqlalchemy.models.base import Base
+
+if tp.TYPE_CHECKING:
+    from app.drivers.sqlalchemy.models.user import User  # noqa: F401
+
+
+class RefreshToken(RefreshTokenBase, Base):
+    """
+    Storage table for RefreshToken objects in SQLAlchemy.
+    """
+    jti = sa.Column(sa.String, unique=True, index=True, nullable=False)
+    family = sa.Column(sa.String, index=True, nullable=False)
+
+    user_id = sa.Column(
+        sa.Integer,
+        sa.ForeignKey('users.id', ondelete='CASCADE'),
+        index=True,
+        nullable=False,
+    )
+    user = relationship("User")
+
+    expires = sa.Column(sa.DateTime, index=True, nullable=False)
+    created = sa.Column(sa.DateTime, nullable=False, default=datetime.utcnow)
+    used = sa.Column(sa.Boolean, default=False, nullable=False)
+    revoked = sa.Column(sa.Boolean, default=False, nullable=False)
+
+
+class RevokedToken(RevokedTokenBase, Base):
+    """
+    Storage table for RevokedToken objects in SQLAlchemy.
+    """
+    jti = sa.Column(sa.String, unique=True, index=True, nullable=False)
+    expires = sa.Column(sa.DateTime, index=True, nullable=False)
+    created = sa.Column(
+        sa.DateTime,
+        index=True,
+        nullable=False,
+        default=datetime.utcnow,
+    )
@@ -25,9 +25,17 @@ class User(UserBase, Base):
     hashed_password = sa.Column(sa.String, nullable=False)
 
     name_id = sa.Column(sa.Integer, sa.ForeignKey('names.id'))
-    name = relationship("Name")
+    name = relationship("Name", lazy='joined')
 
     is_active = sa.Column(sa.Boolean, default=True, nullable=False)
     is_superuser = sa.Column(sa.Boolean, default=False, nullable=False)
     is_admin = sa.Column(sa.Boolean, default=False, nullable=False)
-    roles = relationship("Role", secondary=association_table, lazy=False)
+    roles = relationship(
+        "Role",
+        secondary=association_table,
+        lazy="selectin",
+    )
+
+    auth_epoch = sa.Column(sa.Integer, default=0, nullable=False)
+    role_mask = sa.Column(sa.BigInteger, default=0, nullable=False)
+    version = sa.Column(sa.Integer, default=1, nullable=False)
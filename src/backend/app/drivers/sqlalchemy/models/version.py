@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Collection version storage schema for SQLAlchemy.
+"""
+import sqlalchemy as sa
+
+from app.crud.models.version import CollectionVersionBase
+from app.drivers.sqlalchemy.models.base import Base
+
+
+class CollectionVersion(CollectionVersionBase, Base):
+    """
+    Storage table for CollectionVersion objects in SQLAlchemy.
+    """
+    name = sa.Column(sa.String, unique=True, index=True, nullable=False)
+    version = sa.Column(sa.Integer, default=0, nullable=False)
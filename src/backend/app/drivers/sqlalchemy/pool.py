@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Connection pool configuration and telemetry for the SQLAlchemy driver.
+"""
+import bisect
+import logging
+import threading
+import time
+import typing as tp
+
+from sqlalchemy import (
+    event,
+    exc,
+)
+from sqlalchemy.engine import (
+    Connection,
+    Engine,
+)
+from sqlalchemy.pool import (
+    NullPool,
+    Pool,
+    QueuePool,
+    StaticPool,
+)
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_CLASSES: tp.Dict[str, tp.Type[Pool]] = {
+    'null': NullPool,
+    'queue': QueuePool,
+    'static': StaticPool,
+}
+"""Dict[str, Type[Pool]]: The pool classes available, by setting name."""
+
+WAIT_BUCKETS_MS: tp.Tuple[float, ...] = (
+    1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+"""Tuple[float, ...]: Upper bounds (ms) of the checkout wait buckets."""
+
+_monitors: tp.Dict[Engine, 'PoolMonitor'] = {}
+
+
+def get_pool_options(
+    dialect: str,
+    *,
+    is_async: bool = False,
+) -> tp.Dict[str, tp.Any]:
+    """Gets the engine pool options to use from the ``DB_POOL_*``
+    settings.
+
+    Parameters
+    ----------
+    dialect : str
+        The dialect of the engine the options are for (e.g. 'sqlite').
+    is_async : bool, optional
+        Whether or not the options are for an asyncio engine (default
+        is ``False``).
+
+    Returns
+    -------
+    Dict[str, Any]
+        The keyword arguments to pass to ``create_engine``.
+
+    Raises
+    ------
+    ValueError
+        If the ``DB_POOL_CLASS`` setting isn't a known pool class.
+
+    """
+    ret: tp.Dict[str, tp.Any] = {
+        'pool_pre_ping': (
+            settings.DB_POOL_PRE_PING
+            and settings.DB_POOL_LIVENESS_SECONDS is None
+        ),
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+    }
+
+    pool_name = settings.DB_POOL_CLASS
+    if pool_name is None:
+        # - Leave SQLite to SQLAlchemy's (file/memory specific) defaults
+        if dialect == 'sqlite':
+            return ret
+        pool_name = 'queue'
+    elif pool_name not in POOL_CLASSES:
+        raise ValueError(f"Unknown DB_POOL_CLASS: {pool_name}")
+
+    pool_cls = POOL_CLASSES[pool_name]
+    if pool_cls is QueuePool:
+        if is_async:
+            # - SQLAlchemy 1.4+ only (see the sqlalchemy_async driver)
+            from sqlalchemy.pool import (  # type: ignore
+                AsyncAdaptedQueuePool,
+            )
+            pool_cls = AsyncAdaptedQueuePool
+        ret.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    ret['poolclass'] = pool_cls
+    return ret
+
+
+def get_pool_monitor(engine: Engine) -> tp.Optional['PoolMonitor']:
+    """Gets the :obj:`PoolMonitor` for the given `engine` (if any)."""
+    return _monitors.get(engine)
+
+
+def connect(engine: Engine) -> Connection:
+    """Checks out a new connection from the given `engine`.
+
+    Checkouts are timed (for the engine's pool telemetry) if the engine
+    has a :obj:`PoolMonitor`.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine to get a connection from.
+
+    Returns
+    -------
+    Connection
+        The new connection.
+
+    """
+    monitor = _monitors.get(engine)
+    if monitor is None:
+        return engine.connect()
+    return monitor.connect()
+
+
+class PoolMonitor:
+    """
+    Telemetry (and liveness checks) for an engine's connection pool.
+
+    Tracks connections made, checkouts, checkins and invalidations, and a
+    histogram of the time spent waiting to check out a connection (which
+    includes waiting on a saturated pool).  Slow checkouts (over
+    ``DB_POOL_SLOW_CHECKOUT_MS``) are logged as warnings, and the stats
+    are logged every ``DB_POOL_LOG_SECONDS`` (if set).
+
+    If ``DB_POOL_LIVENESS_SECONDS`` is set, connections are only pinged
+    on checkout if they haven't been verified for that long (instead of
+    on every checkout, as with ``pool_pre_ping``).
+
+    Parameters
+    ----------
+    engine : Engine
+        The (synchronous) engine to monitor the pool of.
+
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.liveness = settings.DB_POOL_LIVENESS_SECONDS
+        self.slow_ms = settings.DB_POOL_SLOW_CHECKOUT_MS
+        self.log_seconds = settings.DB_POOL_LOG_SECONDS
+
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._logged_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        event.listen(engine, 'soft_invalidate', self._on_invalidate)
+        _monitors[engine] = self
+
+    def connect(self) -> Connection:
+        """Checks out a (timed) connection from the monitored engine."""
+        start = time.perf_counter()
+        conn = self.engine.connect()
+        self.record_wait((time.perf_counter() - start) * 1000.0)
+        return conn
+
+    def record_wait(self, wait_ms: float) -> None:
+        """Records the time taken to check out a connection.
+
+        Parameters
+        ----------
+        wait_ms : float
+            The time (in milliseconds) taken to check out a connection.
+
+        """
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            idx = bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)
+            self._wait_buckets[idx] += 1
+
+        if self.slow_ms is not None and wait_ms >= self.slow_ms:
+            logger.warning(
+                "Slow DB connection checkout (%.1f ms): %s",
+                wait_ms,
+                self.pool_status(),
+            )
+
+        now = time.monotonic()
+        if (
+            self.log_seconds is not None
+            and now - self._logged_at >= self.log_seconds
+        ):
+            self._logged_at = now
+            logger.info("DB pool stats: %s", self.stats())
+
+    def pool_status(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current status of the monitored pool.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The pool's class name and (where supported by the pool
+            class) its size, checked in/out and overflow counts.
+
+        """
+        pool = self.engine.pool
+        ret: tp.Dict[str, tp.Any] = {'class': type(pool).__name__}
+        for attr in ('size', 'checkedin', 'checkedout', 'overflow'):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                ret[attr] = fn()
+        return ret
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current statistics for the monitored pool.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The pool's status (see :meth:`pool_status`), event counts
+            and checkout wait histogram (counts of checkouts taking at
+            most each bucket's time, in milliseconds).
+
+        """
+        with self._lock:
+            buckets = {
+                f"le_{x:g}ms": n
+                for x, n in zip(WAIT_BUCKETS_MS, self._wait_buckets)
+            }
+            buckets['inf'] = self._wait_buckets[-1]
+            wait = {
+                'count': self.wait_count,
+                'mean_ms': self.wait_total_ms / max(self.wait_count, 1),
+                'max_ms': self.wait_max_ms,
+                'buckets': buckets,
+            }
+        return {
+            'pool': self.pool_status(),
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'invalidations': self.invalidations,
+            'pings': self.pings,
+            'checkout_wait': wait,
+        }
+
+    def _on_connect(self, dbapi_conn: tp.Any, rec: tp.Any) -> None:
+        self.connects += 1
+        rec.info['verified_at'] = time.monotonic()
+
+    def _on_checkout(
+        self,
+        dbapi_conn: tp.Any,
+        rec: tp.Any,
+        proxy: tp.Any,
+    ) -> None:
+        self.checkouts += 1
+        metrics.incr('db_checkouts')
+        if self.liveness is None:
+            return
+
+        now = time.monotonic()
+        if now - rec.info.get('verified_at', 0.0) < self.liveness:
+            return
+        self.pings += 1
+        try:
+            cursor = dbapi_conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception as ex:
+            # - The pool invalidates the connection and retries
+            raise exc.DisconnectionError() from ex
+        rec.info['verified_at'] = now
+
+    def _on_checkin(self, dbapi_conn: tp.Any, rec: tp.Any) -> None:
+        self.checkins += 1
+
+    def _on_invalidate(
+        self,
+        dbapi_conn: tp.Any,
+        rec: tp.Any,
+        exception: tp.Any,
+    ) -> None:
+        self.invalidations += 1
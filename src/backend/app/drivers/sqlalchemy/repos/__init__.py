@@ -3,13 +3,23 @@
 CRUD-storage repositories for SQLAlchemy driver.
 """
 from app.drivers.sqlalchemy.crud import Repository
+from app.drivers.sqlalchemy.repos.counter import CounterRepository
 from app.drivers.sqlalchemy.repos.name import NameRepository
 from app.drivers.sqlalchemy.repos.role import RoleRepository
+from app.drivers.sqlalchemy.repos.token import (
+    RefreshTokenRepository,
+    RevokedTokenRepository,
+)
 from app.drivers.sqlalchemy.repos.user import UserRepository
+from app.drivers.sqlalchemy.repos.version import CollectionVersionRepository
 
 __all__ = [
+    'CollectionVersionRepository',
+    'CounterRepository',
     'NameRepository',
+    'RefreshTokenRepository',
     'Repository',
+    'RevokedTokenRepository',
     'RoleRepository',
     'UserRepository',
 ]
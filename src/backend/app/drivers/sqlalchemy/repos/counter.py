@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Counter CRUD-based storage repository for SQLAlchemy driver.
+"""
+import typing as tp
+
+import sqlalchemy as sa
+
+from app.crud.repos.counter import CounterRepositoryBase
+from app.drivers.sqlalchemy.crud import (
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
+from app.drivers.sqlalchemy.models.counter import Counter
+
+
+class CounterRepository(
+    SQLRepositoryMixin,
+    CounterRepositoryBase[Counter],
+):
+    """
+    SQLAlchemy-based CRUD storage repository for Counter objects.
+    """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
+    __order_by__ = {
+        'name': sa.asc,
+    }
+
+    def get_values(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        qry = self.uow.db.query(self.model.name, self.model.value) \
+            .filter(self.model.name.in_(list(names)))
+        return dict(qry)
+
+    def add(self, name: str, delta: int) -> bool:
+        updated = self.uow.db.query(self.model) \
+            .filter(self.model.name == name) \
+            .update(
+                {'value': self.model.value + delta},
+                synchronize_session=False,
+            )
+        return bool(updated)
+
+    def set_value(self, name: str, value: int) -> None:
+        updated = self.uow.db.query(self.model) \
+            .filter(self.model.name == name) \
+            .update({'value': value}, synchronize_session=False)
+        if not updated:
+            self._save(self._make(name=name, value=value))
+
+    def discard(self, names: tp.Iterable[str]) -> int:
+        ret = self.uow.db.query(self.model) \
+            .filter(self.model.name.in_(list(names))) \
+            .delete(synchronize_session=False)
+        self.uow.db.flush()
+        return ret
@@ -7,7 +7,10 @@ import typing as tp
 from sqlalchemy import asc
 
 from app.crud.repos.name import NameRepositoryBase
-from app.drivers.sqlalchemy.crud import SQLRepositoryMixin
+from app.drivers.sqlalchemy.crud import (
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
 from app.drivers.sqlalchemy.models.name import Name
 
 
@@ -15,6 +18,9 @@ class NameRepository(SQLRepositoryMixin, NameRepositoryBase[Name]):
     """
     SQLAlchemy-based CRUD storage repository for User objects.
     """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
     __order_by__ = {
         'last': asc,
         'first': asc,
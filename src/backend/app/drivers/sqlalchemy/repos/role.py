@@ -4,22 +4,52 @@ Role CRUD-based storage repository for SQLAlchemy driver.
 """
 import typing as tp
 
-from sqlalchemy import asc
+import sqlalchemy as sa
 
 from app.crud.repos.role import RoleRepositoryBase
-from app.drivers.sqlalchemy.crud import SQLRepositoryMixin
+from app.drivers.sqlalchemy.crud import (
+    ModelTypeSQL,
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
 from app.drivers.sqlalchemy.models.role import Role
+from app.drivers.sqlalchemy.models.user import association_table
 
 
 class RoleRepository(SQLRepositoryMixin, RoleRepositoryBase[Role]):
     """
     SQLAlchemy-based CRUD storage repository for Role objects.
     """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
     __order_by__ = {
-        'name': asc,
+        'name': sa.asc,
     }
 
-    def get_by_name(self, name: str) -> tp.Optional[Role]:
+    def _load_by_name(self, name: str) -> tp.Optional[Role]:
         return self.uow.db.query(self.model) \
             .filter(self.model.name == name.lower()) \
             .first()
+
+    def _load_by_names(self, names: tp.Collection[str]) -> tp.List[Role]:
+        return self.uow.db.query(self.model) \
+            .filter(self.model.name.in_([x.lower() for x in names])) \
+            .all()
+
+    def _delete(self, obj: ModelTypeSQL) -> ModelTypeSQL:
+        self.uow.db.execute(
+            association_table.delete()
+            .where(association_table.c.right_id == obj.id)
+        )
+        return super()._delete(obj)
+
+    def _delete_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        role_ids = sa.select([self.model.id]).where(
+            sa.and_(*self._get_where(criteria))
+        )
+        self.uow.db.execute(
+            association_table.delete()
+            .where(association_table.c.right_id.in_(role_ids))
+        )
+        return super()._delete_where(criteria)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Token CRUD-based storage repositories for SQLAlchemy driver.
+"""
+from datetime import datetime
+import typing as tp
+
+import sqlalchemy as sa
+
+from app.crud.models.user import UserType
+from app.crud.repos.token import (
+    RefreshTokenRepositoryBase,
+    RevokedTokenRepositoryBase,
+)
+from app.drivers.sqlalchemy.crud import (
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
+from app.drivers.sqlalchemy.models.token import (
+    RefreshToken,
+    RevokedToken,
+)
+
+
+class RefreshTokenRepository(
+    SQLRepositoryMixin,
+    RefreshTokenRepositoryBase[RefreshToken],
+):
+    """
+    SQLAlchemy-based CRUD storage repository for RefreshToken objects.
+    """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
+    __order_by__ = {
+        'created': sa.desc,
+    }
+
+    def get_by_jti(self, jti: str) -> tp.Optional[RefreshToken]:
+        return self.uow.db.query(self.model) \
+            .filter(self.model.jti == jti) \
+            .first()
+
+    def mark_used(self, obj: RefreshToken) -> bool:
+        ret = self.uow.db.query(self.model) \
+            .filter(self.model.id == obj.id) \
+            .filter(self.model.used == sa.false()) \
+            .update({'used': True}, synchronize_session='fetch')
+        return ret == 1
+
+    def revoke_family(self, family: str) -> int:
+        return self.uow.db.query(self.model) \
+            .filter(self.model.family == family) \
+            .update({'revoked': True}, synchronize_session='fetch')
+
+    def revoke_user(self, user: UserType) -> int:
+        return self.uow.db.query(self.model) \
+            .filter(self.model.user == user) \
+            .filter(self.model.revoked == sa.false()) \
+            .update({'revoked': True}, synchronize_session='fetch')
+
+    def remove_expired(self, before: datetime) -> int:
+        ret = self.uow.db.query(self.model) \
+            .filter(self.model.expires <= before) \
+            .delete(synchronize_session=False)
+        self.uow.db.flush()
+        return ret
+
+
+class RevokedTokenRepository(
+    SQLRepositoryMixin,
+    RevokedTokenRepositoryBase[RevokedToken],
+):
+    """
+    SQLAlchemy-based CRUD storage repository for RevokedToken objects.
+    """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
+    __order_by__ = {
+        'created': sa.desc,
+    }
+
+    def get_by_jti(self, jti: str) -> tp.Optional[RevokedToken]:
+        return self.uow.db.query(self.model) \
+            .filter(self.model.jti == jti) \
+            .first()
+
+    def get_jtis(
+        self,
+        since: tp.Optional[datetime] = None,
+    ) -> tp.List[str]:
+        ret = self.uow.db.query(self.model.jti) \
+            .filter(self.model.expires > datetime.utcnow())
+        if since is not None:
+            ret = ret.filter(self.model.created >= since)
+        return [x for (x,) in ret]
+
+    def remove_expired(self, before: datetime) -> int:
+        ret = self.uow.db.query(self.model) \
+            .filter(self.model.expires <= before) \
+            .delete(synchronize_session=False)
+        self.uow.db.flush()
+        return ret
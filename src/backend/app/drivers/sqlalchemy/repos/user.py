@@ -3,18 +3,32 @@
 User CRUD-based storage repository for SQLAlchemy driver.
 """
 import typing as tp
+from uuid import UUID
 
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
+from app.core.config import settings
 from app.crud.repos.user import UserRepositoryBase
-from app.drivers.sqlalchemy.crud import SQLRepositoryMixin
+from app.drivers.sqlalchemy.crud import (
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
+from app.drivers.sqlalchemy.models.role import Role
 from app.drivers.sqlalchemy.models.user import User
+from app.utils.uuidutils import new_uid
+
+_IN_BATCH_SIZE = 500
+"""int: The most values to bind in a single ``IN`` list."""
 
 
 class UserRepository(SQLRepositoryMixin, UserRepositoryBase[User]):
     """
     SQLAlchemy-based CRUD storage repository for User objects.
     """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
     __order_by__ = {
         'email': sa.asc,
     }
@@ -24,6 +38,136 @@ class UserRepository(SQLRepositoryMixin, UserRepositoryBase[User]):
             .filter(self.model.email == email) \
             .first()
 
+    def get_existing_emails(self, emails: tp.Iterable[str]) -> tp.Set[str]:
+        emails = list(emails)
+        ret: tp.Set[str] = set()
+        for i in range(0, len(emails), _IN_BATCH_SIZE):
+            qry = self.uow.db.query(self.model.email) \
+                .filter(self.model.email.in_(emails[i:i + _IN_BATCH_SIZE]))
+            ret.update(x for x, in qry)
+        return ret
+
+    def _get_ids(
+        self,
+        table: sa.Table,
+        uids: tp.List[UUID],
+    ) -> tp.Dict[UUID, int]:
+        """Helper to get the (row) IDs for the given `uids` in `table`."""
+        ret: tp.Dict[UUID, int] = {}
+        for i in range(0, len(uids), _IN_BATCH_SIZE):
+            qry = sa.select([table.c.uid, table.c.id]) \
+                .where(table.c.uid.in_(uids[i:i + _IN_BATCH_SIZE]))
+            ret.update(self.uow.db.execute(qry).fetchall())
+        return ret
+
+    def _insert_many(
+        self,
+        rows: tp.List[tp.Dict[str, tp.Any]],
+    ) -> tp.List[tp.Optional[UUID]]:
+        db = self.uow.db
+        db.flush()
+        users = self.model.__table__
+        names = self.model.name.property.mapper.local_table
+        assoc = self.model.roles.property.secondary
+
+        name_rows = {
+            i: {**row['name'], 'uid': new_uid()}
+            for i, row in enumerate(rows) if row.get('name')
+        }
+        name_ids: tp.Dict[UUID, int] = {}
+        if name_rows:
+            db.execute(names.insert(), list(name_rows.values()))
+            name_ids = self._get_ids(
+                names,
+                [x['uid'] for x in name_rows.values()],
+            )
+
+        user_rows = []
+        for i, row in enumerate(rows):
+            name_row = name_rows.get(i)
+            user_rows.append({
+                'uid': new_uid(),
+                'email': row['email'],
+                'hashed_password': row['hashed_password'],
+                'is_active': row['is_active'],
+                'is_superuser': row['is_superuser'],
+                'is_admin': row['is_admin'],
+                'role_mask': row['role_mask'],
+                'name_id': name_ids[name_row['uid']] if name_row else None,
+            })
+        db.execute(self._insert_users(db.get_bind().dialect), user_rows)
+        uids = [x['uid'] for x in user_rows]
+
+        # - Users skipped as their email was taken (since it was checked)
+        #   aren't found, and their names are removed again
+        user_ids = self._get_ids(users, uids)
+        skipped = [
+            name_ids[name_rows[i]['uid']]
+            for i, uid in enumerate(uids)
+            if uid not in user_ids and i in name_rows
+        ]
+        for i in range(0, len(skipped), _IN_BATCH_SIZE):
+            db.execute(names.delete().where(
+                names.c.id.in_(skipped[i:i + _IN_BATCH_SIZE])
+            ))
+
+        assoc_rows = [
+            {'left_id': user_ids[uid], 'right_id': role.id}
+            for uid, row in zip(uids, rows) if uid in user_ids
+            for role in row['roles']
+        ]
+        if assoc_rows:
+            db.execute(assoc.insert(), assoc_rows)
+        return [x if x in user_ids else None for x in uids]
+
+    def _insert_users(self, dialect: tp.Any) -> sa.sql.Insert:
+        """Helper to get the statement inserting users, skipping any
+        whose email is already in use (where the `dialect` supports it).
+        """
+        users = self.model.__table__
+        if dialect.name == 'postgresql':
+            return postgresql.insert(users) \
+                .on_conflict_do_nothing(index_elements=[users.c.email])
+        return users.insert().prefix_with('OR IGNORE', dialect='sqlite')
+
+    def _revoke_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        tokens = self.uow.refresh_token.model
+        user_ids = sa.select([self.model.id]).where(
+            sa.and_(*self._get_where(criteria))
+        )
+        return self.uow.db.query(tokens) \
+            .filter(tokens.user_id.in_(user_ids)) \
+            .filter(tokens.revoked == sa.false()) \
+            .update({'revoked': True}, synchronize_session=False)
+
+    def _bump_role_epochs(self, role_uids: tp.List[UUID]) -> int:
+        assoc = self.model.roles.property.secondary
+        role_ids = sa.select([Role.id]).where(Role.uid.in_(role_uids))
+        user_ids = sa.select([assoc.c.left_id]).where(
+            assoc.c.right_id.in_(role_ids)
+        )
+        return self.uow.db.query(self.model) \
+            .filter(self.model.id.in_(user_ids)) \
+            .update(
+                {'auth_epoch': self.model.auth_epoch + 1},
+                synchronize_session=False,
+            )
+
+    def _delete_where(self, criteria: tp.Dict[str, tp.Any]) -> int:
+        assoc = self.model.roles.property.secondary
+        user_ids = sa.select([self.model.id]).where(
+            sa.and_(*self._get_where(criteria))
+        )
+        self.uow.db.execute(
+            assoc.delete().where(assoc.c.left_id.in_(user_ids))
+        )
+        return super()._delete_where(criteria)
+
+    def get_auth_epoch(self, uid: UUID) -> tp.Optional[int]:
+        return self.uow.db.query(self.model.auth_epoch) \
+            .filter(self.model.uid == uid) \
+            .scalar()
+
     def _get_role_query(
         self,
         role: tp.Optional[
@@ -33,22 +177,86 @@ class UserRepository(SQLRepositoryMixin, UserRepositoryBase[User]):
                 tp.List[tp.Union[str, tp.Tuple[str, ...]]],
             ]
         ],
+        use_mask: bool = False,
     ) -> sa.orm.query.Query:
-        """Helper to get the query for role-related operations."""
+        """Helper to get the query for role-related operations.
+
+        With `use_mask` the users' role masks are tested directly (when
+        possible), which lets ordered, limited queries stop early rather
+        than collect all of the matching users first.
+        """
         ret = self.uow.db.query(self.model)
         if role is None:
-            ret = ret.filter(~self.model.roles.any())
-        else:
-            ret = ret.join(self.model.roles)
-            roles = self._helper_format_roles(role)
-            exprs = []
-            for r_tup in roles:
-                t_expr = []
-                for r in r_tup:
-                    t_expr.append(self.model.roles.contains(r))
-                exprs.append(sa.and_(*t_expr))
-            ret = ret.filter(sa.or_(*exprs))
-        return ret
+            return ret.filter(~self.model.roles.any())
+
+        groups: tp.List[tp.Tuple[Role, ...]] = \
+            self._helper_format_roles(role) or [()]
+        masks = self._get_role_masks(groups) if use_mask else None
+        if masks is not None:
+            mask_col = self.model.role_mask
+            return ret.filter(
+                sa.or_(*(mask_col.op('&')(x) == x for x in masks))
+            )
+        return ret.filter(self.model.id.in_(self._get_role_members(groups)))
+
+    def _get_role_masks(
+        self,
+        groups: tp.List[tp.Tuple[Role, ...]],
+    ) -> tp.Optional[tp.List[int]]:
+        """Helper to get the role masks matching the given role `groups`
+        (if they can all be tested using the users' role masks).
+        """
+        if not settings.ROLE_MASK_ENABLED:
+            return None
+        masks = set()
+        for r_tup in groups:
+            mask = self.uow.role.get_mask(r_tup)
+            if not mask:
+                return None
+            masks.add(mask)
+        return sorted(masks)
+
+    def _get_role_members(
+        self,
+        groups: tp.List[tp.Tuple[Role, ...]],
+    ) -> sa.sql.Selectable:
+        """Helper to compile (formatted) role `groups` into a set-based
+        query for the IDs of the matching users.
+
+        Each tuple of roles (all of which a user must have) becomes a
+        ``GROUP BY ... HAVING COUNT(DISTINCT ...)`` over the association
+        table, single-role alternatives are merged into one ``IN`` list
+        and the alternatives are combined with a ``UNION``.  An empty
+        tuple (e.g. all of its roles don't exist) matches any user with
+        at least one role.
+        """
+        tbl = self.model.roles.property.secondary
+        r_groups = set(frozenset(x.id for x in r_tup) for r_tup in groups)
+        if frozenset() in r_groups:
+            return sa.select([tbl.c.left_id])
+
+        selects = []
+        singles = [next(iter(x)) for x in r_groups if len(x) == 1]
+        if singles:
+            selects.append(
+                sa.select([tbl.c.left_id])
+                .where(tbl.c.right_id.in_(singles))
+            )
+        for r_ids in sorted(r_groups, key=sorted):
+            if len(r_ids) < 2:
+                continue
+            selects.append(
+                sa.select([tbl.c.left_id])
+                .where(tbl.c.right_id.in_(sorted(r_ids)))
+                .group_by(tbl.c.left_id)
+                .having(
+                    sa.func.count(sa.distinct(tbl.c.right_id)) == len(r_ids)
+                )
+            )
+
+        if len(selects) == 1:
+            return selects[0]
+        return sa.union(*selects)
 
     def get_by_role(
         self,
@@ -63,14 +271,15 @@ class UserRepository(SQLRepositoryMixin, UserRepositoryBase[User]):
         skip: int = 0,
         limit: tp.Optional[int] = 100,
     ) -> tp.List[User]:
-        ret = self._get_role_query(role).order_by(self.model.email)
+        ret = self._get_role_query(role, use_mask=True) \
+            .order_by(self.model.email)
         if skip:
             ret = ret.offset(skip)
         if limit:
             ret = ret.limit(limit)
         return ret.all()
 
-    def count_by_role(
+    def _count_by_role(
         self,
         role: tp.Optional[
             tp.Union[
@@ -80,6 +289,23 @@ class UserRepository(SQLRepositoryMixin, UserRepositoryBase[User]):
             ]
         ],
     ) -> int:
-        stmt = self._get_role_query(role).subquery()
-        qry = self.uow.db.query(sa.distinct(stmt.c.id))
-        return qry.count()
+        qry = self._get_role_query(role) \
+            .with_entities(sa.func.count(self.model.id)) \
+            .order_by(None)
+        return qry.scalar()
+
+    def _count_members(
+        self,
+        uids: tp.Optional[tp.List[UUID]] = None,
+    ) -> tp.Dict[UUID, int]:
+        assoc = self.model.roles.property.secondary
+        roles = self.uow.role.model
+        qry = self.uow.db.query(roles.uid, sa.func.count(assoc.c.left_id))
+        if uids is None:
+            qry = qry.outerjoin(assoc, assoc.c.right_id == roles.id)
+        else:
+            user_ids = sa.select([self.model.id]) \
+                .where(self.model.uid.in_(uids))
+            qry = qry.join(assoc, assoc.c.right_id == roles.id) \
+                .filter(assoc.c.left_id.in_(user_ids))
+        return dict(qry.group_by(roles.uid))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Collection version CRUD-based storage repository for SQLAlchemy driver.
+"""
+import typing as tp
+
+import sqlalchemy as sa
+
+from app.crud.repos.version import CollectionVersionRepositoryBase
+from app.drivers.sqlalchemy.crud import (
+    SQLRepositoryMixin,
+    UnitOfWork,
+)
+from app.drivers.sqlalchemy.models.version import CollectionVersion
+
+
+class CollectionVersionRepository(
+    SQLRepositoryMixin,
+    CollectionVersionRepositoryBase[CollectionVersion],
+):
+    """
+    SQLAlchemy-based CRUD storage repository for CollectionVersion
+    objects.
+    """
+    if tp.TYPE_CHECKING:
+        uow: UnitOfWork
+
+    __order_by__ = {
+        'name': sa.asc,
+    }
+
+    def get_versions(self, names: tp.Iterable[str]) -> tp.Dict[str, int]:
+        ret = {x: 0 for x in names}
+        qry = self.uow.db.query(self.model.name, self.model.version) \
+            .filter(self.model.name.in_(list(ret)))
+        ret.update(qry)
+        return ret
+
+    def bump(self, name: str) -> int:
+        updated = self.uow.db.query(self.model) \
+            .filter(self.model.name == name) \
+            .update(
+                {'version': self.model.version + 1},
+                synchronize_session=False,
+            )
+        if not updated:
+            self._save(self._make(name=name, version=1))
+            return 1
+        return self.get_version(name)
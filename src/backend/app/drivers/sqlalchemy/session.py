@@ -5,9 +5,12 @@ Creates the SQLAlchemy driver components needed for sessions.
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.drivers.sqlalchemy import sqlite
+from app.drivers.sqlalchemy.pool import get_pool_options
 from app.drivers.sqlalchemy.utils import (
     create_db_uri,
     build_engine,
+    SingleConnectionSession,
 )
 
 db_uri = create_db_uri(
@@ -21,6 +24,19 @@ db_uri = create_db_uri(
     **settings.DB_CONNECT_EXTRA,
 )
 
-engine = build_engine(db_uri, pool_pre_ping=True)
+connect_args = {}
+if settings.DB_ENGINE == 'sqlite':
+    connect_args = sqlite.get_connect_args()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = build_engine(
+    db_uri,
+    connect_args=connect_args,
+    **get_pool_options(settings.DB_ENGINE),
+)
+
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=SingleConnectionSession,
+)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite-specific (performance profile) components for the SQLAlchemy
+driver.
+"""
+import os
+import sqlite3
+import time
+import typing as tp
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+from app.core.config import settings
+
+_WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def get_connect_args() -> tp.Dict[str, tp.Any]:
+    """Gets the additional DBAPI connection arguments for SQLite.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The keyword arguments to pass to ``sqlite3.connect`` (sets the
+        :obj:`WriteLockConnection` factory, if the ``DB_SQLITE_WRITE_LOCK``
+        setting is enabled and the platform supports it).
+
+    """
+    if not settings.DB_SQLITE_WRITE_LOCK or fcntl is None:
+        return {}
+    return {'factory': WriteLockConnection}
+
+
+def get_pragmas() -> tp.List[tp.Tuple[str, tp.Any, bool]]:
+    """Gets the SQLite ``PRAGMA`` settings to apply to new connections.
+
+    Returns
+    -------
+    List[Tuple[str, Any, bool]]
+        The name, value and whether or not it applies per (attached)
+        database, of each pragma to set (from the ``DB_SQLITE_*``
+        settings which are set).
+
+    """
+    pragmas = [
+        ('busy_timeout', settings.DB_SQLITE_BUSY_TIMEOUT, False),
+        ('journal_mode', settings.DB_SQLITE_JOURNAL_MODE, True),
+        ('synchronous', settings.DB_SQLITE_SYNCHRONOUS, True),
+        ('cache_size', settings.DB_SQLITE_CACHE_SIZE, True),
+        ('mmap_size', settings.DB_SQLITE_MMAP_SIZE, True),
+    ]
+    return [x for x in pragmas if x[1] is not None]
+
+
+def apply_pragmas(
+    dbapi_conn: tp.Any,
+    schemas: tp.Iterable[str] = (),
+) -> None:
+    """Applies the configured pragmas to the given SQLite connection.
+
+    Parameters
+    ----------
+    dbapi_conn : Any
+        The (DBAPI) SQLite connection to apply the pragmas to.
+    schemas : Iterable[str], optional
+        The names of any attached databases to also apply the
+        per-database pragmas to.
+
+    """
+    prefixes = [''] + [f"{x}." for x in schemas]
+    cursor = dbapi_conn.cursor()
+    for name, value, per_db in get_pragmas():
+        for prefix in (prefixes if per_db else ['']):
+            cursor.execute(f"PRAGMA {prefix}{name} = {value}")
+    cursor.close()
+
+
+class WriteLockCursor(sqlite3.Cursor):
+    """
+    SQLite cursor which takes its connection's write lock before writes.
+    """
+    if tp.TYPE_CHECKING:
+        @property
+        def connection(self) -> 'WriteLockConnection':
+            ...
+
+    def execute(self, sql: str, *args: tp.Any) -> 'WriteLockCursor':
+        self.connection._before_execute(sql)
+        try:
+            return super().execute(sql, *args)
+        finally:
+            self.connection._after_execute()
+
+    def executemany(self, sql: str, *args: tp.Any) -> 'WriteLockCursor':
+        self.connection._before_execute(sql)
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            self.connection._after_execute()
+
+
+class WriteLockConnection(sqlite3.Connection):
+    """
+    SQLite connection which serializes writes across processes.
+
+    Before the first write statement of a transaction an exclusive
+    ``flock`` is taken on a lock file next to the database, and it's
+    held until the transaction is committed or rolled back.  Concurrent
+    writers (from any worker process) so queue on the lock, rather than
+    failing with ``database is locked`` (or retrying) once SQLite's own
+    busy timeout runs out.  Readers are unaffected.
+
+    Waiting for the lock is bounded by ``DB_SQLITE_BUSY_TIMEOUT`` (if
+    set), after which an ``OperationalError`` is raised just as SQLite
+    would.
+    """
+
+    def __init__(self, database: tp.Any, *args: tp.Any, **kwargs: tp.Any):
+        super().__init__(database, *args, **kwargs)
+        self._lock_fd: tp.Optional[int] = None
+        self._lock_held = False
+
+        path = os.fspath(database)
+        if path and path != ':memory:' and not path.startswith('file:'):
+            self._lock_fd = os.open(
+                f"{path}-wlock",
+                os.O_RDWR | os.O_CREAT,
+            )
+
+    def cursor(
+        self,
+        factory: tp.Optional[
+            tp.Callable[[sqlite3.Connection], sqlite3.Cursor]
+        ] = None,
+    ) -> tp.Any:
+        return super().cursor(factory or WriteLockCursor)
+
+    def commit(self) -> None:
+        try:
+            return super().commit()
+        finally:
+            self._release()
+
+    def rollback(self) -> None:
+        try:
+            return super().rollback()
+        finally:
+            self._release()
+
+    def close(self) -> None:
+        try:
+            return super().close()
+        finally:
+            self._release()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def _before_execute(self, sql: str) -> None:
+        if (
+            self._lock_fd is not None
+            and not self._lock_held
+            and sql.lstrip()[:7].upper().startswith(_WRITE_STATEMENTS)
+        ):
+            self._acquire()
+
+    def _after_execute(self) -> None:
+        # - Writes made outside of a transaction are already committed
+        if self._lock_held and not self.in_transaction:
+            self._release()
+
+    def _acquire(self) -> None:
+        assert self._lock_fd is not None
+        timeout = settings.DB_SQLITE_BUSY_TIMEOUT
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout / 1000.0
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise sqlite3.OperationalError("database is locked")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.01)
+        self._lock_held = True
+
+    def _release(self) -> None:
+        if self._lock_held:
+            assert self._lock_fd is not None
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            self._lock_held = False
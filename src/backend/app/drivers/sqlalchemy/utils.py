@@ -12,36 +12,97 @@ from sqlalchemy import (
     event,
 )
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import (
+    Connection,
+    Engine,
+)
+from sqlalchemy.orm import Session
 from sqlalchemy.types import (
+    BINARY,
     CHAR,
     TypeDecorator,
     TypeEngine,
 )
 
+from app.core import metrics
+from app.core.config import settings
+from app.drivers.sqlalchemy import sqlite
+from app.drivers.sqlalchemy.pool import (
+    connect,
+    PoolMonitor,
+)
+
 
 class GUID(TypeDecorator):
     """
     Platform-independent GUID type for SQLAlchemy.
+
+    Stored as a native ``UUID`` on PostgreSQL, and otherwise as either
+    ``CHAR(32)`` hex (the default) or ``BINARY(16)``, per the
+    ``DB_UUID_STORAGE`` setting (or the `storage` given).  Stored values
+    in either format are read back, so existing databases keep working
+    while being migrated (see :mod:`app.drivers.sqlalchemy.migrations`),
+    though switching formats on databases other than SQLite needs the
+    column types altering by hand first.
+
+    Parameters
+    ----------
+    storage : str, optional
+        The storage format to use on non-PostgreSQL dialects, either
+        ``'binary'`` or ``'char'`` (default is the ``DB_UUID_STORAGE``
+        setting).
+
     """
     impl = CHAR
+    cache_ok = True
 
-    def load_dialect_impl(self, dialect: tp.Any) -> TypeEngine:
+    def __init__(self, storage: tp.Optional[str] = None) -> None:
+        self.storage = storage
+        super().__init__()
+
+    def get_storage(self, dialect: tp.Any) -> str:
+        """Gets the storage format used for the given `dialect`.
+
+        Parameters
+        ----------
+        dialect : Dialect
+            The SQLAlchemy dialect to get the storage format for.
+
+        Returns
+        -------
+        str
+            One of ``'native'``, ``'binary'`` or ``'char'``.
+
+        """
         if dialect.name == 'postgresql':
+            return 'native'
+        return self.storage or settings.DB_UUID_STORAGE
+
+    def load_dialect_impl(self, dialect: tp.Any) -> TypeEngine:
+        storage = self.get_storage(dialect)
+        if storage == 'native':
             return dialect.type_descriptor(postgresql.UUID())
+        elif storage == 'binary':
+            return dialect.type_descriptor(BINARY(16))
         return dialect.type_descriptor(CHAR(32))
 
     def process_bind_param(
         self,
         value: tp.Any,
         dialect: tp.Any,
-    ) -> tp.Optional[str]:
+    ) -> tp.Any:
         if value is None:
             return value
-        elif dialect.name == 'postgresql':
+        if isinstance(value, bytes):
+            value = uuid.UUID(bytes=value)
+        elif not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+
+        storage = self.get_storage(dialect)
+        if storage == 'native':
             return str(value)
-        if not isinstance(value, uuid.UUID):
-            return uuid.UUID(value).hex
+        elif storage == 'binary':
+            return value.bytes
         return value.hex
 
     def process_result_value(
@@ -49,11 +110,39 @@ class GUID(TypeDecorator):
         value: tp.Any,
         dialect: tp.Any,
     ) -> tp.Optional[uuid.UUID]:
-        if value is None:
+        if value is None or isinstance(value, uuid.UUID):
             return value
-        if not isinstance(value, uuid.UUID):
-            value = uuid.UUID(value)
-        return value
+        elif isinstance(value, (bytes, memoryview)):
+            return uuid.UUID(bytes=bytes(value))
+        return uuid.UUID(value)
+
+
+class SingleConnectionSession(Session):
+    """
+    Session which holds a single connection until it's closed.
+
+    The connection is checked out from the engine's pool on first use and
+    re-used by every transaction (rather than being returned to the pool
+    at the end of each one), until the session is closed.
+    """
+
+    def __init__(self, *args: tp.Any, **kwargs: tp.Any) -> None:
+        self._connection: tp.Optional[Connection] = None
+        super().__init__(*args, **kwargs)
+
+    def get_bind(self, *args: tp.Any, **kwargs: tp.Any) -> Connection:
+        if self._connection is None or self._connection.closed:
+            bind = super().get_bind(*args, **kwargs)
+            if isinstance(bind, Connection):
+                return bind
+            self._connection = connect(bind)
+        return self._connection
+
+    def close(self) -> None:
+        super().close()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
 
 
 def create_db_uri(
@@ -97,7 +186,7 @@ def create_db_uri(
     """
     db_uri = dialect
     if driver:
-        db_uri += f"[+{driver}]"
+        db_uri += f"+{driver}"
     db_uri += "://"
     if user:
         db_uri += user
@@ -156,16 +245,39 @@ def build_engine(db_uri: str, **kwargs: tp.Any) -> Engine:
         use.
 
     """
-    engine = create_engine(db_uri, **kwargs)
+    return configure_engine(create_engine(db_uri, **kwargs))
+
+
+def configure_engine(engine: Engine) -> Engine:
+    """Configures the given SQLAlchemy database engine for use.
+
+    Parameters
+    ----------
+    engine : Engine
+        The (synchronous) engine to configure.
+
+    Returns
+    -------
+    Engine
+        The configured engine (with a :obj:`PoolMonitor` registered as the
+        ``db_pool`` metrics source, and the ``DB_SQLITE_*`` pragmas set
+        on each new SQLite connection).
+
+    """
+    monitor = PoolMonitor(engine)
+    metrics.register('db_pool', monitor.stats)
 
     if engine.dialect.name == 'sqlite':
-        # - Add Schema handling to SQLite connections
+        # - Add Schema handling and pragmas to SQLite connections
         schema_map = {x: f"{x}.sqlite3" for x in get_schema()}
 
         @event.listens_for(engine, 'connect')
         def _sqlite_connect(dbapi_conn: tp.Any, rec: tp.Any) -> None:
+            cursor = dbapi_conn.cursor()
             for sname, fname in schema_map.items():
-                dbapi_conn.execute(f"ATTACH DATABASE '{fname}' AS '{sname}'")
+                cursor.execute(f"ATTACH DATABASE '{fname}' AS '{sname}'")
+            cursor.close()
+            sqlite.apply_pragmas(dbapi_conn, schema_map)
             return
 
     return engine
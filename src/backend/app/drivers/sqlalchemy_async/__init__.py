@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+SQLAlchemy-based (asyncio) database CRUD-storage driver.
+
+Requires SQLAlchemy 1.4+ and an asyncio database driver (``aiosqlite``
+or ``asyncpg``), see the ``async`` extra.
+"""
+try:
+    import sqlalchemy.ext.asyncio  # noqa: F401
+except ImportError as ex:  # pragma: no cover
+    raise ImportError(
+        "The sqlalchemy_async storage driver requires SQLAlchemy 1.4+"
+        " (install the 'async' extra, e.g. `pip install .[async]`)"
+    ) from ex
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Core functionality for the (asyncio) SQLAlchemy storage driver.
+"""
+import asyncio
+import typing as tp
+
+from app.drivers.sqlalchemy import (
+    models,
+    repos,
+)
+from app.drivers.sqlalchemy.migrations import run_migrations
+from app.drivers.sqlalchemy.models.base import Base
+from app.drivers.sqlalchemy_async.crud import UnitOfWork
+from app.drivers.sqlalchemy_async.session import (
+    AsyncSessionLocal,
+    engine,
+)
+
+
+__all__ = [
+    'create_uow',
+    'dispose_storage',
+    'migrate_storage',
+    'models',
+    'repos',
+    'setup_storage',
+    'storage_ready',
+    'UnitOfWork',
+]
+
+
+def storage_ready() -> bool:
+    """Checks if the storage system is ready for use.
+
+    Returns
+    -------
+    bool
+        Whether or not the storage system is ready for use.
+
+    """
+    async def _check() -> bool:
+        try:
+            async with engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+            return True
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(_check())
+
+
+def create_uow() -> UnitOfWork:
+    """Creates a new SQLAlchemy-based (asyncio) :obj:`UnitOfWork` to use.
+
+    Returns
+    -------
+    UnitOfWork
+        The (asyncio SQLAlchemy-based) unit-of-work object to use.
+
+    """
+    return UnitOfWork(AsyncSessionLocal())
+
+
+def setup_storage() -> None:
+    """Sets up the storage system for the first time running."""
+    async def _setup() -> None:
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_setup())
+
+
+def migrate_storage() -> tp.Dict[str, int]:
+    """Migrates existing storage to the current models and settings.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of changes made by each migration, by name.
+
+    """
+    async def _migrate() -> tp.Dict[str, int]:
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                return await conn.run_sync(run_migrations)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(_migrate())
+
+
+async def dispose_storage() -> None:
+    """Closes all pooled storage connections (made on the current event
+    loop).
+    """
+    await engine.dispose()
+
+
+def init_storage() -> None:
+    """Initializes the storage system for use on each application start.
+    """
+    pass
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Base components for the (asyncio) SQLAlchemy storage driver.
+"""
+import typing as tp
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.drivers.sqlalchemy import crud
+
+T = tp.TypeVar('T')
+
+
+class UnitOfWork(crud.UnitOfWork):
+    """
+    SQLAlchemy-based (asyncio) unit-of-work class.
+
+    Re-uses the SQLAlchemy driver's repositories on the synchronous
+    facade of an :obj:`AsyncSession`: storage operations run through
+    :meth:`run_sync` (in SQLAlchemy's greenlet adapter), so their
+    database I/O is awaited on the event loop rather than blocking it.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        return super().__init__(session.sync_session)
+
+    async def aclose(self) -> None:
+        return await self.session.close()
+
+    async def run_sync(
+        self,
+        fn: tp.Callable[..., T],
+        *args: tp.Any,
+        **kwargs: tp.Any,
+    ) -> T:
+        return await self.session.run_sync(lambda _: fn(*args, **kwargs))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Creates the (asyncio) SQLAlchemy driver components needed for sessions.
+"""
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.drivers.sqlalchemy import sqlite
+from app.drivers.sqlalchemy.pool import get_pool_options
+from app.drivers.sqlalchemy.utils import (
+    configure_engine,
+    create_db_uri,
+    SingleConnectionSession,
+)
+
+ASYNC_DB_DRIVERS = {
+    'postgresql': 'asyncpg',
+    'sqlite': 'aiosqlite',
+}
+"""Dict[str, str]: Default asyncio database drivers for each dialect."""
+
+db_uri = create_db_uri(
+    settings.DB_ENGINE,
+    db_name=settings.DB_NAME,
+    driver=settings.DB_DRIVER or ASYNC_DB_DRIVERS.get(settings.DB_ENGINE),
+    user=settings.DB_USER,
+    password=settings.DB_PASSWORD,
+    host=settings.DB_HOST,
+    port=settings.DB_PORT,
+    **settings.DB_CONNECT_EXTRA,
+)
+
+connect_args = {}
+if settings.DB_ENGINE == 'sqlite':
+    connect_args = sqlite.get_connect_args()
+
+engine = create_async_engine(
+    db_uri,
+    connect_args=connect_args,
+    **get_pool_options(settings.DB_ENGINE, is_async=True),
+)
+configure_engine(engine.sync_engine)
+
+AsyncSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    class_=AsyncSession,
+    sync_session_class=SingleConnectionSession,
+)
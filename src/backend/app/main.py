@@ -5,8 +5,11 @@ API application entrypoint.
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.common import NEXT_CURSOR_HEADER
+from app.api.middleware import RequestMetricsMiddleware
 from app.api.utils import get_api_router
 from app.core.config import settings
+from app.crud.core import dispose_storage
 
 
 # Create application
@@ -15,6 +18,9 @@ app = FastAPI(
     openapi_url=f"/api/{settings.API_VERSION}/openapi.json",
 )
 
+# Release pooled storage connections on shutdown
+app.add_event_handler("shutdown", dispose_storage)
+
 # Set CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -23,8 +29,11 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
+app.add_middleware(RequestMetricsMiddleware)
+
 # Router setup
 api_router = get_api_router(settings.API_VERSION)
 app.include_router(api_router, prefix="/api")
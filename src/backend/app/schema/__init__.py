@@ -2,6 +2,16 @@
 """
 Schema for API communications.
 """
+from app.schema.bulk import (
+    BulkCreated,
+    BulkCreateResult,
+    BulkError,
+    BulkResult,
+)
+from app.schema.counter import (
+    CounterCreate,
+    CounterUpdate,
+)
 from app.schema.msg import (
     Msg,
     StatusMsg,
@@ -12,30 +22,55 @@ from app.schema.name import (
     NameStored,
     NameUpdate,
 )
+from app.schema.principal import Principal
 from app.schema.role import (
     Role,
+    RoleBulkUpdate,
     RoleCreate,
     RoleStored,
     RoleUpdate,
 )
 from app.schema.token import (
+    RefreshTokenCreate,
+    RefreshTokenUpdate,
+    RevokedTokenCreate,
+    RevokedTokenUpdate,
     Token,
     TokenPayload,
 )
 from app.schema.user import (
     User,
+    UserBulkUpdate,
     UserCreate,
     UserStored,
     UserUpdate,
 )
+from app.schema.version import (
+    CollectionVersionCreate,
+    CollectionVersionUpdate,
+)
 
 __all__ = [
+    'BulkCreated',
+    'BulkCreateResult',
+    'BulkError',
+    'BulkResult',
+    'CollectionVersionCreate',
+    'CollectionVersionUpdate',
+    'CounterCreate',
+    'CounterUpdate',
     'Msg',
     'Name',
     'NameCreate',
     'NameStored',
     'NameUpdate',
+    'Principal',
+    'RefreshTokenCreate',
+    'RefreshTokenUpdate',
+    'RevokedTokenCreate',
+    'RevokedTokenUpdate',
     'Role',
+    'RoleBulkUpdate',
     'RoleCreate',
     'RoleStored',
     'RoleUpdate',
@@ -43,6 +78,7 @@ __all__ = [
     'Token',
     'TokenPayload',
     'User',
+    'UserBulkUpdate',
     'UserCreate',
     'UserStored',
     'UserUpdate',
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk operation schema.
+"""
+import typing as tp
+from uuid import UUID
+
+from app.schema.base import BaseSchemaJS
+
+
+class BulkError(BaseSchemaJS):
+    """
+    Schema for an error with one item of a bulk operation.
+    """
+    index: int
+    detail: str
+
+
+class BulkCreated(BaseSchemaJS):
+    """
+    Schema for an item created by a bulk operation.
+    """
+    index: int
+    uid: UUID
+
+
+class BulkCreateResult(BaseSchemaJS):
+    """
+    Schema for the results of a bulk create operation.
+    """
+    created: tp.List[BulkCreated] = []
+    errors: tp.List[BulkError] = []
+
+
+class BulkResult(BaseSchemaJS):
+    """
+    Schema for the results of a bulk update (or removal) operation.
+    """
+    count: int
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Counter schema.
+"""
+import typing as tp
+
+from app.schema.base import BaseSchema
+
+
+class CounterCreate(BaseSchema):
+    """
+    Schema for creating counters.
+    """
+    name: str
+    value: int = 0
+
+
+class CounterUpdate(BaseSchema):
+    """
+    Schema for updating counters.
+    """
+    value: tp.Optional[int] = None
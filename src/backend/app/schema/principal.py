@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Principal schema.
+"""
+import typing as tp
+from uuid import UUID
+
+from pydantic import validator
+
+from app.schema.base import BaseSchema
+
+
+class Principal(BaseSchema):
+    """
+    Authorization details of an authenticated user.
+    """
+    uid: UUID
+    is_active: bool
+    is_superuser: bool
+    is_admin: bool
+    roles: tp.List[str] = []
+    role_mask: tp.Optional[int] = None
+    auth_epoch: int = 0
+
+    @validator('roles', pre=True, each_item=True)
+    @classmethod
+    def get_role_name(cls, v: tp.Any) -> str:
+        return getattr(v, 'name', v)
+
+    class Config:
+        orm_mode: bool = True
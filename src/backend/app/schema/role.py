@@ -29,6 +29,13 @@ class RoleUpdate(RoleBase):
     name: tp.Optional[str] = None
 
 
+class RoleBulkUpdate(BaseSchemaJS):
+    """
+    Schema for updating roles in bulk.
+    """
+    description: tp.Optional[str] = None
+
+
 class Role(RoleBase):
     """
     Schema for Role objects.
@@ -2,6 +2,8 @@
 """
 Token schema.
 """
+from datetime import datetime
+import typing as tp
 from uuid import UUID
 
 from app.schema.base import (
@@ -16,6 +18,8 @@ class Token(BaseSchemaJS):
     """
     access_token: str
     token_type: str
+    expires_in: tp.Optional[int] = None
+    refresh_token: tp.Optional[str] = None
 
 
 class TokenPayload(BaseSchema):
@@ -23,3 +27,51 @@ class TokenPayload(BaseSchema):
     Token payload data.
     """
     sub: UUID
+    exp: tp.Optional[int] = None
+    jti: tp.Optional[str] = None
+    typ: tp.Optional[str] = None
+    fam: tp.Optional[str] = None
+    act: tp.Optional[bool] = None
+    sup: tp.Optional[bool] = None
+    adm: tp.Optional[bool] = None
+    rls: tp.Optional[tp.List[str]] = None
+    rmk: tp.Optional[int] = None
+    epc: tp.Optional[int] = None
+
+    @property
+    def has_claims(self) -> bool:
+        """bool: Whether or not this payload has authorization claims."""
+        return self.epc is not None
+
+
+# Refresh tokens
+class RefreshTokenCreate(BaseSchema):
+    """
+    Schema for issuing refresh tokens.
+    """
+    user_uid: UUID
+    family: tp.Optional[str] = None
+
+
+class RefreshTokenUpdate(BaseSchema):
+    """
+    Schema for updating refresh tokens.
+    """
+    used: tp.Optional[bool] = None
+    revoked: tp.Optional[bool] = None
+
+
+# Revoked tokens
+class RevokedTokenCreate(BaseSchema):
+    """
+    Schema for revoking tokens.
+    """
+    jti: str
+    expires: datetime
+
+
+class RevokedTokenUpdate(BaseSchema):
+    """
+    Schema for updating revoked tokens.
+    """
+    expires: tp.Optional[datetime] = None
@@ -52,6 +52,15 @@ class UserUpdate(UserBase):
     roles: tp.Optional[tp.List[str]] = None
 
 
+class UserBulkUpdate(BaseSchemaJS):
+    """
+    Schema for updating users in bulk.
+    """
+    is_active: tp.Optional[bool] = None
+    is_superuser: tp.Optional[bool] = None
+    is_admin: tp.Optional[bool] = None
+
+
 # Storage base schema
 class UserBaseStored(UserBase):
     """
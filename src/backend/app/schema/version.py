@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Collection version schema.
+"""
+import typing as tp
+
+from app.schema.base import BaseSchema
+
+
+class CollectionVersionCreate(BaseSchema):
+    """
+    Schema for creating collection versions.
+    """
+    name: str
+    version: int = 0
+
+
+class CollectionVersionUpdate(BaseSchema):
+    """
+    Schema for updating collection versions.
+    """
+    version: tp.Optional[int] = None
@@ -2,15 +2,22 @@
 """
 Unit tests for /login API endpoints.
 """
+import typing as tp
+
 import requests
 
 from app.core.config import settings
-from app.tests.utils import get_server_api
+from app.tests.utils import (
+    create_random_user,
+    get_server_api,
+    get_user_tokens,
+    random_lower_string,
+)
 
 
 def test_get_access_token() -> None:
     server_api = get_server_api()
-    login_url = f"{server_api}{settings.API_VERSION}/login/access-token"
+    login_url = f"{server_api}login/access-token"
     login_data = {
         "username": settings.FIRST_ADMIN_USER,
         "password": settings.FIRST_ADMIN_PASSWORD,
@@ -21,16 +28,115 @@ def test_get_access_token() -> None:
     assert r.text is not None and r.text != ''
 
     tokens = r.json()
-    assert "access_token" in tokens
-    assert tokens["access_token"]
+    assert "accessToken" in tokens
+    assert tokens["accessToken"]
 
 
-def test_use_access_token(superuser_token_headers) -> None:
+def test_use_access_token(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
     server_api = get_server_api()
     r = requests.post(
-        f"{server_api}{settings.API_VERSION}/login/test-token",
+        f"{server_api}login/test-token",
         headers=superuser_token_headers,
     )
     result = r.json()
     assert r.status_code == 200
     assert "email" in result
+
+
+def test_refresh_token_rotation(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    tokens = get_user_tokens(user["email"], user["password"])
+
+    r = requests.post(
+        f"{server_api}login/refresh",
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 200
+    new_tokens = r.json()
+    assert new_tokens["refreshToken"] != tokens["refreshToken"]
+
+    r = requests.post(
+        f"{server_api}login/test-token",
+        headers={"Authorization": f"Bearer {new_tokens['accessToken']}"},
+    )
+    assert r.status_code == 200
+    assert r.json()["uid"] == user["uid"]
+
+
+def test_refresh_token_reuse_revokes_family(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    tokens = get_user_tokens(user["email"], user["password"])
+    refresh_url = f"{server_api}login/refresh"
+
+    r = requests.post(
+        refresh_url,
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 200
+    new_tokens = r.json()
+
+    r = requests.post(
+        refresh_url,
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 400
+
+    r = requests.post(
+        refresh_url,
+        json={"refreshToken": new_tokens["refreshToken"]},
+    )
+    assert r.status_code == 400
+
+
+def test_password_change_revokes_refresh_tokens(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    tokens = get_user_tokens(user["email"], user["password"])
+
+    r = requests.put(
+        f"{server_api}users/{user['uid']}",
+        headers=superuser_token_headers,
+        json={"password": random_lower_string()},
+    )
+    assert r.status_code == 200
+
+    r = requests.post(
+        f"{server_api}login/refresh",
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 400
+
+
+def test_logout_revokes_tokens(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    tokens = get_user_tokens(user["email"], user["password"])
+    headers = {"Authorization": f"Bearer {tokens['accessToken']}"}
+
+    r = requests.post(
+        f"{server_api}logout",
+        headers=headers,
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 200
+
+    r = requests.post(f"{server_api}login/test-token", headers=headers)
+    assert r.status_code == 403
+
+    r = requests.post(
+        f"{server_api}login/refresh",
+        json={"refreshToken": tokens["refreshToken"]},
+    )
+    assert r.status_code == 400
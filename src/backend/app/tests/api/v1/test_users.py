@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for /users API endpoints.
+"""
+import base64
+import typing as tp
+
+import requests
+
+from app.tests.utils import (
+    create_random_user,
+    get_server_api,
+    get_user_tokens,
+    random_email,
+    random_lower_string,
+)
+
+
+def test_read_user_not_modified(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    url = f"{server_api}users/{user['uid']}"
+
+    r = requests.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    r = requests.get(
+        url,
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert r.content == b""
+
+
+def test_updates_change_user_etag(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    url = f"{server_api}users/{user['uid']}"
+
+    r = requests.get(url, headers=superuser_token_headers)
+    etags = [r.headers["ETag"]]
+    for first in ("Alice", "Bob"):
+        r = requests.put(
+            url,
+            headers=superuser_token_headers,
+            json={"name": {"first": first, "last": "Smith"}},
+        )
+        assert r.status_code == 200
+        r = requests.get(url, headers=superuser_token_headers)
+        assert r.json()["name"]["first"] == first
+        etags.append(r.headers["ETag"])
+    assert len(set(etags)) == 3
+
+    r = requests.get(
+        url,
+        headers={**superuser_token_headers, "If-None-Match": etags[0]},
+    )
+    assert r.status_code == 200
+
+
+def test_read_user_me_etag(superuser_token_headers: tp.Dict[str, str]) -> None:
+    server_api = get_server_api()
+    user = create_random_user(superuser_token_headers)
+    tokens = get_user_tokens(user["email"], user["password"])
+    headers = {"Authorization": f"Bearer {tokens['accessToken']}"}
+    url = f"{server_api}users/me"
+
+    r = requests.get(url, headers=headers)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    r = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+
+    r = requests.put(
+        url,
+        headers=headers,
+        json={"first": "Carol", "last": "Smith"},
+    )
+    assert r.status_code == 200
+
+    r = requests.get(url, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["name"]["first"] == "Carol"
+
+
+def test_read_users_etag_changes(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/"
+
+    r = requests.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    r = requests.get(
+        url,
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 304
+
+    user = create_random_user(superuser_token_headers)
+    r = requests.get(
+        url,
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert user["uid"] in [x["uid"] for x in r.json()]
+
+
+def test_read_users_cursor_pages(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/"
+    for _ in range(3):
+        create_random_user(superuser_token_headers)
+
+    r = requests.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    expected = [x["uid"] for x in r.json()]
+
+    uids = []
+    params = {"limit": 2}
+    while True:
+        r = requests.get(url, headers=superuser_token_headers, params=params)
+        assert r.status_code == 200
+        page = [x["uid"] for x in r.json()]
+        assert len(page) <= 2
+        uids.extend(page)
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "cursor": cursor}
+    assert uids == expected
+
+
+def test_read_users_invalid_cursor(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/"
+    bad_keys = [
+        base64.urlsafe_b64encode(x).decode("ascii")
+        for x in (b'[{"a":1},1]', b'[true,1]', b'["a@example.com","1"]')
+    ]
+    for cursor in ("not-a-cursor!", "e30", *bad_keys):
+        r = requests.get(
+            url,
+            headers=superuser_token_headers,
+            params={"cursor": cursor},
+        )
+        assert r.status_code == 400
+
+
+def test_create_users_bulk(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    existing = create_random_user(superuser_token_headers)
+    email = random_email()
+    users_in = [
+        {"email": email, "password": random_lower_string()},
+        {"email": email, "password": random_lower_string()},
+        {"email": existing["email"], "password": random_lower_string()},
+        {"email": "not-an-email", "password": random_lower_string()},
+        {"email": random_email(), "password": random_lower_string()},
+    ]
+    count_url = f"{server_api}users/count"
+    count = requests.get(count_url, headers=superuser_token_headers).json()
+
+    r = requests.post(
+        f"{server_api}users/bulk",
+        headers=superuser_token_headers,
+        json=users_in,
+    )
+    assert r.status_code == 200
+    result = r.json()
+    assert [x["index"] for x in result["created"]] == [0, 4]
+    assert [x["index"] for x in result["errors"]] == [1, 2, 3]
+
+    r = requests.get(count_url, headers=superuser_token_headers)
+    assert r.json() == count + 2
+
+    for created in result["created"]:
+        r = requests.get(
+            f"{server_api}users/{created['uid']}",
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 200
+        assert r.json()["email"] == users_in[created["index"]]["email"]
+
+
+def test_update_users_bulk(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/bulk"
+    uids = [create_random_user(superuser_token_headers)["uid"] for _ in "ab"]
+
+    for expected in (2, 0):
+        r = requests.put(
+            url,
+            headers=superuser_token_headers,
+            json={"filter": {"uid": uids}, "values": {"isActive": False}},
+        )
+        assert r.status_code == 200
+        assert r.json()["count"] == expected
+
+    r = requests.get(
+        f"{server_api}users/{uids[0]}",
+        headers=superuser_token_headers,
+    )
+    assert r.json()["isActive"] is False
+
+
+def test_update_users_bulk_invalid_filter(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/bulk"
+    for criteria in (
+        {},
+        {"hashedPassword": "x"},
+        {"email": {"a": 1}},
+        {"isActive": "yes"},
+        {"uid": ["not-a-uid"]},
+    ):
+        r = requests.put(
+            url,
+            headers=superuser_token_headers,
+            json={"filter": criteria, "values": {"isActive": True}},
+        )
+        assert r.status_code == 400
+
+
+def test_delete_users_bulk(
+    superuser_token_headers: tp.Dict[str, str],
+) -> None:
+    server_api = get_server_api()
+    url = f"{server_api}users/bulk"
+    uids = [create_random_user(superuser_token_headers)["uid"] for _ in "ab"]
+
+    for expected in (2, 0):
+        r = requests.delete(
+            url,
+            headers=superuser_token_headers,
+            json={"uids": uids},
+        )
+        assert r.status_code == 200
+        assert r.json()["count"] == expected
+
+    r = requests.get(
+        f"{server_api}users/{uids[0]}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 404
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the token storage repositories.
+"""
+from datetime import (
+    datetime,
+    timedelta,
+)
+from pathlib import Path
+import typing as tp
+
+from _pytest.monkeypatch import MonkeyPatch
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.crud import core  # noqa: F401 (registers the repositories)
+from app.crud.repos.token import RevokedTokenRepositoryBase
+from app.drivers.sqlalchemy.crud import UnitOfWork
+from app.drivers.sqlalchemy.models.base import Base
+from app.drivers.sqlalchemy.models.token import RevokedToken
+from app.tests.utils import random_lower_string
+
+pytestmark = pytest.mark.skipif(
+    settings.CRUD_DRIVER != 'sqlalchemy',
+    reason="Uses the (synchronous) SQLAlchemy driver",
+)
+
+
+@pytest.fixture
+def make_uow(
+    tmp_path: Path,
+    monkeypatch: MonkeyPatch,
+) -> tp.Iterator[tp.Callable[[], UnitOfWork]]:
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    # - Start from a fresh (process-wide) revoked token filter
+    for k, v in (
+        ('_filter', None),
+        ('_synced_at', None),
+        ('_checked_at', 0.0),
+        ('_rebuilt_at', 0.0),
+    ):
+        monkeypatch.setattr(RevokedTokenRepositoryBase, k, v)
+
+    uows: tp.List[UnitOfWork] = []
+
+    def _make_uow() -> UnitOfWork:
+        uows.append(UnitOfWork(session_factory()))
+        return uows[-1]
+
+    yield _make_uow
+    for uow in uows:
+        uow.close()
+    engine.dispose()
+
+
+def test_revocations_by_other_workers_lag(
+    make_uow: tp.Callable[[], UnitOfWork],
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, 'REVOKED_TOKEN_SYNC_SECONDS', 60)
+    uow = make_uow()
+    expires = datetime.utcnow() + timedelta(hours=1)
+
+    local_jti = random_lower_string()
+    uow.revoked_token.revoke(local_jti, expires)
+    uow.commit()
+    assert uow.revoked_token.is_revoked(local_jti)
+
+    # - Revoked by another worker: not added to this process's filter
+    other = make_uow()
+    remote_jti = random_lower_string()
+    other.db.add(RevokedToken(jti=remote_jti, expires=expires))
+    other.commit()
+
+    # - Known limitation: missed until the filter is next synced
+    assert not uow.revoked_token.is_revoked(remote_jti)
+
+    monkeypatch.setattr(settings, 'REVOKED_TOKEN_SYNC_SECONDS', 0)
+    assert uow.revoked_token.is_revoked(remote_jti)
+    assert uow.revoked_token.is_revoked(local_jti)
+    assert not uow.revoked_token.is_revoked(random_lower_string())
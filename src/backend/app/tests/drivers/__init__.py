@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the CRUD-storage drivers.
+"""
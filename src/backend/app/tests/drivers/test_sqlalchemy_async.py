@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the (asyncio) SQLAlchemy storage driver.
+"""
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.crud import core  # noqa: F401 (registers the repositories)
+from app.schema import UserCreate
+from app.tests.utils import (
+    random_email,
+    random_lower_string,
+)
+
+pytest.importorskip('sqlalchemy.ext.asyncio')
+pytest.importorskip('aiosqlite')
+
+
+def test_async_uow_round_trip(tmp_path: Path) -> None:
+    from sqlalchemy.ext.asyncio import (
+        AsyncSession,
+        create_async_engine,
+    )
+    from sqlalchemy.orm import sessionmaker
+
+    from app.drivers.sqlalchemy.models.base import Base
+    from app.drivers.sqlalchemy.utils import SingleConnectionSession
+    from app.drivers.sqlalchemy_async.crud import UnitOfWork
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.sqlite3'}",
+    )
+    session_factory = sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        sync_session_class=SingleConnectionSession,
+    )
+    emails = [random_email() for _ in range(3)]
+
+    async def _create(email: str) -> None:
+        uow = UnitOfWork(session_factory())
+        try:
+            async with uow:
+                await uow.user.create_async(
+                    obj_in=UserCreate(
+                        email=email,
+                        password=random_lower_string(),
+                    ),
+                )
+        finally:
+            await uow.aclose()
+
+    async def _run() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        # - Concurrent units of work, each with their own connection
+        await asyncio.gather(*(_create(x) for x in emails))
+
+        uow = UnitOfWork(session_factory())
+        try:
+            for email in emails:
+                user = await uow.run_sync(uow.user.get_by_email, email)
+                assert user is not None
+                assert user.email == email
+                assert await uow.run_sync(
+                    uow.user.get_object_version, user.uid,
+                ) == user.version
+            assert await uow.run_sync(
+                uow.user.get_by_email, random_email(),
+            ) is None
+        finally:
+            await uow.aclose()
+            await engine.dispose()
+
+    asyncio.run(_run())
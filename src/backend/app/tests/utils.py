@@ -4,17 +4,18 @@ Unit test utilities.
 """
 import random
 import string
+import typing as tp
 
 import requests
 
 from app.core.config import settings
 
 
-def random_lower_string():
+def random_lower_string() -> str:
     return "".join(random.choices(string.ascii_lowercase, k=32))
 
 
-def get_server_api():
+def get_server_api() -> str:
     server_name = "http://"
     if settings.SERVER_NAME:
         server_name += f"{settings.SERVER_NAME}"
@@ -25,17 +26,47 @@ def get_server_api():
     return server_name + "/api/"
 
 
-def get_superuser_token_headers():
+def get_superuser_token_headers() -> tp.Dict[str, str]:
     server_api = get_server_api()
     login_data = {
         "username": settings.FIRST_ADMIN_USER,
         "password": settings.FIRST_ADMIN_PASSWORD,
     }
-    r = requests.post(
-        f"{server_api}{settings.API_VERSION}/login/access-token",
-        data=login_data
-    )
+    r = requests.post(f"{server_api}login/access-token", data=login_data)
     tokens = r.json()
-    a_token = tokens["access_token"]
+    a_token = tokens["accessToken"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+def get_user_tokens(email: str, password: str) -> tp.Dict[str, tp.Any]:
+    server_api = get_server_api()
+    r = requests.post(
+        f"{server_api}login/access-token",
+        data={"username": email, "password": password},
+    )
+    assert r.status_code == 200
+    return r.json()
+
+
+def random_email() -> str:
+    return f"{random_lower_string()}@example.com"
+
+
+def create_random_user(
+    superuser_token_headers: tp.Dict[str, str],
+    **data: tp.Any,
+) -> tp.Dict[str, tp.Any]:
+    server_api = get_server_api()
+    user_in = {
+        "email": random_email(),
+        "password": random_lower_string(),
+        **data,
+    }
+    r = requests.post(
+        f"{server_api}users/",
+        headers=superuser_token_headers,
+        json=user_in,
+    )
+    assert r.status_code == 200
+    return {**r.json(), "password": user_in["password"]}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous utilities.
+"""
+import asyncio
+from collections import deque
+import typing as tp
+
+
+class AdmissionError(Exception):
+    """
+    Raised when a :obj:`ConcurrencyLimiter` can't admit a caller.
+    """
+    pass
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the number of concurrently running tasks with a bounded,
+    time-limited wait queue.
+
+    Callers beyond the concurrency `limit` wait (in FIFO order) for a
+    slot to free up, callers arriving when the queue is already full (or
+    who wait longer than the `timeout`) are rejected immediately with an
+    :obj:`AdmissionError` rather than piling up.
+
+    Parameters
+    ----------
+    limit : int
+        The maximum number of tasks allowed to run concurrently (a limit
+        of zero, or less, disables the limiter).
+    max_queue : int
+        The maximum number of tasks allowed to wait for a slot.
+    timeout : float
+        The maximum number of seconds a task may wait for a slot.
+
+    """
+
+    def __init__(self, limit: int, max_queue: int, timeout: float) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._active = 0
+        self._waiters: tp.Deque[asyncio.Future] = deque()
+
+    @property
+    def enabled(self) -> bool:
+        """bool: Whether or not this limiter restricts concurrency."""
+        return self.limit > 0
+
+    @property
+    def active(self) -> int:
+        """int: The number of tasks currently holding a slot."""
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        """int: The number of tasks currently waiting for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Waits for (and takes) a free slot.
+
+        Raises
+        ------
+        AdmissionError
+            If the wait queue is full or no slot became available within
+            the ``timeout``.
+
+        """
+        if not self.enabled:
+            return
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionError("Wait queue is full")
+
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        handle = loop.call_later(self.timeout, self._expire, waiter)
+        try:
+            await waiter
+        except AdmissionError:
+            self.timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # - Slot was handed over just as we were cancelled
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        finally:
+            handle.cancel()
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Frees a slot, handing it to the next waiting task (if any)."""
+        if not self.enabled:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active = max(self._active - 1, 0)
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current usage statistics for this limiter.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The current limits, active/queued task counts and totals of
+            admitted, rejected and timed-out tasks.
+
+        """
+        return {
+            'limit': self.limit,
+            'max_queue': self.max_queue,
+            'timeout': self.timeout,
+            'active': self._active,
+            'queued': len(self._waiters),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+        }
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        """Rejects the given `waiter` (if still waiting)."""
+        if not waiter.done():
+            self._discard(waiter)
+            waiter.set_exception(AdmissionError("Timed out waiting"))
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        """Removes the given `waiter` from the queue."""
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Bloom filter utilities.
+"""
+import hashlib
+import math
+import threading
+import typing as tp
+
+
+class BloomFilter:
+    """
+    Thread-safe Bloom filter for string items.
+
+    Membership tests never give false negatives, but may give false
+    positives at (roughly) the `error_rate` given, so long as no more
+    than `capacity` items are added.
+
+    Parameters
+    ----------
+    capacity : int
+        The expected (maximum) number of items to hold.
+    error_rate : float, optional
+        The target false positive rate at full capacity (default is
+        ``0.001``).
+
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = math.ceil(
+            -self.capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(item))
+
+    def _indexes(self, item: str) -> tp.Iterator[int]:
+        """Gets the bit indexes for the given `item` (double hashing)."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    @property
+    def full(self) -> bool:
+        """bool: Whether or not this filter has reached its capacity."""
+        return self.count >= self.capacity
+
+    def add(self, item: str) -> None:
+        """Adds the given `item` to this filter.
+
+        Items which (appear to) already be in the filter are skipped, so
+        that re-adding items doesn't count towards the capacity.
+
+        Parameters
+        ----------
+        item : str
+            The item to add.
+
+        """
+        indexes = list(self._indexes(item))
+        with self._lock:
+            if all(self._bits[i >> 3] & (1 << (i & 7)) for i in indexes):
+                return
+            for i in indexes:
+                self._bits[i >> 3] |= 1 << (i & 7)
+            self.count += 1
+
+    def update(self, items: tp.Iterable[str]) -> None:
+        """Adds all of the given `items` to this filter."""
+        for item in items:
+            self.add(item)
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current statistics for this filter.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The capacity, target error rate, size (in bits), number of
+            hash functions and number of items added for this filter.
+
+        """
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'size': self.size,
+            'hashes': self.hashes,
+            'count': self.count,
+        }
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Caching utilities.
+"""
+from collections import OrderedDict
+import threading
+import time
+import typing as tp
+
+KT = tp.TypeVar('KT')
+VT = tp.TypeVar('VT')
+
+
+class TTLCache(tp.Generic[KT, VT]):
+    """
+    Thread-safe, size-bounded LRU cache with per-entry expiration.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of entries to hold before evicting the least
+        recently used entry (default is ``128``).
+    ttl : float, optional
+        The number of seconds entries remain valid for (default is
+        ``60``).  A `maxsize` or `ttl` of zero (or less) disables the
+        cache entirely.
+    timer : Callable[[], float], optional
+        The clock function to use for expiration (default is
+        :obj:`time.monotonic`).
+
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float = 60.0,
+        *,
+        timer: tp.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[KT, tp.Tuple[float, VT]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """bool: Whether or not this cache will store any entries."""
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: tp.Any) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[0] > self.timer()
+
+    def get(
+        self,
+        key: KT,
+        default: tp.Optional[VT] = None,
+    ) -> tp.Optional[VT]:
+        """Gets the (unexpired) value stored for the given `key`.
+
+        Parameters
+        ----------
+        key : KT
+            The key of the entry to get.
+        default : VT, optional
+            The value to return if there's no valid entry for `key`.
+
+        Returns
+        -------
+        Optional[VT]
+            The cached value (if found and unexpired, otherwise the
+            `default` given).
+
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                if item[0] > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[1]
+                del self._data[key]
+            self.misses += 1
+        return default
+
+    def set(self, key: KT, value: VT, ttl: tp.Optional[float] = None) -> None:
+        """Stores the given `value` for the `key` specified.
+
+        Parameters
+        ----------
+        key : KT
+            The key to store the `value` under.
+        value : VT
+            The value to store.
+        ttl : float, optional
+            The number of seconds this entry is valid for, if less than
+            the cache's default (if not given the cache's ``ttl`` is
+            used).
+
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self.timer() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(
+        self,
+        key: KT,
+        default: tp.Optional[VT] = None,
+    ) -> tp.Optional[VT]:
+        """Removes (and returns) the entry for the given `key`, if any."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None:
+            return default
+        return item[1]
+
+    def clear(self) -> None:
+        """Removes all entries from this cache."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current usage statistics for this cache.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The current size, capacity, TTL and hit/miss counts for
+            this cache.
+
+        """
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+
+class SizedLRUCache(tp.Generic[KT, VT]):
+    """
+    Thread-safe LRU cache bounded by the total size of its values.
+
+    Lookups are counted by (caller-given) group as well as overall, so
+    the hit rates of the different users of a shared cache can be told
+    apart.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The total size of the values to hold before evicting the least
+        recently used entries.  A `max_bytes` of zero (or less) disables
+        the cache entirely, and values larger than it aren't stored.
+    sizeof : Callable[[VT], int], optional
+        The function to get the size (in bytes) of a value with
+        (default is :obj:`len`).
+
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        sizeof: tp.Optional[tp.Callable[[VT], int]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.sizeof: tp.Callable[[tp.Any], int] = sizeof or len
+        self.size = 0
+        self.evictions = 0
+        self._groups: tp.Dict[str, tp.List[int]] = {}
+        self._data: 'OrderedDict[KT, tp.Tuple[int, VT]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """bool: Whether or not this cache will store any entries."""
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(
+        self,
+        key: KT,
+        default: tp.Optional[VT] = None,
+        *,
+        group: str = '',
+    ) -> tp.Optional[VT]:
+        """Gets the value stored for the given `key`.
+
+        Parameters
+        ----------
+        key : KT
+            The key of the entry to get.
+        default : VT, optional
+            The value to return if there's no entry for `key`.
+        group : str, optional
+            The group to count the lookup (hit or miss) under.
+
+        Returns
+        -------
+        Optional[VT]
+            The cached value (if found, otherwise the `default` given).
+
+        """
+        with self._lock:
+            counts = self._groups.setdefault(group, [0, 0])
+            item = self._data.get(key)
+            if item is None:
+                counts[1] += 1
+                return default
+            self._data.move_to_end(key)
+            counts[0] += 1
+            return item[1]
+
+    def set(self, key: KT, value: VT) -> None:
+        """Stores the given `value` for the `key` specified.
+
+        Parameters
+        ----------
+        key : KT
+            The key to store the `value` under.
+        value : VT
+            The value to store.
+
+        """
+        size = self.sizeof(value)
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[0]
+            self._data[key] = (size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (old_size, _) = self._data.popitem(last=False)
+                self.size -= old_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes all entries from this cache."""
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def stats(self) -> tp.Dict[str, tp.Any]:
+        """Gets the current usage statistics for this cache.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The current size (in entries and bytes), capacity, eviction
+            count and hit/miss counts for this cache, overall and by
+            group.
+
+        """
+        with self._lock:
+            groups = {k: tuple(v) for k, v in self._groups.items()}
+        hits = sum(x[0] for x in groups.values())
+        misses = sum(x[1] for x in groups.values())
+        return {
+            'size': len(self._data),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': (hits / (hits + misses)) if hits + misses else 0.0,
+            'groups': {
+                k: {
+                    'hits': h,
+                    'misses': m,
+                    'hit_rate': (h / (h + m)) if h + m else 0.0,
+                }
+                for k, (h, m) in sorted(groups.items())
+            },
+        }
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Pagination cursor utilities.
+"""
+import base64
+import binascii
+import json
+import typing as tp
+
+
+def encode_cursor(key: tp.Sequence[tp.Any]) -> str:
+    """Encodes the given (sort) key values as an opaque cursor.
+
+    Parameters
+    ----------
+    key : Sequence[Any]
+        The (JSON-serializable) sort key values of the last item on the
+        current page.
+
+    Returns
+    -------
+    str
+        The URL-safe cursor for the page after the item.
+
+    """
+    data = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tp.List[tp.Any]:
+    """Decodes the (sort) key values from the given cursor.
+
+    Parameters
+    ----------
+    cursor : str
+        The cursor to decode (as given by :obj:`encode_cursor`).
+
+    Returns
+    -------
+    List[Any]
+        The sort key values encoded in the `cursor`.
+
+    Raises
+    ------
+    ValueError
+        If the `cursor` isn't a valid cursor.
+
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        ret = json.loads(data.decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(ret, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return ret
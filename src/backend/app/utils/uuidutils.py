@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+UUID utilities.
+"""
+import os
+import random
+import threading
+import time
+import typing as tp
+from uuid import (
+    UUID,
+    uuid4,
+)
+
+from app.core.config import settings
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_last_seq = 0
+
+
+def uuid7() -> UUID:
+    """Generates a new, time-ordered, version 7 UUID (RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds and the next 12
+    (after the version) a counter, started at a random value each
+    millisecond, so UUIDs generated by this process are strictly
+    increasing (even within the same millisecond).  The remaining 62
+    bits are random.
+
+    Returns
+    -------
+    UUID
+        The new UUID.
+
+    """
+    global _uuid7_last_ms, _uuid7_last_seq
+
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _uuid7_last_ms:
+            # - Leave headroom in the counter for this millisecond
+            seq = random.getrandbits(11)
+        else:
+            ms = _uuid7_last_ms
+            seq = _uuid7_last_seq + 1
+            if seq > 0xFFF:
+                ms += 1
+                seq = random.getrandbits(11)
+        _uuid7_last_ms, _uuid7_last_seq = ms, seq
+
+    rand = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    return UUID(
+        int=(ms << 80) | (0x7 << 76) | (seq << 64) | (0b10 << 62) | rand
+    )
+
+
+UID_GENERATORS: tp.Dict[str, tp.Callable[[], UUID]] = {
+    'uuid4': uuid4,
+    'uuid7': uuid7,
+}
+"""Dict[str, Callable[[], UUID]]: The UID generators, by setting name."""
+
+
+def new_uid() -> UUID:
+    """Generates a new UID with the ``UID_GENERATOR`` setting's method.
+
+    Returns
+    -------
+    UUID
+        The new UID.
+
+    """
+    return UID_GENERATORS[settings.UID_GENERATOR]()
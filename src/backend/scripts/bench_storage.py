@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the concurrency of the (synchronous and asyncio) SQLAlchemy
+storage drivers, on scratch SQLite databases.
+
+Each driver is run in its own process (the driver is picked from the
+settings at import time): the database is set up and seeded with users,
+then the requests (each a unit of work reading all the users) are served
+concurrently on a single event loop, while a ticker measures how late
+the event loop runs it (i.e. how long other requests were blocked).
+
+Usage::
+
+    python scripts/bench_storage.py [--requests N] [--concurrency N]
+                                    [--users N] [--driver NAME ...]
+
+The asyncio driver needs SQLAlchemy 1.4+ and ``aiosqlite`` (see the
+``async`` extra).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing as tp
+
+DRIVERS = ('sqlalchemy', 'sqlalchemy_async')
+"""Tuple[str, ...]: The storage drivers to benchmark (by default)."""
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+"""str: The backend project directory (containing the ``app`` package)."""
+
+BENCH_DEFAULTS = {
+    'FIRST_ADMIN_USER': 'admin@example.com',
+    'FIRST_ADMIN_PASSWORD': 'bench',
+    'SERVER_HOST': 'localhost',
+}
+"""Dict[str, str]: Defaults for the required settings (if not set)."""
+
+TICK_SECONDS = 0.001
+"""float: The interval the event loop (lag) ticker runs at."""
+
+
+def _parse_args(argv: tp.Optional[tp.Sequence[str]] = None) -> tp.Any:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=200,
+        help="Number of requests to serve (per driver).",
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=20,
+        help="Number of requests to serve at once.",
+    )
+    parser.add_argument(
+        '--users',
+        type=int,
+        default=500,
+        help="Number of users to seed the database with.",
+    )
+    parser.add_argument(
+        '--driver',
+        dest='drivers',
+        action='append',
+        choices=DRIVERS,
+        help="Driver(s) to benchmark (default: all).",
+    )
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def _benchmark(
+    requests: int,
+    concurrency: int,
+    users: int,
+) -> tp.Dict[str, float]:
+    """Seeds the configured storage and serves the requests."""
+    from app.crud.core import (
+        create_uow,
+        dispose_storage,
+    )
+    from app.schema import UserCreate
+
+    uow = create_uow()
+    try:
+        async with uow:
+            await uow.user.create_many([
+                UserCreate(email=f"user{i}@example.com", password='bench')
+                for i in range(users)
+            ])
+    finally:
+        await uow.aclose()
+
+    loop = asyncio.get_running_loop()
+    done = asyncio.Event()
+    lags: tp.List[float] = []
+
+    async def _tick() -> None:
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(loop.time() - start - TICK_SECONDS)
+
+    limit = asyncio.Semaphore(concurrency)
+    latencies: tp.List[float] = []
+
+    async def _request() -> None:
+        async with limit:
+            start = time.perf_counter()
+            uow = create_uow()
+            try:
+                await uow.run_sync(uow.user.get_multi, limit=None)
+            finally:
+                await uow.aclose()
+            latencies.append(time.perf_counter() - start)
+
+    ticker = asyncio.ensure_future(_tick())
+    start = time.perf_counter()
+    await asyncio.gather(*(_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    await dispose_storage()
+
+    latencies.sort()
+    return {
+        'elapsed_s': elapsed,
+        'requests_per_s': requests / elapsed,
+        'p50_ms': 1000 * statistics.median(latencies),
+        'p99_ms': 1000 * latencies[int(0.99 * (len(latencies) - 1))],
+        'max_loop_lag_ms': 1000 * max(lags, default=0.0),
+    }
+
+
+def _run_child(args: tp.Any) -> int:
+    from app.crud.core import setup
+
+    setup()
+    result = asyncio.run(
+        _benchmark(args.requests, args.concurrency, args.users)
+    )
+    print(json.dumps(result))
+    return 0
+
+
+def _run_driver(
+    driver: str,
+    args: tp.Any,
+    db_dir: str,
+) -> tp.Optional[tp.Dict[str, float]]:
+    """Runs the benchmark for the given `driver` (in a new process)."""
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(
+            x for x in (PROJECT_DIR, os.environ.get('PYTHONPATH')) if x
+        ),
+        'CRUD_DRIVER': driver,
+        'DB_ENGINE': 'sqlite',
+        'DB_NAME': f"{driver}.sqlite3",
+        'DB_CONNECT_EXTRA': '{}',
+        'PASSWORD_HASH_SCHEMES': '["plaintext"]',
+    }
+    for k, v in BENCH_DEFAULTS.items():
+        env.setdefault(k, v)
+
+    cmd = [
+        sys.executable, os.path.abspath(__file__), '--child',
+        '--requests', str(args.requests),
+        '--concurrency', str(args.concurrency),
+        '--users', str(args.users),
+    ]
+    proc = subprocess.run(
+        cmd,
+        env=env,
+        cwd=db_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()
+        print(f"{driver}: failed ({err[-1] if err else proc.returncode})")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: tp.Optional[tp.Sequence[str]] = None) -> int:
+    args = _parse_args(argv)
+    if args.child:
+        return _run_child(args)
+
+    print(
+        f"{args.requests} requests, {args.concurrency} at once, reading"
+        f" {args.users} users each"
+    )
+    print(
+        f"{'driver':<18}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'max lag ms':>12}"
+    )
+    with tempfile.TemporaryDirectory() as db_dir:
+        for driver in (args.drivers or DRIVERS):
+            result = _run_driver(driver, args, db_dir)
+            if result is None:
+                continue
+            print(
+                f"{driver:<18}{result['requests_per_s']:>10.1f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+                f"{result['max_loop_lag_ms']:>12.1f}"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,5 +3,8 @@
 # Check if storage is ready
 app storage check
 
+# Bring existing storage up to date
+app storage migrate
+
 # Create initial data in DB
 app storage setup
@@ -36,6 +36,8 @@ REQUIRES = [
 ]
 
 EXTRAS_REQUIRE = {
+    "argon2": ["argon2-cffi"],
+    "async": ["sqlalchemy>=1.4", "aiosqlite", "asyncpg"],
     "postgres": ["psycopg2-binary"],
 }
 
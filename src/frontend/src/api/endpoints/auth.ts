@@ -18,8 +18,12 @@ const api = {
     );
   },
 
-  async logout(): Promise<IMsg> {
-    return request.post('/logout');
+  async loginRefreshToken(refreshToken: string): Promise<IToken> {
+    return request.post('/login/refresh', { refreshToken });
+  },
+
+  async logout(refreshToken?: string): Promise<IMsg> {
+    return request.post('/logout', { refreshToken });
   },
 
   async testToken(): Promise<IUser> {
@@ -1,6 +1,8 @@
 export interface IToken {
   accessToken: string;
   tokenType: string;
+  expiresIn?: number;
+  refreshToken?: string;
 }
 
 export interface ITokenPayload {
@@ -10,7 +10,14 @@ import api from '@/api';
 import { IMsg, IUser } from '@/api/schema';
 import { resetRouter } from '@/router';
 import store from '@/store';
-import { getLocalToken, saveLocalToken, removeLocalToken } from '@/utils/local';
+import {
+  getLocalRefreshToken,
+  getLocalToken,
+  removeLocalRefreshToken,
+  removeLocalToken,
+  saveLocalRefreshToken,
+  saveLocalToken,
+} from '@/utils/local';
 import { getToken, removeToken, setToken } from '@/utils/cookies';
 
 import AppModule from './app';
@@ -18,6 +25,7 @@ import AppModule from './app';
 @Module({ name: 'auth', dynamic: true, store })
 class AuthModule extends VuexModule {
   public token: string = getLocalToken() || getToken() || '';
+  public refreshToken: string = getLocalRefreshToken() || '';
   public loggedIn = false;
   public loginError = false;
   public user: IUser | null = null;
@@ -50,6 +58,16 @@ class AuthModule extends VuexModule {
     }
   }
 
+  @Mutation
+  private SET_REFRESH_TOKEN(token: string) {
+    this.refreshToken = token;
+    if (token !== '') {
+      saveLocalRefreshToken(token);
+    } else {
+      removeLocalRefreshToken();
+    }
+  }
+
   @Mutation
   private SET_LOGGED_IN(value: boolean) {
     this.loggedIn = value;
@@ -95,9 +113,10 @@ class AuthModule extends VuexModule {
     let loggedIn = false;
     let loginError = false;
     try {
-      const { accessToken } = await api.auth.loginAccessToken(email, password);
+      const { accessToken, refreshToken } = await api.auth.loginAccessToken(email, password);
       if (accessToken) {
         this.SET_TOKEN(accessToken);
+        this.SET_REFRESH_TOKEN(refreshToken || '');
         loggedIn = true;
         AppModule.CookiesNotified();
         await this.GetUserInfo();
@@ -112,6 +131,23 @@ class AuthModule extends VuexModule {
     return loggedIn;
   }
 
+  @Action
+  public async RefreshTokens(): Promise<boolean> {
+    if (this.refreshToken === '') {
+      return false;
+    }
+
+    const tokens = await api.auth.loginRefreshToken(this.refreshToken)
+      .catch(() => null);
+    if (tokens === null || !tokens.accessToken) {
+      this.SET_REFRESH_TOKEN('');
+      return false;
+    }
+    this.SET_TOKEN(tokens.accessToken);
+    this.SET_REFRESH_TOKEN(tokens.refreshToken || '');
+    return true;
+  }
+
   @Action
   public async GetUserInfo() {
     if (this.token === '') {
@@ -127,10 +163,11 @@ class AuthModule extends VuexModule {
       throw Error("User is not logged in");
     }
 
-    const msg = await api.auth.logout();
+    const msg = await api.auth.logout(this.refreshToken || undefined);
 
     resetRouter();
     this.SET_TOKEN('');
+    this.SET_REFRESH_TOKEN('');
     this.SET_LOGGED_IN(false);
     this.SET_LOGIN_ERROR(false);
     this.SET_USER(null);
@@ -34,6 +34,20 @@ export const removeLocalToken = () => {
   return removeLocal(TOKEN_KEY);
 };
 
+const REFRESH_TOKEN_KEY = "refresh_token";
+
+export const getLocalRefreshToken = () => {
+  return getLocal(REFRESH_TOKEN_KEY);
+};
+
+export const saveLocalRefreshToken = (token: string) => {
+  return setLocal(REFRESH_TOKEN_KEY, token);
+};
+
+export const removeLocalRefreshToken = () => {
+  return removeLocal(REFRESH_TOKEN_KEY);
+};
+
 export default {
   getLocal,
   setLocal,
@@ -41,4 +55,7 @@ export default {
   getLocalToken,
   saveLocalToken,
   removeLocalToken,
+  getLocalRefreshToken,
+  saveLocalRefreshToken,
+  removeLocalRefreshToken,
 };
@@ -31,7 +31,18 @@ service.interceptors.response.use(
     }
     return res;
   },
-  function (error) {
+  async function (error) {
+    // - Expired access token: refresh (once) and retry
+    const config = error.config;
+    if (
+      error.response && error.response.status === 403
+      && config && !config.retried && config.url !== '/login/refresh'
+      && await AuthModule.RefreshTokens()
+    ) {
+      config.retried = true;
+      config.headers.Authorization = `Bearer ${AuthModule.token}`;
+      return service(config);
+    }
     return Promise.reject(error);
   },
 );